@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+adaptive_contour.py
+Quadtree sampling of |χ(s)| that concentrates points on the |χ| = 1 contour.
+
+The (σ, t) rectangle starts as a coarse grid of cells. A cell is split into
+four while it is above the depth limit and either
+  * |χ| - 1 changes sign across its corners or centre (the contour, and the
+    log-deviation trench, pass through it), or
+  * log|χ| varies across it by more than --grad-tol.
+Every level is evaluated as one vectorized chi_points() batch, and points
+shared between cells are computed once (they live on an integer lattice at
+the finest resolution).
+
+The output CSV has the same columns as chi_magnitude_heatmap_grid.csv, so
+resonance_heatmap_grid.py can plot_trisurf it directly:
+
+    python adaptive_contour.py
+    python resonance_heatmap_grid.py --input chi_magnitude_adaptive_mesh.csv
+"""
+
+import argparse
+import csv
+
+import numpy as np
+
+from chi_engine import chi_points
+
+SIGMA_MIN, SIGMA_MAX = 0.3, 0.7
+T_MIN, T_MAX = 10.0, 40.0
+
+BASE_CELLS = (8, 6)      # (σ, t) cells at depth 0
+MAX_DEPTH = 6
+GRAD_TOL = 0.05          # max spread of log|χ| over an unsplit cell
+ZERO_TOL = 1e-12         # |log|χ|| below this counts as on the contour
+DPS = None               # mpmath digits for escalated points (None: per point)
+
+CSV_FILENAME = "chi_magnitude_adaptive_mesh.csv"
+
+
+class AdaptiveMesh:
+    """Quadtree refinement state: lattice points and their |χ| values."""
+
+    def __init__(self, sigma_range=(SIGMA_MIN, SIGMA_MAX), t_range=(T_MIN, T_MAX),
+                 base_cells=BASE_CELLS, max_depth=MAX_DEPTH, dps=DPS):
+        self.sigma_range = sigma_range
+        self.t_range = t_range
+        self.base_cells = base_cells
+        self.max_depth = max_depth
+        self.dps = dps
+        # Lattice spacing at the finest level
+        self.unit = 2 ** max_depth
+        self.n_sigma = base_cells[0] * self.unit
+        self.n_t = base_cells[1] * self.unit
+        self.values = {}        # (i_sigma, i_t) → |χ|
+
+    def coords(self, keys):
+        keys = np.asarray(keys, dtype=float).reshape(-1, 2)
+        s0, s1 = self.sigma_range
+        t0, t1 = self.t_range
+        return (s0 + keys[:, 0] * (s1 - s0) / self.n_sigma,
+                t0 + keys[:, 1] * (t1 - t0) / self.n_t)
+
+    def evaluate(self, keys):
+        """Compute |χ| for every lattice point in keys not seen before."""
+        new = sorted({k for k in keys if k not in self.values})
+        if new:
+            sigma, t = self.coords(new)
+            for key, mag in zip(new, chi_points(sigma, t, dps=self.dps)):
+                self.values[key] = float(mag)
+        return len(new)
+
+    @staticmethod
+    def cell_points(cell):
+        i, j, size = cell
+        pts = [(i, j), (i + size, j), (i, j + size), (i + size, j + size)]
+        if size > 1:
+            half = size // 2
+            pts.append((i + half, j + half))
+        return pts
+
+    def should_split(self, cell, grad_tol):
+        logs = np.log([self.values[p] for p in self.cell_points(cell)])
+        # A corner exactly on the contour (e.g. σ = 0.5 on a cell edge) counts
+        # as a crossing for both neighbouring cells
+        crosses = logs.min() <= ZERO_TOL and logs.max() >= -ZERO_TOL
+        return crosses or (logs.max() - logs.min()) > grad_tol
+
+    def refine(self, grad_tol=GRAD_TOL, verbose=True):
+        """Run the quadtree to max_depth; return the list of leaf cells."""
+        cells = [(i * self.unit, j * self.unit, self.unit)
+                 for j in range(self.base_cells[1]) for i in range(self.base_cells[0])]
+        leaves = []
+        for depth in range(self.max_depth + 1):
+            added = self.evaluate([p for c in cells for p in self.cell_points(c)])
+            split = []
+            for cell in cells:
+                if cell[2] > 1 and self.should_split(cell, grad_tol):
+                    i, j, size = cell
+                    half = size // 2
+                    split += [(i, j, half), (i + half, j, half),
+                              (i, j + half, half), (i + half, j + half, half)]
+                else:
+                    leaves.append(cell)
+            if verbose:
+                print(f"Depth {depth}: {len(cells)} cells, {added} new points, "
+                      f"{len(split) // 4} split")
+            cells = split
+        return leaves + cells
+
+    def points(self):
+        """(σ, t, |χ|) arrays of every evaluated point, sorted by (t, σ)."""
+        keys = sorted(self.values, key=lambda k: (k[1], k[0]))
+        sigma, t = self.coords(keys)
+        return sigma, t, np.array([self.values[k] for k in keys])
+
+    def contour_crossings(self):
+        """σ where |χ| = 1 on each lattice row, by linear interpolation in log|χ|."""
+        rows = {}
+        for (i, j), mag in self.values.items():
+            rows.setdefault(j, []).append((i, np.log(mag)))
+        crossings = []
+        for j, row in sorted(rows.items()):
+            row.sort()
+            for (i0, l0), (i1, l1) in zip(row, row[1:]):
+                if abs(l0) <= ZERO_TOL:
+                    crossings.append((j, float(i0)))
+                elif l0 * l1 < 0 and abs(l1) > ZERO_TOL:
+                    crossings.append((j, i0 + (i1 - i0) * l0 / (l0 - l1)))
+        if not crossings:
+            return np.empty(0), np.empty(0)
+        j, i = np.array(crossings).T
+        s0, s1 = self.sigma_range
+        t0, t1 = self.t_range
+        return s0 + i * (s1 - s0) / self.n_sigma, t0 + j * (t1 - t0) / self.n_t
+
+    def write_csv(self, path):
+        sigma, t, mag = self.points()
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["t", "sigma", "chi_magnitude", "chi_deviation_from_1"])
+            for ti, si, m in zip(t.tolist(), sigma.tolist(), mag.tolist()):
+                writer.writerow([ti, si, m, abs(m - 1.0)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Adaptive |χ| = 1 contour sampler.")
+    parser.add_argument("--depth", type=int, default=MAX_DEPTH,
+                        help=f"maximum quadtree depth (default: {MAX_DEPTH})")
+    parser.add_argument("--base", type=int, nargs=2, default=BASE_CELLS,
+                        metavar=("N_SIGMA", "N_T"), help="cells at depth 0")
+    parser.add_argument("--grad-tol", type=float, default=GRAD_TOL,
+                        help=f"split cells whose log|χ| spread exceeds this (default: {GRAD_TOL})")
+    parser.add_argument("--output", default=CSV_FILENAME)
+    args = parser.parse_args(argv)
+
+    mesh = AdaptiveMesh(base_cells=tuple(args.base), max_depth=args.depth)
+    leaves = mesh.refine(args.grad_tol)
+    mesh.write_csv(args.output)
+
+    n_uniform = (mesh.n_sigma + 1) * (mesh.n_t + 1)
+    cross_sigma, _ = mesh.contour_crossings()
+    print(f"\n{len(mesh.values)} evaluations, {len(leaves)} leaf cells "
+          f"({100 * len(mesh.values) / n_uniform:.2f}% of the "
+          f"{mesh.n_sigma + 1}×{mesh.n_t + 1} uniform grid at the same resolution)")
+    if len(cross_sigma):
+        print(f"|χ|=1 crossings: {len(cross_sigma)}, "
+              f"max |σ* - 0.5| = {np.abs(cross_sigma - 0.5).max():.3e}")
+    print(f"Mesh written → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
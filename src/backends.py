@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+backends.py
+Interchangeable arbitrary-precision engines for χ(s) and ζ(s).
+
+Every backend has the same two functions, chi(s) and zeta(s): an mpmath
+mpc in, an mpmath mpc out, at the current mp precision. Callers
+(chi_engine.chi, eval_cache.zeta_cached and everything built on them)
+never see which library did the work.
+
+    mpmath   mpmath on Python integers
+    gmpy     the same code on gmpy2 integers, several times faster at
+             high precision; mpmath picks gmpy2 when it is imported
+             (MPMATH_NOGMPY=1 turns that off), so exactly one of mpmath
+             and gmpy is available in a process
+    flint    python-flint's acb (Arb): the value is a ball, recomputed at
+             doubled precision until it is accurate to the mp precision,
+             and its midpoint is returned exactly
+
+$RH_RESONANCE_BACKEND picks one; by default the fastest available is
+used, in the order of PREFERENCE.
+
+    python backends.py      # every available backend against a reference
+"""
+
+import importlib.util
+import os
+from collections import namedtuple
+
+from mpmath import mp
+from mpmath.libmp import BACKEND as MPMATH_INTEGERS
+
+PREFERENCE = ("flint", "gmpy", "mpmath")
+FLINT_GUARD_BITS = 32
+FLINT_MAX_PREC = 1 << 16
+
+# chi, zeta: mpc → mpc at the current mp precision; detail: what it runs on
+Backend = namedtuple("Backend", ["name", "chi", "zeta", "detail"])
+
+
+def _mp_chi(s):
+    """χ(s) = 2^s · π^(s-1) · sin(πs/2) · Γ(1-s)"""
+    return (mp.power(2, s) * mp.power(mp.pi, s - 1) *
+            mp.sin(mp.pi * s / 2) * mp.gamma(1 - s))
+
+
+def _to_arb(x):
+    from flint import arb
+
+    # _mpf_ is (sign, |mantissa|, exponent, bits); x.man would drop the sign
+    sign, man, exp, _ = x._mpf_
+    man = -int(man) if sign else int(man)
+    return arb(man) * arb(2) ** exp if exp >= 0 else arb(man) / arb(2) ** -exp
+
+
+def _from_arb(x):
+    man, exp = x.mid().man_exp()
+    return mp.mpf((int(man), int(exp)))
+
+
+def _flint_eval(build, s):
+    """build(acb s) at doubling precision until the ball meets mp.prec bits."""
+    import flint
+
+    s = mp.mpc(s)
+    saved = flint.ctx.prec
+    prec = mp.prec + FLINT_GUARD_BITS
+    try:
+        while True:
+            flint.ctx.prec = prec
+            value = build(flint.acb(_to_arb(s.real), _to_arb(s.imag)))
+            tiny = flint.arb(2) ** -(mp.prec + FLINT_GUARD_BITS)
+            if value.rel_accuracy_bits() >= mp.prec or value.rad() < tiny:
+                return mp.mpc(_from_arb(value.real), _from_arb(value.imag))
+            if prec >= FLINT_MAX_PREC:
+                # A pole or a ball that will not tighten, as mpmath's ValueError
+                raise ValueError(f"no accurate enclosure at s = {s}")
+            prec *= 2
+    finally:
+        flint.ctx.prec = saved
+
+
+def _flint_chi(s):
+    def build(z):
+        import flint
+
+        pi = flint.acb(flint.arb.pi())
+        return flint.acb(2) ** z * pi ** (z - 1) * (pi * z / 2).sin() * (1 - z).gamma()
+    return _flint_eval(build, s)
+
+
+def _flint_zeta(s):
+    return _flint_eval(lambda z: z.zeta(), s)
+
+
+def _flint_detail():
+    import flint
+
+    return f"python-flint {flint.__version__}"
+
+
+_AVAILABLE = {
+    "mpmath": lambda: MPMATH_INTEGERS == "python",
+    "gmpy": lambda: MPMATH_INTEGERS == "gmpy",
+    "flint": lambda: importlib.util.find_spec("flint") is not None,
+}
+
+
+def available_backends():
+    """Names of the backends this process can use, fastest first."""
+    return [name for name in PREFERENCE if _AVAILABLE[name]()]
+
+
+def _make(name):
+    if name == "flint":
+        return Backend("flint", _flint_chi, _flint_zeta, _flint_detail())
+    return Backend(name, _mp_chi, mp.zeta, f"mpmath on {MPMATH_INTEGERS} integers")
+
+
+_backends = {}
+
+
+def get_backend(name=None):
+    """The backend called name, else $RH_RESONANCE_BACKEND, else the fastest."""
+    name = name or os.environ.get("RH_RESONANCE_BACKEND") or available_backends()[0]
+    if name not in _backends:
+        if name not in _AVAILABLE:
+            raise ValueError(f"unknown backend {name!r}; choose from {', '.join(PREFERENCE)}")
+        if not _AVAILABLE[name]():
+            hint = {"mpmath": "set MPMATH_NOGMPY=1 to run mpmath without gmpy2",
+                    "gmpy": "install gmpy2", "flint": "install python-flint"}[name]
+            raise ValueError(f"backend {name!r} is not available here ({hint}); "
+                             f"available: {', '.join(available_backends())}")
+        _backends[name] = _make(name)
+    return _backends[name]
+
+
+if __name__ == "__main__":
+    import time
+
+    from precision import choose_dps
+
+    # ζ is compared with an absolute floor of 1, like precision.verify, since
+    # it is tiny near the zero at t = 14.13...
+    points = [(0.5, 14.134725141734694), (0.5, -14.0), (0.3, 1e3), (0.7, 1e5), (2.5, 0.5),
+              (-3.5, 2.0), (-3.5, -2.0)]
+    for name in available_backends():
+        backend = get_backend(name)
+        for digits in (20, 60):
+            rtol = 10.0 ** -digits
+            worst = {"chi": 0.0, "zeta": 0.0}
+            start = time.perf_counter()
+            for sigma, t in points:
+                for kind in worst:
+                    dps = choose_dps(sigma, t, rtol, kind)
+                    with mp.workdps(dps):
+                        value = getattr(backend, kind)(mp.mpc(sigma, t))
+                    with mp.workdps(2 * dps + 20):
+                        s = mp.mpc(sigma, t)
+                        reference = _mp_chi(s) if kind == "chi" else mp.zeta(s)
+                        floor = 1 if kind == "zeta" else 0
+                        error = float(abs(value - reference) / max(abs(reference), floor))
+                    worst[kind] = max(worst[kind], error)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<7} ({backend.detail}) rtol {rtol:.0e}: max error "
+                  f"χ {worst['chi']:.1e}, ζ {worst['zeta']:.1e}; "
+                  f"{elapsed / (2 * len(points)) * 1e3:.2f} ms per call")
+            for kind, error in worst.items():
+                assert error <= rtol, (name, kind, rtol, error)
+    print(f"backends agree with the reference; default here: {get_backend().name}")
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+benchmarks.py
+Timing matrix for the χ, ζ and expansion kernels and the end-to-end sweeps.
+
+Each kernel is timed across (dps, σ, t magnitude, batch size); the sweep
+and heatmap scripts are timed end to end in a scratch directory. The eval
+cache is switched off, so every mpmath call is really made. Results are
+written as JSON and can be compared with a saved baseline; any case whose
+time per call grew by more than --threshold fails the run.
+
+    python benchmarks.py --output bench.json               # record
+    python benchmarks.py --baseline bench.json             # compare
+    python benchmarks.py --quick --filter zeta             # subset
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+import mpmath
+from mpmath import mp
+
+OUTPUT_FILE = "benchmark_results.json"
+THRESHOLD = 0.25     # fail when a case gets more than 25% slower
+MIN_TIME = 0.2       # seconds of calls per repeat for the fast kernels
+REPEAT = 3
+
+DPS_LEVELS = (30, 100, 200)
+SIGMAS = (0.3, 0.5)
+T_MAGNITUDES = (1e1, 1e3, 1e5)
+BATCH_SIZES = (1000, 100000)
+EXPANSION_TERMS = 100
+
+# The first six zero heights, so the sweep benchmark never computes zeros
+FIRST_ZEROS = ("14.134725141734693790457251983562", "21.022039638771554992628479593897",
+               "25.010857580145688763213790992563", "30.424876125859513210311897530584",
+               "32.935061587739189690662368964075", "37.586178158825671257217763480705")
+
+# run: () → None does the work once; calls: the evaluations it makes;
+# repeat: timed runs (the fastest is kept)
+Case = namedtuple("Case", ["name", "params", "run", "calls", "repeat"])
+
+
+def case_id(name, params):
+    return name + "[" + ",".join(f"{k}={v:g}" if isinstance(v, float) else f"{k}={v}"
+                                 for k, v in params.items()) + "]"
+
+
+def _points(t_mag, count, seed=0):
+    """count t values spread over [t_mag, 2·t_mag)."""
+    return t_mag * (1 + np.random.default_rng(seed).random(count))
+
+
+def kernel_cases(quick=False):
+    from backends import available_backends, get_backend
+    from base_half_i_expansion import base_half_i_expansion_batch
+    from chi_engine import chi, log_abs_chi
+    from digit_expansion import expand_digits
+    from zeta_engine import rs_zeta_line
+
+    dps_levels = DPS_LEVELS[1:2] if quick else DPS_LEVELS
+    batches = BATCH_SIZES[:1] if quick else BATCH_SIZES
+    cases = []
+
+    for dps in dps_levels:
+        for sigma in SIGMAS:
+            for t_mag in T_MAGNITUDES:
+                s = mp.mpc(sigma, t_mag)
+
+                params = {"dps": dps, "sigma": sigma, "t": t_mag}
+                # mpmath and gmpy share the "_mp" names, so baselines taken
+                # with and without gmpy2 compare directly
+                for backend in map(get_backend, available_backends()):
+                    suffix = "arb" if backend.name == "flint" else "mp"
+
+                    def run_chi(s=s, dps=dps, f=backend.chi):
+                        with mp.workdps(dps):
+                            f(s)
+
+                    def run_zeta(s=s, dps=dps, f=backend.zeta):
+                        with mp.workdps(dps):
+                            f(s)
+
+                    cases.append(Case(f"chi_{suffix}", params, run_chi, 1, REPEAT))
+                    cases.append(Case(f"zeta_{suffix}", params, run_zeta, 1, REPEAT))
+
+        # Expansions of χ values at this precision
+        with mp.workdps(dps):
+            values = [chi(mp.mpc(0.5, t)) for t in _points(1e3, 100)]
+        cases.append(Case("half_i_expansion", {"dps": dps, "batch": len(values)},
+                          lambda v=values, d=dps: base_half_i_expansion_batch(
+                              v, EXPANSION_TERMS, dps=d),
+                          len(values), REPEAT))
+        cases.append(Case("digit_expansion", {"dps": dps, "batch": len(values)},
+                          lambda v=values, d=dps: expand_digits(v, 3 * d, dps=d),
+                          len(values), REPEAT))
+
+    for batch in batches:
+        for sigma in SIGMAS:
+            for t_mag in T_MAGNITUDES:
+                ts = _points(t_mag, batch)
+                sig = np.full(batch, sigma)
+                params = {"sigma": sigma, "t": t_mag, "batch": batch}
+                cases.append(Case("log_abs_chi", params,
+                                  lambda s=sig, t=ts: log_abs_chi(s, t), batch, REPEAT))
+                if t_mag >= 1e3:
+                    cases.append(Case("rs_zeta_line", params,
+                                      lambda s=sigma, t=np.sort(ts): rs_zeta_line(s, t),
+                                      batch, REPEAT))
+                    grid = t_mag + 0.01 * np.arange(batch)
+                    cases.append(Case("rs_zeta_grid", params,
+                                      lambda s=sigma, t=grid: rs_zeta_line(s, t),
+                                      batch, REPEAT))
+    return cases
+
+
+@contextlib.contextmanager
+def _scratch_dir():
+    """Run inside a temporary directory that is removed afterwards."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            yield tmp
+        finally:
+            os.chdir(cwd)
+
+
+def end_to_end_cases():
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    import chi_resonance_sweep
+    import resonance_heatmap
+
+    def run_sweep():
+        with _scratch_dir() as tmp:
+            zeros = os.path.join(tmp, "zeros.txt")
+            with open(zeros, "w") as f:
+                f.writelines(f"{n} {g}\n" for n, g in enumerate(FIRST_ZEROS, 1))
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                chi_resonance_sweep.main(["--zero-file", zeros])
+
+    def run_heatmap():
+        with _scratch_dir(), contextlib.redirect_stdout(open(os.devnull, "w")):
+            resonance_heatmap.main([])
+            plt.close("all")
+
+    return [Case("sweep", {"zeros": len(FIRST_ZEROS)}, run_sweep, 1, 1),
+            Case("heatmap", {"grid": "default"}, run_heatmap, 1, 1)]
+
+
+def time_case(case, min_time=MIN_TIME):
+    """Fastest time per call over case.repeat runs of at least min_time each."""
+    start = time.perf_counter()
+    case.run()
+    once = time.perf_counter() - start
+    if once >= 10 * min_time:
+        # Slow enough that repeats only add run time, not accuracy
+        return once / case.calls
+    loops = max(1, int(min_time / once)) if once < min_time else 1
+    best = once if loops == 1 else np.inf
+    for _ in range(case.repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            case.run()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best / case.calls
+
+
+def run_benchmarks(cases, verbose=True):
+    results = {}
+    for case in cases:
+        seconds = time_case(case)
+        key = case_id(case.name, case.params)
+        results[key] = {"seconds_per_call": seconds, "calls": case.calls}
+        if verbose:
+            print(f"  {key:<58} {seconds * 1e6:12.2f} µs/call")
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Print new/baseline ratios; return the ids that regressed past threshold."""
+    regressed = []
+    for key, entry in results.items():
+        if key not in baseline:
+            continue
+        ratio = entry["seconds_per_call"] / baseline[key]["seconds_per_call"]
+        flag = ""
+        if ratio > 1 + threshold:
+            regressed.append(key)
+            flag = "  ← REGRESSION"
+        print(f"  {key:<58} ×{ratio:6.2f}{flag}")
+    missing = sorted(set(baseline) - set(results))
+    if missing:
+        print(f"  ({len(missing)} baseline cases not run)")
+    return regressed
+
+
+def environment():
+    from backends import available_backends
+
+    return {"python": platform.python_version(), "numpy": np.__version__,
+            "mpmath": mpmath.__version__, "backend": mpmath.libmp.BACKEND,
+            "backends": available_backends(),
+            "machine": platform.machine(), "processor": platform.processor(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the χ/ζ/expansion kernels.")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="where to write results")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"allowed fractional slowdown per case (default: {THRESHOLD})")
+    parser.add_argument("--filter", default="", help="only cases whose id contains this")
+    parser.add_argument("--quick", action="store_true",
+                        help="one dps level and the smaller batch only")
+    parser.add_argument("--no-end-to-end", dest="end_to_end", action="store_false",
+                        help="skip the sweep and heatmap runs")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        if os.path.abspath(args.baseline) == os.path.abspath(args.output):
+            parser.error("--output would overwrite --baseline; write the new results elsewhere")
+        # Read before anything is written, so a bad path fails before the run
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    os.environ["RH_RESONANCE_CACHE"] = "off"
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+
+    cases = kernel_cases(args.quick) + (end_to_end_cases() if args.end_to_end else [])
+    cases = [c for c in cases if args.filter in case_id(c.name, c.params)]
+    print(f"Timing {len(cases)} cases (cache off)")
+    results = run_benchmarks(cases)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=1)
+    print(f"Results written → {args.output}")
+
+    if baseline is not None:
+        print(f"\nCompared with {args.baseline} (threshold +{args.threshold:.0%}):")
+        regressed = compare(results, baseline, args.threshold)
+        if regressed:
+            print(f"🛑 {len(regressed)} case(s) regressed")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+build_pipeline.py
+In-process, incremental build of every CSV, grid and figure.
+
+Each stage declares the files it reads (its own script and the modules it
+imports included) and the files it writes. A stage is rebuilt only when
+an output is missing or the content hash of its inputs or outputs differs
+from the last successful build, recorded in .build_state.json. Stages
+whose inputs are another stage's outputs run after it; independent stages
+run concurrently in threads. Stages that share mpmath's global context or
+pyplot's global state are serialized through a lock on that resource. A
+failed stage stops every stage downstream of it.
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import instrument
+
+STATE_FILE = ".build_state.json"
+
+Stage = namedtuple("Stage", ["name", "module", "func", "args", "inputs", "outputs", "uses"])
+
+CHI_DEPS = ["backends.py", "chi_engine.py", "eval_cache.py", "precision.py"]
+SWEEP_DEPS = CHI_DEPS + ["grid_store.py", "sweep_checkpoint.py", "sweep_stream.py",
+                         "tile_store.py"]
+PLOT_DEPS = ["plotting.py"]
+
+STAGES = [
+    Stage("sweep", "chi_resonance_sweep", "main", ([],),
+          inputs=["chi_resonance_sweep.py", "chi_roots.py", "resonance_heatmap.py",
+                  "zero_table.py"] + SWEEP_DEPS,
+          outputs=["chi_magnitude_sweep.csv", "chi_magnitude_sweep.chigrid"],
+          uses=["mpmath"]),
+    Stage("heatmap", "resonance_heatmap", "main", ([],),
+          inputs=["resonance_heatmap.py"] + SWEEP_DEPS + PLOT_DEPS,
+          outputs=["chi_magnitude_heatmap_grid.csv", "chi_magnitude_heatmap_grid.chigrid",
+                   "chi_magnitude_heatmap_grid.preview.npz", "chi_magnitude_heatmap.png"],
+          uses=["mpmath", "matplotlib"]),
+    Stage("spiral", "plot_base_half_i_spiral", "plot_base_half_i_spiral", (),
+          inputs=["plot_base_half_i_spiral.py"] + PLOT_DEPS,
+          outputs=["base_half_i_spiral.png"],
+          uses=["matplotlib"]),
+    Stage("resonance", "plot_chi_resonance", "main", ([],),
+          inputs=["plot_chi_resonance.py", "grid_store.py", "chi_magnitude_sweep.chigrid"]
+                 + PLOT_DEPS,
+          outputs=["chi_magnitude_resonance.png"],
+          uses=["matplotlib"]),
+    Stage("surface", "resonance_heatmap_grid", "main", ([],),
+          inputs=["resonance_heatmap_grid.py", "grid_store.py", "sweep_stream.py",
+                  "chi_magnitude_heatmap_grid.chigrid"] + PLOT_DEPS,
+          outputs=["chi_magnitude_surface.png"],
+          uses=["matplotlib"]),
+    Stage("correlation", "plot_resonance_correlation_test", "main", ([],),
+          inputs=["plot_resonance_correlation_test.py", "resonance_heatmap.py",
+                  "zero_table.py", "zeta_engine.py", "digit_expansion.py",
+                  "chi_resonance_test.py", "chi_surrogate.py", "stream_stats.py",
+                  "base_half_i_expansion.py"]
+                 + SWEEP_DEPS + PLOT_DEPS,
+          outputs=["resonance_correlation_test.png"],
+          uses=["mpmath", "matplotlib"]),
+]
+
+RESOURCE_LOCKS = {"mpmath": threading.Lock(), "matplotlib": threading.Lock()}
+
+
+def hash_path(path):
+    """Content hash of a file, or of every file under a directory."""
+    h = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                full = os.path.join(root, name)
+                h.update(os.path.relpath(full, path).encode() + b"\0")
+                h.update(hash_path(full).encode())
+    elif os.path.exists(path):
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    else:
+        return "missing"
+    return h.hexdigest()
+
+
+def stage_signature(stage):
+    return {
+        "inputs": {p: hash_path(p) for p in stage.inputs},
+        "outputs": {p: hash_path(p) for p in stage.outputs},
+    }
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_FILE)
+
+
+def upstream_of(stages):
+    """{stage name: set of stage names whose outputs it reads}."""
+    producers = {out: s.name for s in stages for out in s.outputs}
+    return {s.name: {producers[p] for p in s.inputs if p in producers} for s in stages}
+
+
+def is_stale(stage, state, rebuilt_upstream):
+    if rebuilt_upstream:
+        return True
+    if any(not os.path.exists(p) for p in stage.outputs):
+        return True
+    return state.get(stage.name) != stage_signature(stage)
+
+
+def run_stage(stage):
+    locks = [RESOURCE_LOCKS[r] for r in sorted(stage.uses)]
+    for lock in locks:
+        lock.acquire()
+    try:
+        with instrument.timer(f"stage.{stage.name}"), instrument.profiled(stage.name):
+            module = importlib.import_module(stage.module)
+            getattr(module, stage.func)(*stage.args)
+    finally:
+        if "matplotlib" in stage.uses:
+            import matplotlib.pyplot as plt
+            plt.close("all")
+        for lock in reversed(locks):
+            lock.release()
+
+
+def build(stages=STAGES, jobs=4, force=False, dry_run=False):
+    """Build stale stages; return {name: 'built'|'fresh'|'failed'|'skipped'}."""
+    state = load_state()
+    upstream = upstream_of(stages)
+    by_name = {s.name: s for s in stages}
+    status = {}
+
+    def ready():
+        return [s for s in stages if s.name not in status and s.name not in running
+                and all(u in status for u in upstream[s.name])]
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(status) < len(stages):
+            for stage in ready():
+                ups = [status[u] for u in upstream[stage.name]]
+                if any(u in ("failed", "skipped") for u in ups):
+                    status[stage.name] = "skipped"
+                    print(f"⏭️  {stage.name}: skipped (upstream failed)")
+                    continue
+                rebuilt = any(u in ("built", "stale") for u in ups)
+                if not (force or is_stale(stage, state, rebuilt)):
+                    status[stage.name] = "fresh"
+                    print(f"✔️  {stage.name}: up to date")
+                    continue
+                if dry_run:
+                    status[stage.name] = "stale"
+                    print(f"🔸 {stage.name}: would rebuild → {', '.join(stage.outputs)}")
+                    continue
+                print(f"🚀 {stage.name}: running {stage.module}.{stage.func} ...")
+                running[stage.name] = (pool.submit(run_stage, stage), time.perf_counter())
+
+            if not running:
+                if len(status) < len(stages) and not ready():
+                    raise RuntimeError("stage dependency cycle: "
+                                       + ", ".join(s.name for s in stages if s.name not in status))
+                continue
+            done, _ = wait([f for f, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name, (future, started) in list(running.items()):
+                if future not in done:
+                    continue
+                del running[name]
+                elapsed = time.perf_counter() - started
+                try:
+                    future.result()
+                except BaseException:
+                    status[name] = "failed"
+                    print(f"❌ {name}: failed after {elapsed:.1f}s")
+                    traceback.print_exc()
+                    state.pop(name, None)
+                else:
+                    status[name] = "built"
+                    print(f"✅ {name}: built in {elapsed:.1f}s")
+                    state[name] = stage_signature(by_name[name])
+                if not dry_run:
+                    save_state(state)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Incrementally rebuild all CSVs, "
+                                                 "grids and figures.")
+    parser.add_argument("--jobs", "-j", type=int, default=4,
+                        help="stages to run concurrently (default: 4)")
+    parser.add_argument("--force", action="store_true", help="rebuild every stage")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="only report which stages are stale")
+    parser.add_argument("--report", metavar="JSON",
+                        help="record per-stage timers, counters, mpmath latencies and "
+                             "peak RSS into this run report")
+    parser.add_argument("--profile", metavar="PROF",
+                        help="also write a merged cProfile dump of every stage "
+                             "(read with python -m pstats)")
+    args = parser.parse_args(argv)
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(src_dir)
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    print(f"Working in {src_dir}\n{'='*60}")
+
+    if args.report or args.profile:
+        instrument.enable(profile=bool(args.profile))
+    if args.profile:
+        # From Python 3.12 only one cProfile profiler may be active at a
+        # time, so profiled stages run one after another
+        args.jobs = 1
+    status = build(jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    if args.report:
+        instrument.write_report(args.report)
+        print(f"\n{instrument.summary()}\nRun report → {args.report}")
+    if args.profile and instrument.dump_profile(args.profile):
+        print(f"Profile → {args.profile}")
+
+    counts = {k: sum(1 for v in status.values() if v == k)
+              for k in ("built", "fresh", "stale", "failed", "skipped")}
+    print("\n" + ", ".join(f"{n} {k}" for k, n in counts.items() if n))
+    if counts["failed"] or counts["skipped"]:
+        print("🛑 Some stages failed; their downstream outputs were not rebuilt.")
+        return 1
+    print("🏁 All CSVs and figures are up to date in the /src folder.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
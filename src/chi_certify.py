@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+chi_certify.py
+Certify the sign of |χ| - 1 over whole (σ, t) rectangles with interval arithmetic.
+
+A grid of point values says nothing about the plane between the nodes.
+Here log|χ| is enclosed over an entire tile at once, in mpmath's iv
+(outward-rounded) arithmetic, by the mean value form
+
+    log|χ|(tile) ⊂ log|χ|(centre) + ∂σ log|χ|(tile)·[-hσ/2, hσ/2]
+                                  + ∂t log|χ|(tile)·[-ht/2, ht/2]
+
+log|χ| at the centre is the log-space Stirling formula of chi_engine with
+its DLMF 5.11(ii) remainder bound. The gradient is (Re L', -Im L') with
+L' = log 2π + (π/2)·cot(πs/2) - ψ(1-s), ψ from its asymptotic series
+after the shift ψ(z) = ψ(z+m) - Σ 1/(z+k); the series remainder is the
+derivative of the log Γ remainder, bounded by Cauchy's estimate on the
+circle |ζ - w| = |w|/2 (where |ζ| ≥ |w|/2 and the DLMF factor is at most
+4^(N+1)). A tile whose enclosure excludes 0 is certified: |χ| > 1 on all
+of it, or |χ| < 1. The critical line needs no enclosure: χ(s)χ(1-s) = 1
+gives |χ(1/2+it)| = 1, so a tile across σ = 1/2 on which ∂σ log|χ| has
+one sign is certified on both sides of the line at once. Any other tile
+is bisected along the axis whose term widens the enclosure most, up to
+max_depth times, and certified siblings of the same sign are merged back.
+Every certified tile states the sign of |χ| - 1 on the closed tile except
+on σ = 1/2, where |χ| = 1.
+
+    python chi_certify.py --sigma 0.3 0.7 --t 10 40
+    python chi_certify.py --sigma 0.3 0.7 --t 10 1e6 --output cert.csv
+    python chi_certify.py --sigma -0.5 1.5 --t 0 40 --check 500
+"""
+
+import argparse
+import csv
+import math
+import sys
+import time
+from collections import namedtuple
+
+from mpmath import iv, mp
+
+from chi_engine import STIRLING_RADIUS, STIRLING_TERMS
+
+CERT_DPS = 30
+MAX_DEPTH = 24
+CSV_FILENAME = "chi_resonance_certificate.csv"
+
+# sign: +1 where |χ| > 1 on the whole tile, -1 where |χ| < 1, 0 undecided;
+# log_lo, log_hi: the enclosure of log|χ| over the tile
+Tile = namedtuple("Tile", ["sigma_lo", "sigma_hi", "t_lo", "t_hi", "sign",
+                           "log_lo", "log_hi"])
+
+
+class _ivdps:
+    """iv.dps for a block (iv has no workdps)."""
+
+    def __init__(self, dps):
+        self.dps = dps
+
+    def __enter__(self):
+        self.saved = iv.dps
+        iv.dps = self.dps
+
+    def __exit__(self, *exc):
+        iv.dps = self.saved
+
+
+def _bernoulli(k):
+    p, q = mp.bernfrac(k)
+    return iv.mpf(p) / q
+
+
+def _shift(x_lo, y_lo, radius=STIRLING_RADIUS):
+    """Smallest m ≥ 0 with x+m ≥ 1/2 and |x+m+iy| ≥ radius over the tile."""
+    m = max(0, math.ceil(0.5 - x_lo))
+    if y_lo < radius:
+        m = max(m, math.ceil(math.sqrt(radius**2 - y_lo**2) - x_lo))
+    return m
+
+
+def _log_abs_gamma_scaled(x, y, m, terms=STIRLING_TERMS):
+    """Enclosure of log|Γ(x+iy)| + πy/2 (x, y intervals, y ≥ 0, x+m ≥ 1/2)."""
+    shift_sum = iv.mpf(0)
+    for k in range(m):
+        shift_sum -= iv.log((x + k)**2 + y**2) / 2
+    xs = x + m
+    abs_sq = xs**2 + y**2
+    main = (xs - 0.5) * iv.log(abs_sq) / 2 + y * iv.atan2(xs, y) - xs + iv.log(2 * iv.pi) / 2
+
+    inv_z = 1 / iv.mpc(xs, y)
+    inv_z2 = inv_z * inv_z
+    series = iv.mpc(0)
+    for k in range(terms, 0, -1):
+        series = series * inv_z2 + _bernoulli(2 * k) / (2 * k * (2 * k - 1))
+    series *= inv_z
+
+    n = terms + 1
+    abs_z = iv.sqrt(abs_sq)
+    cos_half_sq = (1 + xs / abs_z) / 2
+    bound = (abs(_bernoulli(2 * n)) / (2 * n * (2 * n - 1))
+             / abs_z**(2 * n - 1) / cos_half_sq**n).b
+    return main + series.real + shift_sum + iv.mpf([-bound, bound])
+
+
+def _digamma(x, y, m, terms=STIRLING_TERMS):
+    """Enclosure of ψ(x+iy) (x, y intervals, y ≥ 0, x+m ≥ 1/2)."""
+    shift_sum = iv.mpc(0)
+    for k in range(m):
+        shift_sum += 1 / iv.mpc(x + k, y)
+    xs = x + m
+    abs_sq = xs**2 + y**2
+    w = iv.mpc(xs, y)
+    inv_w2 = 1 / (w * w)
+    series = iv.mpc(0)
+    for k in range(terms, 0, -1):
+        series = series * inv_w2 + _bernoulli(2 * k) / (2 * k)
+    series *= inv_w2
+    log_w = iv.mpc(iv.log(abs_sq) / 2, iv.atan2(y, xs))
+
+    # |R'(w)| ≤ max |R| on |ζ - w| = |w|/2 divided by |w|/2, where |ζ| ≥ |w|/2
+    # and |arg ζ| ≤ 2π/3, so sec^(2N+2)(arg ζ / 2) ≤ 4^(N+1)
+    n = terms + 1
+    half = iv.sqrt(abs_sq) / 2
+    bound = (abs(_bernoulli(2 * n)) / (2 * n * (2 * n - 1)) * iv.mpf(4)**n
+             / half**(2 * n)).b
+    box = iv.mpf([-bound, bound])
+    return log_w - 1 / (2 * w) - series - shift_sum + iv.mpc(box, box)
+
+
+def _log_abs_chi(sigma, y, m):
+    """Enclosure of log|χ(σ+iy)| for intervals σ, y ≥ 0."""
+    x = 1 - sigma
+    q = iv.exp(-iv.pi * y)
+    log_sin = iv.log(1 - 2 * q * iv.cos(iv.pi * sigma) + q**2) / 2 - iv.log(2)
+    prefactor = sigma * iv.log(2) + (sigma - 1) * iv.log(iv.pi)
+    return prefactor + log_sin + _log_abs_gamma_scaled(x, y, m)
+
+
+def _gradient(sigma, y, m):
+    """Enclosures of (∂σ, ∂t) log|χ(σ+iy)| over intervals σ, y ≥ 0."""
+    q = iv.exp(-iv.pi * y) * iv.mpc(iv.cos(iv.pi * sigma), iv.sin(iv.pi * sigma))
+    cot = iv.mpc(0, 1) * (q + 1) / (q - 1)
+    # ψ(1-s) = conj ψ(1-σ+iy)
+    psi = _digamma(1 - sigma, y, m)
+    d_sigma = iv.log(2 * iv.pi) + iv.pi / 2 * cot.real - psi.real
+    d_t = -iv.pi / 2 * cot.imag - psi.imag
+    return d_sigma, d_t
+
+
+def enclose(sigma_lo, sigma_hi, t_lo, t_hi, dps=CERT_DPS):
+    """
+    Enclosures of log|χ| and of ∂σ log|χ| over the tile (iv intervals,
+    0 ≤ t_lo ≤ t_hi), and the widths the σ and t terms add to the first.
+    """
+    with _ivdps(dps):
+        sigma = iv.mpf([sigma_lo, sigma_hi])
+        y = iv.mpf([t_lo, t_hi])
+        m = _shift(1 - sigma_hi, t_lo)
+        sigma_c = iv.mpf((sigma_lo + sigma_hi) / 2)
+        y_c = iv.mpf((t_lo + t_hi) / 2)
+        centre = _log_abs_chi(sigma_c, y_c, m)
+        d_sigma, d_t = _gradient(sigma, y, m)
+        half_sigma = iv.mpf([sigma_lo, sigma_hi]) - sigma_c
+        half_t = iv.mpf([t_lo, t_hi]) - y_c
+        from_sigma = d_sigma * half_sigma
+        from_t = d_t * half_t
+        return (centre + from_sigma + from_t, d_sigma, float(from_sigma.delta),
+                float(from_t.delta))
+
+
+def _sign(value):
+    if value.a > 0:
+        return 1
+    if value.b < 0:
+        return -1
+    return 0
+
+
+def _certify_tile(sigma_lo, sigma_hi, t_lo, t_hi, depth, max_depth, dps):
+    try:
+        value, d_sigma, width_sigma, width_t = enclose(sigma_lo, sigma_hi, t_lo, t_hi, dps)
+        sign = _sign(value)
+        log_lo, log_hi = float(value.a), float(value.b)
+    except (ZeroDivisionError, ValueError):
+        sign, log_lo, log_hi = 0, -math.inf, math.inf
+        width_sigma = width_t = math.inf
+    if sign:
+        return [Tile(sigma_lo, sigma_hi, t_lo, t_hi, sign, log_lo, log_hi)]
+    if sigma_lo <= 0.5 <= sigma_hi and math.isfinite(log_lo) and _sign(d_sigma):
+        # log|χ| = 0 on σ = 1/2 and is monotone in σ across the tile
+        slope = _sign(d_sigma)
+        tiles = []
+        if sigma_lo < 0.5:
+            tiles.append(Tile(sigma_lo, 0.5, t_lo, t_hi, -slope,
+                              *((0.0, log_hi) if slope < 0 else (log_lo, 0.0))))
+        if sigma_hi > 0.5:
+            tiles.append(Tile(0.5, sigma_hi, t_lo, t_hi, slope,
+                              *((log_lo, 0.0) if slope < 0 else (0.0, log_hi))))
+        return tiles
+    if depth >= max_depth:
+        return [Tile(sigma_lo, sigma_hi, t_lo, t_hi, 0, log_lo, log_hi)]
+
+    if not (math.isfinite(width_sigma) and math.isfinite(width_t)):
+        # A pole, a zero or a cut inside the tile: halve its longer side
+        width_sigma, width_t = sigma_hi - sigma_lo, t_hi - t_lo
+    if width_sigma >= width_t:
+        mid = (sigma_lo + sigma_hi) / 2
+        halves = [(sigma_lo, mid, t_lo, t_hi), (mid, sigma_hi, t_lo, t_hi)]
+    else:
+        mid = (t_lo + t_hi) / 2
+        halves = [(sigma_lo, sigma_hi, t_lo, mid), (sigma_lo, sigma_hi, mid, t_hi)]
+    first, second = (_certify_tile(*half, depth + 1, max_depth, dps) for half in halves)
+    if (len(first) == len(second) == 1 and first[0].sign and
+            first[0].sign == second[0].sign):
+        # Both halves certified alike: the tile is, too
+        return [Tile(sigma_lo, sigma_hi, t_lo, t_hi, first[0].sign,
+                     min(first[0].log_lo, second[0].log_lo),
+                     max(first[0].log_hi, second[0].log_hi))]
+    return first + second
+
+
+def certify(sigma_range, t_range, max_depth=MAX_DEPTH, dps=CERT_DPS):
+    """
+    Certified and undecided tiles covering sigma_range × t_range (t ≥ 0).
+
+    Every tile with sign ±1 is a proof that |χ| - 1 has that sign on the
+    whole closed tile; tiles with sign 0 could not be decided within
+    max_depth bisections.
+    """
+    if t_range[0] < 0:
+        raise ValueError("certify t ≥ 0; |χ(σ-it)| = |χ(σ+it)|")
+    return _certify_tile(float(sigma_range[0]), float(sigma_range[1]),
+                         float(t_range[0]), float(t_range[1]), 0, max_depth, dps)
+
+
+def summary(tiles):
+    """One line: tile counts and the extent of the undecided set."""
+    undecided = [tile for tile in tiles if tile.sign == 0]
+    text = (f"{sum(tile.sign > 0 for tile in tiles)} tiles with |χ| > 1, "
+            f"{sum(tile.sign < 0 for tile in tiles)} with |χ| < 1, "
+            f"{len(undecided)} undecided")
+    if undecided:
+        area = sum((tile.sigma_hi - tile.sigma_lo) * (tile.t_hi - tile.t_lo)
+                   for tile in undecided)
+        text += (f" (σ ∈ [{min(tile.sigma_lo for tile in undecided):.9g}, "
+                 f"{max(tile.sigma_hi for tile in undecided):.9g}], area {area:.3g})")
+    return text
+
+
+def check_tiles(tiles, samples, seed=0):
+    """Points drawn from the certified tiles whose mpmath |χ| - 1 has the other sign."""
+    import random
+
+    from chi_engine import chi
+
+    rng = random.Random(seed)
+    certified = [tile for tile in tiles if tile.sign]
+    wrong = []
+    for _ in range(samples if certified else 0):
+        tile = rng.choice(certified)
+        sigma = rng.uniform(tile.sigma_lo, tile.sigma_hi)
+        t = rng.uniform(tile.t_lo, tile.t_hi)
+        with mp.workdps(40):
+            log_mag = mp.log(abs(chi(mp.mpc(sigma, t))))
+        if sigma != 0.5 and (log_mag > 0) != (tile.sign > 0):
+            wrong.append((sigma, t, float(log_mag)))
+    return wrong
+
+
+def write_tiles(path, tiles):
+    with open(path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(Tile._fields)
+        for tile in tiles:
+            w.writerow([repr(v) if isinstance(v, float) else v for v in tile])
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--sigma", nargs=2, type=float, metavar=("MIN", "MAX"),
+                        default=(0.3, 0.7))
+    parser.add_argument("--t", nargs=2, type=float, metavar=("MIN", "MAX"),
+                        default=(10.0, 40.0))
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH,
+                        help="bisections before a tile is left undecided")
+    parser.add_argument("--dps", type=int, default=CERT_DPS,
+                        help="working precision of the interval arithmetic")
+    parser.add_argument("--output", default=CSV_FILENAME)
+    parser.add_argument("--check", type=int, default=0, metavar="SAMPLES",
+                        help="also compare random points of the certified tiles with mpmath")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    tiles = certify(args.sigma, args.t, args.max_depth, args.dps)
+    elapsed = time.perf_counter() - start
+    write_tiles(args.output, tiles)
+    print(f"σ ∈ [{args.sigma[0]:g}, {args.sigma[1]:g}], t ∈ [{args.t[0]:g}, {args.t[1]:g}] "
+          f"in {elapsed:.2f}s: {summary(tiles)}")
+    print(f"Tiles written → {args.output}")
+    if args.check:
+        wrong = check_tiles(tiles, args.check)
+        print(f"{args.check} mpmath points in certified tiles: {len(wrong)} with the other sign")
+        if wrong:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,47 +2,125 @@
 """
 chi_resonance_sweep.py
 Sweep σ and compute |χ(s)| to show resonance at σ=0.5
+
+The t values are the heights of the first --zeros nontrivial zeros, from
+the zero table (see zero_table.py) or a local zero list via --zero-file.
 """
 
+import argparse
 import csv
-from mpmath import mp, mpc, power, pi, sin, gamma
+import hashlib
+
+import numpy as np
+
+from chi_roots import find_crossings
+from grid_store import create_grid, grid_path, open_grid_rw, write_csv_rows
+from resonance_heatmap import iter_row_blocks
+from sweep_checkpoint import SweepCheckpoint, CheckpointMismatch
+from zero_table import zero_heights
 
-mp.dps = 100  # 100 digits is plenty for this
+DPS = None  # mpmath digits for escalated cells (None: per cell, see precision.py)
+ROOT_DPS = 100  # σ* is polished to this many digits with --roots
+N_ZEROS = 6
+PRINT_ZEROS = 10  # print the full σ table for at most this many zeros
 
-def chi(s):
-    """χ(s) = 2^s · π^(s-1) · sin(πs/2) · Γ(1-s)"""
-    return (power(2, s) * power(pi, s-1) * 
-            sin(pi * s / 2) * gamma(1 - s))
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--zeros", type=int, default=N_ZEROS,
+                        help=f"sweep at the first N zero heights (default: {N_ZEROS})")
+    parser.add_argument("--zero-file",
+                        help="read zero heights from this list (e.g. Odlyzko's zeros1)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes for the sweep and for computing missing zeros")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the checkpoint, skipping finished t values")
+    parser.add_argument("--no-csv", dest="csv", action="store_false",
+                        help="write only the binary .chigrid grid, not the CSV export")
+    parser.add_argument("--roots", action="store_true",
+                        help="solve for the σ where |χ| = 1 at each t instead of sweeping σ")
+    args = parser.parse_args(argv)
 
-def main():
     # Parameters
     SIGMA_MIN, SIGMA_MAX, SIGMA_STEP = 0.3, 0.7, 0.01
-    T_VALUES = [14.134725, 21.022040, 25.010858, 30.424876, 32.935062, 37.586178]
+    T_VALUES = zero_heights(args.zeros, args.zero_file, args.workers).tolist()
     
     CSV_FILENAME = "chi_magnitude_sweep.csv"
     
-    with open(CSV_FILENAME, "w", newline="") as f:
-        w = csv.writer(f)
+    if args.roots:
+        result = find_crossings(T_VALUES, (SIGMA_MIN, SIGMA_MAX), dps=ROOT_DPS)
+        for t, sigma, residual, n in zip(T_VALUES, result.sigma_mp, result.residual,
+                                         result.evaluations):
+            if sigma is None:
+                print(f"t={t:.6f}: no |χ(s)|=1 crossing in [{SIGMA_MIN}, {SIGMA_MAX}]")
+            elif len(T_VALUES) <= PRINT_ZEROS:
+                print(f"t={t:.6f}: σ*={float(sigma):.17f}, |χ(s)|-1={residual:.3e} "
+                      f"({n} evaluations)")
+        ok = result.converged
+        print(f"{ok.sum()}/{len(T_VALUES)} zeros solved, max |σ*-0.5| = "
+              f"{np.abs(result.sigma[ok] - 0.5).max():.3e}, max ||χ(s)|-1| = "
+              f"{np.abs(result.residual[ok]).max():.3e} at {ROOT_DPS} digits")
+        return
+    
+    GRID_FILENAME = grid_path(CSV_FILENAME)
+    
+    sigmas = []
+    sigma = SIGMA_MIN
+    while sigma <= SIGMA_MAX + SIGMA_STEP/2:
+        sigmas.append(sigma)
+        sigma += SIGMA_STEP
+    
+    checkpoint = SweepCheckpoint(GRID_FILENAME, {
+        "script": "chi_resonance_sweep",
+        "sigma": [SIGMA_MIN, SIGMA_MAX, SIGMA_STEP],
+        "zeros": len(T_VALUES),
+        "t": hashlib.sha256(np.asarray(T_VALUES).tobytes()).hexdigest(),
+        "dps": DPS,
+        "csv": args.csv,
+    })
+    try:
+        if checkpoint.start(args.resume):
+            grid = open_grid_rw(GRID_FILENAME)
+        else:
+            grid = create_grid(GRID_FILENAME, sigmas, T_VALUES, dps=DPS,
+                               script="chi_resonance_sweep")
+        f = checkpoint.open_csv(CSV_FILENAME) if args.csv else None
+    except (CheckpointMismatch, FileNotFoundError) as e:
+        raise SystemExit(f"Refusing to resume: {e}")
+    
+    w = csv.writer(f) if f else None
+    if w and checkpoint.csv_bytes == 0:
         w.writerow(["t", "sigma", "chi_magnitude", "chi_deviation_from_1"])
+    
+    # One tile per t value for a short list; larger batches go in blocks
+    # sharded across workers. Finished tiles are skipped on --resume
+    verbose = len(T_VALUES) <= PRINT_ZEROS
+    blocks = iter_row_blocks(sigmas, T_VALUES, args.workers,
+                             rows_per_task=1 if verbose else None, dps=DPS,
+                             row_ranges=checkpoint.pending(len(T_VALUES)))
+    for start, _, mag_rows in blocks:
+        stop = start + len(mag_rows)
+        grid[start:stop] = mag_rows
+        grid.flush()
+        if w:
+            write_csv_rows(w, T_VALUES[start:stop], sigmas, mag_rows)
         
-        for t in T_VALUES:
+        if verbose:
+            t = T_VALUES[start]
             print(f"\n=== t = {t:.6f} ===")
-            
-            sigma = SIGMA_MIN
-            while sigma <= SIGMA_MAX + SIGMA_STEP/2:
-                s = mpc(sigma, t)
-                chi_val = chi(s)
-                chi_mag = float(abs(chi_val))
+            for sigma, chi_mag in zip(sigmas, mag_rows[0]):
+                chi_mag = float(chi_mag)
                 chi_dev = abs(chi_mag - 1.0)
-                
-                w.writerow([t, sigma, chi_mag, chi_dev])
-                
                 marker = " ← RESONANCE" if abs(sigma - 0.5) < 0.001 else ""
                 print(f"σ={sigma:.3f}, |χ(s)|={chi_mag:.8f}, deviation={chi_dev:.4e}{marker}")
-                
-                sigma += SIGMA_STEP
+        
+        checkpoint.mark_done(start, stop, f)
+        if not verbose:
+            print(f"Zeros {start + 1}..{stop} done ({checkpoint.rows_done()}/{len(T_VALUES)})")
     
-    print(f"\nSweep complete → {CSV_FILENAME}")
+    if f:
+        f.close()
+    checkpoint.finish()
+    print(f"\nSweep complete → {GRID_FILENAME}" + (f", {CSV_FILENAME}" if f else ""))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,85 +1,211 @@
-from mpmath import mp, zeta, mpc, power, pi, sin, gamma
-
-mp.dps = 100
-
-def chi(s):
-    """χ(s) from functional equation"""
-    return (power(2, s) * power(pi, s-1) * 
-            sin(pi * s / 2) * gamma(1 - s))
-
-def base_half_i_expansion_fixed(z, max_terms=50, tolerance=1e-80):
-    """Expand z in base (1/2)i"""
-    base_inv = 2j
-    coefficients = []
-    residual = mp.mpc(z)
-    
-    for k in range(max_terms):
-        if abs(residual) < tolerance:
-            break
-        power_val = base_inv ** k
-        coeff = residual / power_val
-        coefficients.append(float(abs(coeff)))
-        residual -= coeff * power_val
-    
-    return coefficients, residual
+"""
+chi_resonance_test.py
+Does the base-(2i) digit structure of χ(s) follow |χ(s)| - 1?
+
+run_chi_structure() prints the per-σ table at the first zero height, then
+the correlation between log10 ||χ|-1| and the nonzero digits of χ in base
+2i (digit_expansion.nonzero_digits) over a whole (σ, t) grid, with
+bootstrap intervals. The grid is evaluated in blocks of t-rows across
+worker processes and only their stream_stats.CorrelationStats come back,
+so any number of samples is summarised in bounded memory.
+
+    python chi_resonance_test.py --t 10 1e5 100000 --workers 8 --output stats.npz
+"""
+import argparse
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import numpy as np
+from mpmath import mp, mpc
+
+import instrument
+from base_half_i_expansion import base_half_i_expansion
+from chi_engine import chi, chi_cached, chi_grid
+from chi_surrogate import active_surrogate
+from digit_expansion import WINDOW, nonzero_digits
+from precision import choose_dps
+from stream_stats import REPLICATES, SEED, CorrelationStats, format_correlations
+from sweep_stream import HIST_EDGES
+from zero_table import zero_heights
+
+SIGMAS = np.linspace(0.30, 0.70, 9)
+STATS_SIGMAS = (0.30, 0.70, 41)    # σ axis of the correlation grid
+STATS_T = (10.0, 1000.0, 200)      # default t axis: (min, max, count)
+DIGIT_RTOL = 1e-10                 # χ accurate enough for its first WINDOW digits
+DEVIATION_FLOOR = 1e-16            # ||χ|-1| below float64 resolution (σ = 1/2)
+DEVIATION_EDGES = HIST_EDGES       # log10 ||χ| - 1| bins
+DIGIT_EDGES = np.arange(WINDOW + 2) - 0.5    # one bin per nonzero-digit count
+BLOCK_SAMPLES = 2048               # at most this many samples per worker task
+BLOCKS_IN_FLIGHT = 2               # worker tasks submitted ahead per worker
+
+
+def chi_values(sigmas, ts, rtol=DIGIT_RTOL):
+    """
+    χ over ts × sigmas (t-major) to relative accuracy rtol, as mpc: from the
+    $RH_RESONANCE_SURROGATE table (built with --phase) where its bounds
+    are within rtol, from mpmath elsewhere.
+    """
+    S, T = np.meshgrid(np.asarray(sigmas, dtype=float), np.asarray(ts, dtype=float))
+    S, T = S.ravel(), T.ravel()
+    values = [None] * len(S)
+    todo = range(len(S))
+    table = active_surrogate()
+    if table is not None and table.phase_coef is not None:
+        tabled, bound = table.chi(S, T)
+        covered = bound <= rtol
+        for k in np.flatnonzero(covered):
+            values[k] = mpc(tabled[k])
+        todo = np.flatnonzero(~covered)
+        if instrument.ENABLED:
+            instrument.count("chi.surrogate", int(covered.sum()))
+    for k in todo:
+        with mp.workdps(choose_dps(S[k], T[k], rtol)):
+            values[k] = chi(mpc(S[k], T[k]))
+    return values
+
+
+def resonance_samples(sigmas, ts):
+    """log10 ||χ|-1| and the nonzero base-2i digits of χ, both (len(ts), len(σ))."""
+    deviation = np.log10(np.maximum(np.abs(chi_grid(sigmas, ts) - 1.0), DEVIATION_FLOOR))
+    digits = nonzero_digits(chi_values(sigmas, ts), WINDOW).reshape(len(ts), len(sigmas))
+    return deviation, digits
+
+
+def _block_stats(start, ts, sigmas, replicates, seed):
+    """CorrelationStats of one block of t-rows (a worker task)."""
+    stats = CorrelationStats(DEVIATION_EDGES, DIGIT_EDGES, replicates, seed)
+    stats.update(*resonance_samples(sigmas, ts), key=start)
+    return stats
+
+
+def correlation_stats(sigmas, ts, workers=1, replicates=REPLICATES, seed=SEED,
+                      rows_per_task=None, progress=None):
+    """Merged CorrelationStats over sigmas × ts, in a process pool if workers > 1."""
+    sigmas = np.asarray(sigmas, dtype=float)
+    ts = np.asarray(ts, dtype=float)
+    if rows_per_task is None:
+        # Small blocks keep the pool busy; each returns a few MB of tables
+        rows_per_task = max(1, min(math.ceil(len(ts) / (4 * workers)),
+                                   BLOCK_SAMPLES // len(sigmas)))
+    starts = range(0, len(ts), rows_per_task)
+    total = CorrelationStats(DEVIATION_EDGES, DIGIT_EDGES, replicates, seed)
+    if workers <= 1:
+        for done, start in enumerate(starts, 1):
+            total.merge(_block_stats(start, ts[start:start + rows_per_task], sigmas,
+                                     replicates, seed))
+            if progress:
+                progress(done, len(starts))
+        return total
+    merged = 0
+
+    def merge(finished):
+        nonlocal merged
+        for future in finished:
+            total.merge(future.result())
+            merged += 1
+            if progress:
+                progress(merged, len(starts))
+
+    # A few blocks per worker in flight, each dropped once merged, so
+    # memory stays flat however long ts is
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        for start in starts:
+            in_flight.add(pool.submit(_block_stats, start, ts[start:start + rows_per_task],
+                                      sigmas, replicates, seed))
+            if len(in_flight) >= BLOCKS_IN_FLIGHT * workers:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                merge(finished)
+        merge(as_completed(in_flight))
+    return total
+
+
+def run_chi_structure(ts=None, workers=1, replicates=REPLICATES, output=None):
+    """Test if χ(s) has special structure related to |χ(s)| = 1; returns the CorrelationStats"""
+
+    t = float(zero_heights(1)[0])  # First zero height
+    sigmas = SIGMAS
 
-def test_chi_structure():
-    """Test if χ(s) has special structure related to |χ(s)| = 1"""
-    
-    t = 14.134725  # First zero height
-    sigmas = [0.3, 0.35, 0.4, 0.45, 0.5, 0.55, 0.6, 0.65, 0.7]
-    
     print("Testing χ(s) structure in base-(1/2)i")
     print("="*80)
     print(f"{'σ':^6} | {'|χ(s)|':^12} | {'|χ|-1':^12} | {'# terms':^8} | {'Max |coeff|':^12}")
     print("-"*80)
-    
-    results = []
-    for sigma in sigmas:
-        s = mpc(sigma, t)
-        chi_val = chi(s)
-        chi_mag = float(abs(chi_val))
-        chi_deviation = abs(chi_mag - 1.0)
-        
-        coeffs, residual = base_half_i_expansion_fixed(chi_val, max_terms=100)
-        
-        max_coeff = max(coeffs) if len(coeffs) > 0 else 0
-        num_terms = len(coeffs)
-        
-        print(f"{sigma:^6.2f} | {chi_mag:^12.8f} | {chi_deviation:^12.8e} | {num_terms:^8} | {max_coeff:^12.4e}")
-        
-        results.append({
-            'sigma': sigma,
-            'chi_mag': chi_mag,
-            'chi_dev': chi_deviation,
-            'num_terms': num_terms,
-            'max_coeff': max_coeff,
-            'coeffs': coeffs[:10]  # Store first 10
-        })
-    
+
+    chi_mag = np.empty(len(sigmas))
+    num_terms = np.empty(len(sigmas), dtype=int)
+    max_coeff = np.empty(len(sigmas))
+    first_coeffs = np.zeros((len(sigmas), 10))
+    for i, sigma in enumerate(sigmas):
+        chi_val = chi_cached(float(sigma), t)
+        chi_mag[i] = float(abs(chi_val))
+
+        coeffs, residual = base_half_i_expansion(chi_val, max_terms=100)
+        coeffs = np.array([float(abs(c)) for c in coeffs])
+
+        max_coeff[i] = coeffs.max() if len(coeffs) > 0 else 0
+        num_terms[i] = len(coeffs)
+        first_coeffs[i, :min(10, len(coeffs))] = coeffs[:10]
+
+        print(f"{sigma:^6.2f} | {chi_mag[i]:^12.8f} | {abs(chi_mag[i] - 1.0):^12.8e} | "
+              f"{num_terms[i]:^8} | {max_coeff[i]:^12.4e}")
+    chi_dev = np.abs(chi_mag - 1.0)
+
+    print("\nAt σ=0.5 (where |χ|=1):")
+    c = int(np.argmin(np.abs(sigmas - 0.5)))
+    print(f"  |χ(s)| = {chi_mag[c]:.10f}")
+    print(f"  Deviation from 1: {chi_dev[c]:.4e}")
+    print(f"  Terms needed: {num_terms[c]}")
+    print(f"  Max coefficient: {max_coeff[c]:.4e}")
+    print(f"  First 10 coefficients: {[f'{x:.2e}' for x in first_coeffs[c, :num_terms[c]]]}")
+
     print("\n" + "="*80)
     print("ANALYSIS")
     print("="*80)
-    
-    # Check correlation
-    import numpy as np
-    deviations = [r['chi_dev'] for r in results]
-    num_terms_list = [r['num_terms'] for r in results]
-    max_coeffs = [r['max_coeff'] for r in results]
-    
-    corr_terms = np.corrcoef(deviations, num_terms_list)[0,1] if len(set(num_terms_list)) > 1 else 0
-    corr_max = np.corrcoef(deviations, max_coeffs)[0,1] if len(set(max_coeffs)) > 1 else 0
-    
-    print(f"\nCorrelation between |χ|-1 and # terms needed: {corr_terms:.4f}")
-    print(f"Correlation between |χ|-1 and max coefficient: {corr_max:.4f}")
-    
-    print("\nAt σ=0.5 (where |χ|=1):")
-    critical = results[4]
-    print(f"  |χ(s)| = {critical['chi_mag']:.10f}")
-    print(f"  Deviation from 1: {critical['chi_dev']:.4e}")
-    print(f"  Terms needed: {critical['num_terms']}")
-    print(f"  Max coefficient: {critical['max_coeff']:.4e}")
-    print(f"  First 10 coefficients: {[f'{c:.2e}' for c in critical['coeffs']]}")
+
+    # Nine σ at one t say nothing statistically; correlate over a whole grid
+    if ts is None:
+        ts = np.linspace(*STATS_T[:2], STATS_T[2])
+    grid_sigmas = np.linspace(*STATS_SIGMAS[:2], STATS_SIGMAS[2])
+    start = time.perf_counter()
+    stats = correlation_stats(grid_sigmas, ts, workers, replicates)
+    print(f"\nlog10 ||χ|-1| against nonzero digits (of {WINDOW}) of χ in base 2i, over "
+          f"{len(grid_sigmas)} σ × {len(ts)} t in [{ts.min():g}, {ts.max():g}] "
+          f"({time.perf_counter() - start:.1f}s):")
+    print(format_correlations(stats.correlations()))
+    if output:
+        print(f"Statistics written → {stats.save(output)}")
+    return stats
+
+
+def test_chi_structure():
+    """run_chi_structure over the default grid, for pytest: every sample counted, sane intervals."""
+    stats = run_chi_structure()
+    result = stats.correlations()
+    assert result.n == STATS_SIGMAS[2] * STATS_T[2]
+    for estimate in (result.pearson, result.spearman, result.kendall):
+        assert -1 <= estimate.low <= estimate.value <= estimate.high <= 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--t", type=float, nargs=3, metavar=("MIN", "MAX", "COUNT"),
+                        default=STATS_T, help="t axis of the correlation grid")
+    parser.add_argument("--zeros", type=int, default=0,
+                        help="use the first N zero heights as the t axis instead")
+    parser.add_argument("--zero-file", help="read zero heights from this list")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--replicates", type=int, default=REPLICATES,
+                        help=f"bootstrap replicates (default: {REPLICATES})")
+    parser.add_argument("--output", help="save the statistics (.npz) for the figure")
+    args = parser.parse_args(argv)
+
+    if args.zeros:
+        ts = zero_heights(args.zeros, args.zero_file, args.workers)
+    else:
+        ts = np.linspace(args.t[0], args.t[1], int(args.t[2]))
+    run_chi_structure(ts, args.workers, args.replicates, args.output)
+
 
 if __name__ == "__main__":
-    test_chi_structure()
\ No newline at end of file
+    main()
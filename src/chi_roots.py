@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+chi_roots.py
+Locate σ*(t) where |χ(σ+it)| = 1 for a whole batch of t values.
+
+Instead of sweeping σ on a dense grid, each t is solved by a bracketed
+Newton iteration on log|χ|, using the analytic derivative
+
+    ∂/∂σ log|χ| = Re[log 2π + (π/2)·cot(πs/2) - ψ(1-s)].
+
+All t are iterated together as float64 arrays (chi_engine.log_abs_chi and
+d_log_abs_chi); a Newton step that leaves the current bracket falls back
+to bisection, so every t with a sign change converges. With --dps the
+float64 root is polished by Newton steps in mpmath and σ* and the residual
+|χ(σ*+it)| - 1 are reported at that precision.
+
+    python chi_roots.py --t-min 10 --t-max 10000 --count 5000 --dps 50
+"""
+
+import argparse
+import csv
+import time
+from collections import namedtuple
+
+import numpy as np
+from mpmath import mp
+
+from chi_engine import chi, log_abs_chi, d_log_abs_chi, d_log_abs_chi_mp
+
+SIGMA_MIN, SIGMA_MAX = 0.3, 0.7
+XTOL = 4 * np.finfo(float).eps
+MAXITER = 60
+POLISH_MAXITER = 12
+
+CSV_FILENAME = "chi_sigma_crossings.csv"
+
+# sigma: float64 σ*; sigma_mp: σ* at dps (None without polishing);
+# residual: |χ(σ*+it)| - 1 at the precision σ* is given in;
+# evaluations: log|χ| (+ derivative) evaluations per t, polishing included
+Crossings = namedtuple("Crossings", ["t", "sigma", "sigma_mp", "residual",
+                                     "evaluations", "converged"])
+
+
+def bracketed_newton(ts, bracket=(SIGMA_MIN, SIGMA_MAX), xtol=XTOL, maxiter=MAXITER):
+    """
+    Float64 roots of log|χ(σ+it)| in σ for every t in ts at once.
+
+    Returns (sigma, evaluations, converged) arrays. t values whose bracket
+    has no sign change get sigma = NaN and converged = False.
+    """
+    ts = np.asarray(ts, dtype=float).ravel()
+    lo = np.full(ts.shape, float(bracket[0]))
+    hi = np.full(ts.shape, float(bracket[1]))
+    f_lo, _ = log_abs_chi(lo, ts)
+    f_hi, _ = log_abs_chi(hi, ts)
+    evaluations = np.full(ts.shape, 2)
+
+    active = np.sign(f_lo) * np.sign(f_hi) <= 0
+    converged = np.zeros(ts.shape, dtype=bool)
+    sigma = np.full(ts.shape, np.nan)
+
+    # Regula falsi start
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = lo - f_lo * (hi - lo) / (f_hi - f_lo)
+    x = np.where(np.isfinite(x), x, 0.5 * (lo + hi))
+
+    for _ in range(maxiter):
+        idx = np.nonzero(active)[0]
+        if not idx.size:
+            break
+        xi, ti = x[idx], ts[idx]
+        f, f_err = log_abs_chi(xi, ti)
+        df = d_log_abs_chi(xi, ti)
+        evaluations[idx] += 1
+
+        # Replace the bracket end with the same sign as f
+        like_lo = np.sign(f) == np.sign(f_lo[idx])
+        lo[idx] = np.where(like_lo, xi, lo[idx])
+        f_lo[idx] = np.where(like_lo, f, f_lo[idx])
+        hi[idx] = np.where(like_lo, hi[idx], xi)
+
+        a = np.minimum(lo[idx], hi[idx])
+        b = np.maximum(lo[idx], hi[idx])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_new = xi - f / df
+        inside = (x_new > a) & (x_new < b)
+        x_new = np.where(inside, x_new, 0.5 * (a + b))
+
+        tol = xtol * (1.0 + np.abs(xi))
+        # |f| within its float64 error bound: xi is as good as it gets
+        at_root = np.abs(f) <= f_err
+        done = at_root | (np.abs(x_new - xi) <= tol) | (b - a <= tol)
+        x[idx] = np.where(at_root, xi, x_new)
+        converged[idx] = done
+        active[idx] = ~done
+
+    sigma[converged] = x[converged]
+    return sigma, evaluations, converged
+
+
+def polish(sigma, t, dps, maxiter=POLISH_MAXITER):
+    """
+    Newton-polish a float64 root at dps digits.
+
+    Returns (σ*, |χ(σ*+it)| - 1, evaluations) as mpf values and an int.
+    Each step doubles the number of correct digits.
+    """
+    with mp.workdps(dps + 10):
+        s = mp.mpf(sigma)
+        t = mp.mpf(t)
+        tol = mp.mpf(10) ** -(dps + 2)
+        evaluations = 0
+        for _ in range(maxiter):
+            step = mp.log(abs(chi(mp.mpc(s, t)))) / d_log_abs_chi_mp(s, t)
+            evaluations += 1
+            s -= step
+            if abs(step) <= tol:
+                break
+        residual = abs(chi(mp.mpc(s, t))) - 1
+    with mp.workdps(dps):
+        return +s, +residual, evaluations + 1
+
+
+def find_crossings(ts, bracket=(SIGMA_MIN, SIGMA_MAX), dps=None, xtol=XTOL,
+                   maxiter=MAXITER):
+    """
+    σ*(t) with |χ(σ*+it)| = 1 for every t in ts, as a Crossings tuple.
+
+    Without dps the roots and residuals are float64; with dps every
+    converged root is also polished in mpmath and residual is measured
+    at dps digits.
+    """
+    ts = np.asarray(ts, dtype=float).ravel()
+    sigma, evaluations, converged = bracketed_newton(ts, bracket, xtol, maxiter)
+
+    if dps is None:
+        log_mag, _ = log_abs_chi(np.where(converged, sigma, 0.5), ts)
+        residual = np.where(converged, np.expm1(log_mag), np.nan)
+        return Crossings(ts, sigma, None, residual, evaluations + converged, converged)
+
+    sigma_mp = [None] * len(ts)
+    residual = np.full(ts.shape, np.nan)
+    for i in np.nonzero(converged)[0]:
+        sigma_mp[i], res, n = polish(sigma[i], ts[i], dps)
+        residual[i] = float(res)
+        evaluations[i] += n
+    return Crossings(ts, sigma, sigma_mp, residual, evaluations, converged)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve |χ(σ+it)| = 1 for σ at many t.")
+    parser.add_argument("--t-min", type=float, default=10.0)
+    parser.add_argument("--t-max", type=float, default=1000.0)
+    parser.add_argument("--count", type=int, default=2000, help="number of t values")
+    parser.add_argument("--sigma-min", type=float, default=SIGMA_MIN)
+    parser.add_argument("--sigma-max", type=float, default=SIGMA_MAX)
+    parser.add_argument("--dps", type=int, default=None,
+                        help="polish σ* and measure the residual at this precision")
+    parser.add_argument("--output", default=CSV_FILENAME)
+    args = parser.parse_args(argv)
+
+    ts = np.linspace(args.t_min, args.t_max, args.count)
+    t0 = time.perf_counter()
+    result = find_crossings(ts, (args.sigma_min, args.sigma_max), dps=args.dps)
+    elapsed = time.perf_counter() - t0
+
+    with open(args.output, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["t", "sigma_star", "residual", "evaluations"])
+        for i, t in enumerate(result.t.tolist()):
+            if result.sigma_mp is not None and result.sigma_mp[i] is not None:
+                sigma = mp.nstr(result.sigma_mp[i], args.dps)
+            else:
+                sigma = float(result.sigma[i])
+            w.writerow([t, sigma, float(result.residual[i]), int(result.evaluations[i])])
+
+    ok = result.converged
+    print(f"{ok.sum()}/{len(ts)} t values solved in {elapsed:.2f}s")
+    if ok.any():
+        print(f"{result.evaluations[ok].mean():.1f} evaluations per t, "
+              f"max |σ* - 0.5| = {np.abs(result.sigma[ok] - 0.5).max():.3e} (float64), "
+              f"max |residual| = {np.abs(result.residual[ok]).max():.3e}"
+              + (f" at {args.dps} digits" if args.dps else ""))
+    print(f"Crossings written → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
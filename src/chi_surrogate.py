@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+chi_surrogate.py
+Chebyshev tables of log|χ(σ+it)| (and optionally arg χ) over (σ, t) tiles.
+
+A table covers a rectangle of the plane cut into tiles. On each tile
+log|χ| is interpolated at (n+1)² Chebyshev–Lobatto nodes, trying the
+degrees in DEGREES until the tile meets the error budget, and stored as a
+2D Chebyshev series. Every tile carries its own error bound,
+
+    SAFETY · max residual on the n × n first-kind nodes (halfway between
+    the interpolation nodes, where the interpolation error peaks)
+    + the error of the reference values (computed to REF_FRACTION · rtol)
+    + the float64 rounding of the series, 2(n+1)·eps·Σ|c|
+
+an a posteriori bound rather than a proof. An error in log|χ| is a
+relative error in |χ|, so the bound compares directly with chi_engine's
+rtol. The phase is the continuous arg χ (no 2π jumps in t), budgeted
+relative to the largest |arg χ| on the tile. Both are even/odd in t, so
+tables cover t ≥ 0 and lookups fold t.
+
+With RH_RESONANCE_SURROGATE naming a table built with --phase,
+chi_resonance_test takes χ itself (for its base-2i digits) from the
+table: inside a tile whose bounds are within DIGIT_RTOL, an mpmath call
+becomes a polynomial evaluation. |χ| alone is never read from a table;
+chi_engine's float64 path already certifies it across the strip to
+~1e-14, below any tile bound.
+
+    python chi_surrogate.py build chi_surrogate.npz --sigma 0.3 0.7 4 \\
+        --t 10 1e4 200 --workers 8 [--phase]
+    python chi_surrogate.py check chi_surrogate.npz --samples 200
+    python chi_surrogate.py info chi_surrogate.npz
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from mpmath import mp
+from numpy.polynomial.chebyshev import chebgrid2d, chebval2d, chebvander
+
+from precision import DEFAULT_RTOL, choose_dps
+
+FORMAT_VERSION = 1
+SURROGATE_FILE = "chi_surrogate.npz"
+DEGREES = (8, 12, 16, 24)   # tried in order per tile; tables store up to the last
+SAFETY = 2.0                # factor on the residual between the nodes
+REF_FRACTION = 0.1          # reference values are computed to this share of rtol
+
+EPS = np.finfo(float).eps
+
+
+def lobatto_nodes(n):
+    """n+1 Chebyshev–Lobatto points on [-1, 1], ascending."""
+    return -np.cos(np.pi * np.arange(n + 1) / n)
+
+
+def check_nodes(n):
+    """n Chebyshev points of the first kind, between the Lobatto nodes."""
+    return -np.cos(np.pi * (np.arange(n) + 0.5) / n)
+
+
+def _to_interval(x, lo, hi):
+    return 0.5 * (lo + hi) + 0.5 * (hi - lo) * x
+
+
+def _from_interval(v, lo, hi):
+    return (2.0 * v - (lo + hi)) / (hi - lo)
+
+
+def fit_coefficients(values, n):
+    """c with values[a, b] = Σ c[i, j] T_i(x_a) T_j(y_b) on the Lobatto nodes."""
+    v = chebvander(lobatto_nodes(n), n)
+    return np.linalg.solve(v, np.linalg.solve(v, values).T).T
+
+
+def arg_chi(sigma, t, dps=None, rtol=DEFAULT_RTOL):
+    """
+    Continuous arg χ(σ+it) as a float, odd in t.
+
+    For t > 0, sin(πs/2) = (i/2)·e^(-iπs/2)·(1 - q) with q = e^(iπs) and
+    |q| < 1, so arg χ = t·log 2π + π(1-σ)/2 + arg(1-q) + Im log Γ(1-s)
+    with every term continuous in the upper half plane.
+    """
+    y = abs(float(t))
+    with mp.workdps(dps or choose_dps(sigma, y, rtol)):
+        s = mp.mpc(sigma, y)
+        theta = (y * mp.log(2 * mp.pi) + mp.pi * (1 - mp.mpf(sigma)) / 2
+                 + mp.arg(1 - mp.expjpi(s)) + mp.im(mp.loggamma(1 - s)))
+    return float(theta) if t >= 0 else -float(theta)
+
+
+def _log_abs_values(sigmas, ts, rtol):
+    from chi_engine import chi_grid
+
+    with np.errstate(divide="ignore"):
+        return np.log(chi_grid(sigmas, ts, rtol=rtol)).T
+
+
+def _arg_values(sigmas, ts, rtol):
+    return np.array([[arg_chi(s, t, rtol=rtol) for t in ts] for s in sigmas])
+
+
+def fit_tile(evaluate, sigma_range, t_range, rtol=DEFAULT_RTOL, degrees=DEGREES,
+             relative=False):
+    """
+    Fit evaluate(σ axis, t axis) → (len σ, len t) values on one tile.
+
+    Returns (coefficients, bound, degree) for the first degree whose bound
+    is within rtol (times the largest |value| if relative), else for the
+    degree with the smallest bound; bound is inf if a value is not finite.
+    """
+    ref_rtol = REF_FRACTION * rtol
+    best = None
+    for n in degrees:
+        nodes, between = lobatto_nodes(n), check_nodes(n)
+        values = evaluate(_to_interval(nodes, *sigma_range), _to_interval(nodes, *t_range),
+                          ref_rtol)
+        check = evaluate(_to_interval(between, *sigma_range),
+                         _to_interval(between, *t_range), ref_rtol)
+        if not (np.all(np.isfinite(values)) and np.all(np.isfinite(check))):
+            return np.zeros((n + 1, n + 1)), np.inf, n
+        coef = fit_coefficients(values, n)
+        scale = max(np.abs(values).max(), np.abs(check).max(), 1.0) if relative else 1.0
+        residual = np.abs(chebgrid2d(between, between, coef) - check).max()
+        bound = (SAFETY * residual + ref_rtol * scale
+                 + 2 * (n + 1) * EPS * np.abs(coef).sum())
+        if best is None or bound < best[1]:
+            best = (coef, bound, n)
+        if bound <= rtol * scale:
+            break
+    return best
+
+
+def _fit_task(i, j, sigma_range, t_range, rtol, degrees, phase):
+    """Worker task: the log|χ| (and arg χ) series of tile (i, j)."""
+    log_fit = fit_tile(_log_abs_values, sigma_range, t_range, rtol, degrees)
+    phase_fit = (fit_tile(_arg_values, sigma_range, t_range, rtol, degrees, relative=True)
+                 if phase else None)
+    return i, j, log_fit, phase_fit
+
+
+def _pad(coef, size):
+    out = np.zeros((size, size))
+    out[:coef.shape[0], :coef.shape[1]] = coef
+    return out
+
+
+class Surrogate:
+    """
+    A table of tiles: t_edges × sigma_edges, with (rows, cols, n, n)
+    coefficient arrays and (rows, cols) error bounds for log|χ| and,
+    if phase_coef is given, for arg χ.
+    """
+
+    def __init__(self, sigma_edges, t_edges, log_coef, log_err, degree,
+                 phase_coef=None, phase_err=None, rtol=DEFAULT_RTOL):
+        self.sigma_edges = np.asarray(sigma_edges, dtype=float)
+        self.t_edges = np.asarray(t_edges, dtype=float)
+        self.log_coef = np.asarray(log_coef, dtype=float)
+        self.log_err = np.asarray(log_err, dtype=float)
+        self.degree = np.asarray(degree, dtype=int)
+        self.phase_coef = None if phase_coef is None else np.asarray(phase_coef, dtype=float)
+        self.phase_err = None if phase_err is None else np.asarray(phase_err, dtype=float)
+        self.rtol = float(rtol)
+
+    @property
+    def tiles(self):
+        return len(self.t_edges) - 1, len(self.sigma_edges) - 1
+
+    def _lookup(self, coef, err, sigma, t):
+        """Series values and bounds at (σ, t ≥ 0); NaN and inf off the table."""
+        sigma, t = np.broadcast_arrays(np.asarray(sigma, dtype=float),
+                                       np.asarray(t, dtype=float))
+        shape = sigma.shape
+        sigma, t = sigma.ravel(), t.ravel()
+        value = np.full(sigma.shape, np.nan)
+        bound = np.full(sigma.shape, np.inf)
+        rows, cols = self.tiles
+        # side="right" puts a point on an inner edge in the upper tile; the top
+        # edge itself belongs to the last tile
+        i = np.minimum(np.searchsorted(self.t_edges, t, side="right") - 1, rows - 1)
+        j = np.minimum(np.searchsorted(self.sigma_edges, sigma, side="right") - 1, cols - 1)
+        inside = ((t >= self.t_edges[0]) & (t <= self.t_edges[-1])
+                  & (sigma >= self.sigma_edges[0]) & (sigma <= self.sigma_edges[-1]))
+        idx = np.flatnonzero(inside)
+        keys = (i * cols + j)[idx]
+        order = np.argsort(keys, kind="stable")
+        idx, keys = idx[order], keys[order]
+        runs = np.flatnonzero(np.r_[True, np.diff(keys) != 0, True])
+        for a, b in zip(runs[:-1], runs[1:]):
+            ti, tj = divmod(int(keys[a]), cols)
+            pts = idx[a:b]
+            x = _from_interval(sigma[pts], *self.sigma_edges[tj:tj + 2])
+            y = _from_interval(t[pts], *self.t_edges[ti:ti + 2])
+            value[pts] = chebval2d(x, y, coef[ti, tj])
+            bound[pts] = err[ti, tj]
+        return value.reshape(shape), bound.reshape(shape)
+
+    def log_abs(self, sigma, t):
+        """(log|χ|, bound) like chi_engine.log_abs_chi; bound is inf off the table."""
+        return self._lookup(self.log_coef, self.log_err, sigma, np.abs(t))
+
+    def arg(self, sigma, t):
+        """(continuous arg χ, absolute bound); bound is inf off the table."""
+        if self.phase_coef is None:
+            raise ValueError("this table has no phase; build it with --phase")
+        t = np.asarray(t, dtype=float)
+        value, bound = self._lookup(self.phase_coef, self.phase_err, sigma, np.abs(t))
+        return np.where(t < 0, -value, value), bound
+
+    def chi(self, sigma, t):
+        """
+        (χ as complex128, relative bound) from log|χ| and arg χ; the bound
+        is inf off the table. |Δχ|/|χ| ≈ |Δ log|χ|| + |Δ arg χ|.
+        """
+        log_mag, log_bound = self.log_abs(sigma, t)
+        phase, phase_bound = self.arg(sigma, t)
+        return np.exp(log_mag + 1j * phase), log_bound + phase_bound + 4 * EPS
+
+    def save(self, path):
+        arrays = dict(format=FORMAT_VERSION, sigma_edges=self.sigma_edges,
+                      t_edges=self.t_edges, log_coef=self.log_coef, log_err=self.log_err,
+                      degree=self.degree, rtol=self.rtol)
+        if self.phase_coef is not None:
+            arrays.update(phase_coef=self.phase_coef, phase_err=self.phase_err)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+        return path
+
+
+def load_surrogate(path):
+    with np.load(path) as f:
+        if int(f["format"]) != FORMAT_VERSION:
+            raise ValueError(f"{path}: surrogate format {int(f['format'])}, "
+                             f"expected {FORMAT_VERSION}")
+        phase = "phase_coef" in f
+        return Surrogate(f["sigma_edges"], f["t_edges"], f["log_coef"], f["log_err"],
+                         f["degree"], f["phase_coef"] if phase else None,
+                         f["phase_err"] if phase else None, float(f["rtol"]))
+
+
+_loaded = {}
+
+
+def active_surrogate():
+    """The table named by $RH_RESONANCE_SURROGATE, or None (unset or 'off')."""
+    path = os.environ.get("RH_RESONANCE_SURROGATE", "")
+    if path.lower() in ("off", "0", "none", ""):
+        return None
+    if path not in _loaded:
+        _loaded[path] = load_surrogate(path)
+    return _loaded[path]
+
+
+def build_surrogate(sigma_edges, t_edges, rtol=DEFAULT_RTOL, degrees=DEGREES,
+                    phase=False, workers=1, progress=None):
+    """Fit every tile of t_edges × sigma_edges (t ≥ 0), in a process pool if workers > 1."""
+    sigma_edges = np.asarray(sigma_edges, dtype=float)
+    t_edges = np.asarray(t_edges, dtype=float)
+    if t_edges[0] < 0:
+        raise ValueError("tables cover t ≥ 0; lookups fold negative t")
+    rows, cols = len(t_edges) - 1, len(sigma_edges) - 1
+    size = max(degrees) + 1
+    log_coef = np.zeros((rows, cols, size, size))
+    log_err = np.full((rows, cols), np.inf)
+    degree = np.zeros((rows, cols), dtype=int)
+    phase_coef = np.zeros_like(log_coef) if phase else None
+    phase_err = np.full((rows, cols), np.inf) if phase else None
+
+    tasks = [(i, j, tuple(sigma_edges[j:j + 2]), tuple(t_edges[i:i + 2]), rtol,
+              tuple(degrees), phase) for i in range(rows) for j in range(cols)]
+
+    def store(result, done):
+        i, j, (coef, err, n), phase_fit = result
+        log_coef[i, j], log_err[i, j], degree[i, j] = _pad(coef, size), err, n
+        if phase_fit is not None:
+            phase_coef[i, j], phase_err[i, j] = _pad(phase_fit[0], size), phase_fit[1]
+        if progress:
+            progress(done, len(tasks))
+
+    if workers <= 1:
+        for done, task in enumerate(tasks, 1):
+            store(_fit_task(*task), done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_fit_task, *task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                store(future.result(), done)
+    return Surrogate(sigma_edges, t_edges, log_coef, log_err, degree,
+                     phase_coef, phase_err, rtol)
+
+
+def check_surrogate(table, samples=200, seed=0):
+    """
+    Compare random points of every tile against mpmath at high precision.
+
+    Returns (worst log|χ| error / bound, worst arg error / bound or None,
+    seconds per table point, seconds per mpmath point).
+    """
+    from chi_engine import chi
+
+    rng = np.random.default_rng(seed)
+    sigma = rng.uniform(table.sigma_edges[0], table.sigma_edges[-1], samples)
+    t = rng.uniform(table.t_edges[0], table.t_edges[-1], samples)
+    start = time.perf_counter()
+    log_mag, log_bound = table.log_abs(sigma, t)
+    per_table = (time.perf_counter() - start) / samples
+
+    ref_log, ref_arg = [], []
+    start = time.perf_counter()
+    for s, tt in zip(sigma, t):
+        with mp.workdps(choose_dps(s, tt, 1e-25)):
+            ref_log.append(float(mp.log(abs(chi(mp.mpc(s, tt))))))
+    per_mp = (time.perf_counter() - start) / samples
+    usable = np.isfinite(log_bound)
+    log_ratio = (np.abs(log_mag - ref_log)[usable] / log_bound[usable]).max(initial=0.0)
+
+    arg_ratio = None
+    if table.phase_coef is not None:
+        ref_arg = np.array([arg_chi(s, tt, rtol=1e-25) for s, tt in zip(sigma, t)])
+        phase, phase_bound = table.arg(sigma, t)
+        usable = np.isfinite(phase_bound)
+        arg_ratio = (np.abs(phase - ref_arg)[usable] / phase_bound[usable]).max(initial=0.0)
+    return log_ratio, arg_ratio, per_table, per_mp
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    sub = parser.add_subparsers(dest="action", required=True)
+    build = sub.add_parser("build", help="fit every tile and save the table")
+    build.add_argument("table", nargs="?", default=SURROGATE_FILE)
+    build.add_argument("--sigma", nargs=3, type=float, metavar=("MIN", "MAX", "TILES"),
+                       default=(0.3, 0.7, 4))
+    build.add_argument("--t", nargs=3, type=float, metavar=("MIN", "MAX", "TILES"),
+                       default=(10.0, 1010.0, 20))
+    build.add_argument("--rtol", type=float, default=DEFAULT_RTOL,
+                       help="error budget per tile (relative in |χ|)")
+    build.add_argument("--phase", action="store_true", help="also fit arg χ")
+    build.add_argument("--workers", type=int, default=1)
+    check = sub.add_parser("check", help="random points against mpmath")
+    check.add_argument("table", nargs="?", default=SURROGATE_FILE)
+    check.add_argument("--samples", type=int, default=200)
+    info = sub.add_parser("info", help="coverage, degrees and bounds")
+    info.add_argument("table", nargs="?", default=SURROGATE_FILE)
+    args = parser.parse_args(argv)
+
+    if args.action == "build":
+        sigma_edges = np.linspace(args.sigma[0], args.sigma[1], int(args.sigma[2]) + 1)
+        t_edges = np.linspace(args.t[0], args.t[1], int(args.t[2]) + 1)
+
+        def progress(done, todo):
+            if done == todo or done % max(1, todo // 10) == 0:
+                print(f"  {done}/{todo} tiles")
+
+        start = time.perf_counter()
+        table = build_surrogate(sigma_edges, t_edges, args.rtol, phase=args.phase,
+                                workers=args.workers, progress=progress)
+        table.save(args.table)
+        print(f"{args.table}: {table.tiles[0]} × {table.tiles[1]} tiles in "
+              f"{time.perf_counter() - start:.1f}s")
+    table = load_surrogate(args.table)
+    if args.action == "check":
+        log_ratio, arg_ratio, per_table, per_mp = check_surrogate(table, args.samples)
+        print(f"{args.samples} points: worst |error| / bound {log_ratio:.2f} for log|χ|"
+              + (f", {arg_ratio:.2f} for arg χ" if arg_ratio is not None else "")
+              + f"; {per_table * 1e6:.2f} µs per point from the table, "
+                f"{per_mp * 1e6:.0f} µs with mpmath")
+        if log_ratio > 1 or (arg_ratio or 0) > 1:
+            print("error bound exceeded")
+            return 1
+    else:
+        within = table.log_err <= table.rtol
+        print(f"σ ∈ [{table.sigma_edges[0]:g}, {table.sigma_edges[-1]:g}], "
+              f"t ∈ [{table.t_edges[0]:g}, {table.t_edges[-1]:g}]: "
+              f"{table.tiles[0]} × {table.tiles[1]} tiles, {within.sum()} within rtol "
+              f"{table.rtol:.0e}, degrees {sorted(set(table.degree.ravel().tolist()))}, "
+              f"worst bound {table.log_err.max():.2e}"
+              + (f", arg χ worst bound {table.phase_err.max():.2e}"
+                 if table.phase_err is not None else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
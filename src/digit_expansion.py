@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+digit_expansion.py
+Integer-digit expansions in the quater-imaginary bases ±2i and ±(1/2)i.
+
+In base β = ±2i with digits {0, 1, 2, 3} every complex number has an
+expansion z = Σ_k d_k β^k. Since β² = -4, even positions carry the real
+part in base -4 and odd positions carry ±Im/2 in base -4:
+
+    Re z = Σ_j d_{2j} (-4)^j,    ±Im z / 2 = Σ_j d_{2j+1} (-4)^j.
+
+z is first scaled by (-4)^P and rounded onto the lattice Z + 2iZ of
+Gaussian integers with even imaginary part, the mantissas that have finite
+expansions. The digits are then exact: each base -4 part is read off the
+binary form of one Python int (n + m) XOR m, where m puts a 3 at every odd
+base-4 position. This is the residue digit selection done for all digits
+at once. Each value costs one mpc multiplication and one rounding; there
+is no repeated mpc division. Base ±(1/2)i is the same expansion in ∓2i
+with the exponents negated, since ((1/2)i)^-1 = -2i.
+
+    python digit_expansion.py      # round-trip check and timing
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+from mpmath import mp
+
+# base name → (sign s of β = s·2i, exponents negated)
+BASES = {
+    "2i": (1, False),
+    "-2i": (-1, False),
+    "1/2i": (-1, True),
+    "-1/2i": (1, True),
+}
+WINDOW = 25    # digits counted from the leading one by nonzero_digits
+
+# digits: uint8 (len(values), width), most significant first;
+# exponents: the power of the base each column multiplies
+DigitExpansion = namedtuple("DigitExpansion", ["digits", "exponents"])
+
+
+def gaussian_mantissas(values, pairs, dps=None):
+    """
+    (a, b) Python ints with a + bi ≈ z·(-4)^pairs and b even, per value.
+
+    The rounding error is at most √5/2 · 4^-pairs in z.
+    """
+    scale = (-4) ** pairs
+    out = []
+    with mp.workdps(dps or mp.dps):
+        for z in values:
+            w = mp.mpc(z) * scale
+            out.append((int(mp.nint(w.real)), 2 * int(mp.nint(w.imag / 2))))
+    return out
+
+
+def neg4_digits(numbers, width):
+    """
+    Base -4 digits of Python ints, as uint8 (len(numbers), width), most
+    significant first. width must be a multiple of 4 and large enough.
+    """
+    mask = int("30" * (width // 2), 4)   # 3 at every odd base-4 position
+    n_bytes = width // 4
+    raw = b"".join(((n + mask) ^ mask).to_bytes(n_bytes, "big") for n in numbers)
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(numbers), n_bytes)
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    return ((packed[:, :, None] >> shifts) & 3).reshape(len(numbers), width)
+
+
+def _neg4_width(numbers):
+    """Base -4 digits (rounded up to a multiple of 4) enough for every int."""
+    biggest = max((abs(n) for n in numbers), default=0)
+    width = (biggest.bit_length() + 1) // 2 + 2
+    return -(-width // 4) * 4
+
+
+def expand_digits(values, frac_digits=WINDOW, base="2i", dps=None):
+    """
+    Digit expansions of many values in one base, as a DigitExpansion.
+
+    frac_digits digits (rounded up to even) are kept below β^0; every row
+    is aligned on the same exponents, padded with leading zeros.
+    """
+    sign, inverted = BASES[base]
+    pairs = -(-frac_digits // 2)
+    mantissas = gaussian_mantissas(values, pairs, dps)
+    real = [a for a, _ in mantissas]
+    imag = [sign * b // 2 for _, b in mantissas]
+    half = _neg4_width(real + imag)
+
+    digits = np.empty((len(values), 2 * half), dtype=np.uint8)
+    digits[:, 1::2] = neg4_digits(real, half)    # even positions, MSB first
+    digits[:, 0::2] = neg4_digits(imag, half)    # odd positions
+    positions = np.arange(2 * half - 1, -1, -1) - 2 * pairs
+    return DigitExpansion(digits, -positions if inverted else positions)
+
+
+def digits_value(expansion, base="2i", dps=None):
+    """Σ_k d_k base^k for every row, as mpc (for checking)."""
+    sign, inverted = BASES[base]
+    with mp.workdps(dps or mp.dps):
+        beta = mp.mpc(0, 2 * sign)
+        if inverted:
+            beta = 1 / beta
+        powers = [beta ** int(k) for k in expansion.exponents]
+        return [mp.fsum(int(d) * p for d, p in zip(row, powers) if d)
+                for row in expansion.digits]
+
+
+def leading_exponent(z):
+    """Rough exponent of the leading base ±2i digit of z (|β| = 2)."""
+    magnitude = abs(complex(z))
+    if magnitude == 0:
+        return 0
+    return int(math.floor(math.log(magnitude, 2)))
+
+
+def nonzero_digits(values, window=WINDOW, base="2i", dps=None):
+    """
+    Nonzero digits among the first `window` digits of each value, counting
+    from its leading digit (0 for z = 0).
+    """
+    values = list(values)
+    lowest = min((leading_exponent(z) for z in values), default=0)
+    expansion = expand_digits(values, window - lowest + 4, base, dps)
+    digits = expansion.digits
+    lead = np.where(digits.any(axis=1), np.argmax(digits != 0, axis=1), digits.shape[1])
+    cols = np.arange(digits.shape[1])[None, :]
+    in_window = (cols >= lead[:, None]) & (cols < lead[:, None] + window)
+    return ((digits != 0) & in_window).sum(axis=1)
+
+
+if __name__ == "__main__":
+    import time
+
+    from chi_engine import chi_cached
+
+    mp.dps = 60
+    rng = np.random.default_rng(0)
+    values = [mp.mpc(x, y) for x, y in rng.normal(scale=10, size=(200, 2))]
+    values += [mp.mpc(0), mp.mpc(1), mp.mpc(0, 2), mp.mpc(-3, 0.5), mp.mpc("1e-20", "-7")]
+    for base in BASES:
+        exp = expand_digits(values, 120, base)
+        assert exp.digits.max() <= 3
+        worst = max(abs(v - z) for v, z in zip(digits_value(exp, base), values))
+        assert worst <= 1.2 * mp.mpf(4) ** -60, (base, worst)
+        print(f"base {base}: {exp.digits.shape[1]} digits per value, "
+              f"max round-trip error {mp.nstr(worst, 3)}")
+    # Textbook quater-imaginary representations
+    known = {4: "10300", 5: "10301", -1: "103", 2j: "10", 1j: "10.2", 3j: "20.2"}
+    exp = expand_digits([mp.mpc(z) for z in known], 2)
+    for row, (z, text) in zip(exp.digits, known.items()):
+        whole = "".join(map(str, row[exp.exponents >= 0])).lstrip("0") or "0"
+        frac = "".join(map(str, row[exp.exponents < 0])).rstrip("0")
+        assert whole + ("." + frac if frac else "") == text, (z, whole, frac)
+    print(f"{len(known)} textbook base-2i representations reproduced")
+
+    ts = np.linspace(100, 200, 50)
+    sigmas = np.linspace(0.3, 0.7, 40)
+    chis = [chi_cached(float(s), float(t), 60) for t in ts for s in sigmas]
+    start = time.perf_counter()
+    exp = expand_digits(chis, 200)
+    print(f"{len(chis)} χ values to {exp.digits.shape[1]} digits in base 2i: "
+          f"{time.perf_counter() - start:.3f}s")
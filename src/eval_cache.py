@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+eval_cache.py
+Persistent cache of mpmath χ(s) / ζ(s) evaluations shared by all scripts.
+
+Values are stored in one SQLite file, keyed by a digest of (function,
+backend, σ, t, dps) and packed as raw mpf (sign, exponent, mantissa) so
+nothing is lost at any precision. The file is bounded in size; the
+least recently used entries are evicted first.
+
+Location: $RH_RESONANCE_CACHE (a file path), default
+~/.cache/rh_resonance/evals.sqlite. Set RH_RESONANCE_CACHE=off to disable.
+"""
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import struct
+import threading
+import time
+
+from mpmath import mp, mpc
+from mpmath.libmp import MPZ
+
+import instrument
+from backends import get_backend
+from precision import DEFAULT_RTOL, choose_dps
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rh_resonance",
+                            "evals.sqlite")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Per-row bookkeeping overhead counted against max_bytes
+ROW_OVERHEAD = 48
+
+_MPF_HEADER = struct.Struct("<bqqI")
+
+
+def cache_key(name, sigma, t, dps, backend=None):
+    """Key of name(σ+it) at dps digits computed by backend (default: the active one)."""
+    backend = backend or get_backend().name
+    blob = f"{name}|{backend}|{float(sigma).hex()}|{float(t).hex()}|{int(dps)}".encode()
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+def _pack_mpf(x):
+    sign, man, exp, bc = x._mpf_
+    man = int(man)
+    man_bytes = man.to_bytes((man.bit_length() + 7) // 8, "little")
+    return _MPF_HEADER.pack(sign, exp, bc, len(man_bytes)) + man_bytes
+
+
+def _unpack_mpf(buf, offset):
+    sign, exp, bc, n = _MPF_HEADER.unpack_from(buf, offset)
+    offset += _MPF_HEADER.size
+    man = int.from_bytes(buf[offset:offset + n], "little")
+    return mp.make_mpf((sign, MPZ(man), exp, bc)), offset + n
+
+
+def pack_value(z):
+    """Serialize an mpf/mpc losslessly."""
+    z = mpc(z)
+    return _pack_mpf(z.real) + _pack_mpf(z.imag)
+
+
+def unpack_value(buf):
+    re, offset = _unpack_mpf(buf, 0)
+    im, _ = _unpack_mpf(buf, offset)
+    return mpc(re, im)
+
+
+class EvalCache:
+    """Size-bounded LRU store of (function, σ, t, dps) → mpc."""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Each thread gets its own EvalCache; only atexit closes it elsewhere
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS evals (
+                                 key BLOB PRIMARY KEY,
+                                 value BLOB NOT NULL,
+                                 used INTEGER NOT NULL)""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS evals_used ON evals(used)")
+        self.conn.commit()
+        self._touched = {}
+        self._size = None
+
+    def get(self, name, sigma, t, dps):
+        key = cache_key(name, sigma, t, dps)
+        row = self.conn.execute("SELECT value FROM evals WHERE key = ?",
+                                (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time_ns()
+        return unpack_value(row[0])
+
+    def put(self, name, sigma, t, dps, value):
+        key = cache_key(name, sigma, t, dps)
+        blob = pack_value(value)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO evals VALUES (?, ?, ?)",
+                              (key, blob, time.time_ns()))
+        if self._size is not None:
+            self._size += len(blob) + ROW_OVERHEAD
+        self._evict()
+
+    def size_bytes(self):
+        if self._size is None:
+            (total, count), = self.conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(value)), 0), COUNT(*) FROM evals")
+            self._size = total + count * ROW_OVERHEAD
+        return self._size
+
+    def _evict(self):
+        if self.size_bytes() <= self.max_bytes:
+            return
+        self.flush()
+        with self.conn:
+            while self.size_bytes() > self.max_bytes:
+                # Drop the oldest ~10% in one statement
+                (count,), = self.conn.execute("SELECT COUNT(*) FROM evals")
+                self.conn.execute(
+                    "DELETE FROM evals WHERE key IN "
+                    "(SELECT key FROM evals ORDER BY used ASC LIMIT ?)",
+                    (max(1, count // 10),))
+                self._size = None
+
+    def flush(self):
+        """Persist LRU timestamps of entries read since the last flush."""
+        if self._touched:
+            with self.conn:
+                self.conn.executemany("UPDATE evals SET used = ? WHERE key = ?",
+                                      [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+_caches = {}
+
+
+def get_cache():
+    """The shared cache, or None if disabled (one connection per process/thread)."""
+    path = os.environ.get("RH_RESONANCE_CACHE", DEFAULT_PATH)
+    if path.lower() in ("off", "0", "none", ""):
+        return None
+    owner = (os.getpid(), threading.get_ident())
+    if owner not in _caches:
+        _caches[owner] = EvalCache(path)
+        atexit.register(_caches[owner].close)
+    return _caches[owner]
+
+
+def cached_eval(name, fn, sigma, t, dps=None):
+    """fn(σ+it) evaluated at dps, served from the on-disk cache when possible."""
+    dps = dps or mp.dps
+    cache = get_cache()
+    with mp.workdps(dps):
+        if cache is not None:
+            value = cache.get(name, sigma, t, dps)
+            if value is not None:
+                if instrument.ENABLED:
+                    instrument.count(f"cache.{name}.hits")
+                return value
+        if instrument.ENABLED:
+            start = time.perf_counter()
+            value = fn(mpc(sigma, t))
+            instrument.observe(f"mpmath.{name}", time.perf_counter() - start)
+        else:
+            value = fn(mpc(sigma, t))
+    if cache is not None:
+        cache.put(name, sigma, t, dps, value)
+    return value
+
+
+def zeta_cached(sigma, t, dps=None, rtol=DEFAULT_RTOL):
+    """ζ(σ+it) at dps digits (default: enough for rtol), via the shared cache."""
+    return cached_eval("zeta", get_backend().zeta, sigma, t,
+                       dps or choose_dps(sigma, t, rtol, "zeta"))
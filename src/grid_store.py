@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+grid_store.py
+Binary (σ, t) grid format for |χ(s)| data.
+
+A grid is a directory <name>.chigrid/ holding
+
+    magnitude.npy   float64 |χ(σ+it)|, shape (len(t), len(sigma)), row = t
+    sigma.npy       σ axis
+    t.npy           t axis
+    meta.json       format version, dps, axis ranges, producing script
+
+Every array is a plain .npy, so readers get it zero-copy with
+np.load(mmap_mode='r') and writers can fill rows in place through a
+memory map. The long-form CSV (t, sigma, chi_magnitude,
+chi_deviation_from_1) is available as an export.
+
+Usage:
+    python grid_store.py export chi_magnitude_heatmap_grid.chigrid out.csv
+"""
+
+import csv
+import json
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+GRID_SUFFIX = ".chigrid"
+
+ChiGrid = namedtuple("ChiGrid", ["sigma", "t", "magnitude", "meta"])
+
+
+def grid_path(name):
+    """'chi_magnitude_sweep.csv' or '...sweep' → '...sweep.chigrid'."""
+    base, ext = os.path.splitext(name)
+    if ext == GRID_SUFFIX:
+        return name
+    return (base if ext == ".csv" else name) + GRID_SUFFIX
+
+
+def deviation(grid):
+    """||χ| - 1| for a loaded grid (computed on demand, not stored)."""
+    return np.abs(grid.magnitude - 1.0)
+
+
+def create_grid(path, sigmas, ts, **meta):
+    """
+    Create a grid directory and return its writable magnitude memmap.
+
+    Rows are filled in place (mag[i] = row) and reach disk on flush();
+    unfilled cells are NaN.
+    """
+    path = grid_path(path)
+    os.makedirs(path, exist_ok=True)
+    sigmas = np.asarray(sigmas, dtype=float)
+    ts = np.asarray(ts, dtype=float)
+    np.save(os.path.join(path, "sigma.npy"), sigmas)
+    np.save(os.path.join(path, "t.npy"), ts)
+
+    meta = dict(meta, version=FORMAT_VERSION, shape=[len(ts), len(sigmas)],
+                sigma_range=[float(sigmas.min()), float(sigmas.max())] if len(sigmas) else None,
+                t_range=[float(ts.min()), float(ts.max())] if len(ts) else None)
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=1)
+
+    mag = np.lib.format.open_memmap(os.path.join(path, "magnitude.npy"), mode="w+",
+                                    dtype=np.float64, shape=(len(ts), len(sigmas)))
+    mag[:] = np.nan
+    return mag
+
+
+def open_grid_rw(path):
+    """Reopen an existing grid's magnitude array for in-place updates."""
+    return np.lib.format.open_memmap(os.path.join(grid_path(path), "magnitude.npy"),
+                                     mode="r+")
+
+
+def save_grid(path, sigmas, ts, magnitude, **meta):
+    """Write a complete grid in one call."""
+    mag = create_grid(path, sigmas, ts, **meta)
+    mag[:] = magnitude
+    mag.flush()
+    return grid_path(path)
+
+
+def load_grid(path, mmap=True):
+    """Load a grid; with mmap the arrays are read-only views of the files."""
+    path = grid_path(path)
+    mode = "r" if mmap else None
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    if meta.get("version", 0) > FORMAT_VERSION:
+        raise ValueError(f"{path}: grid format v{meta['version']} is newer than "
+                         f"this reader (v{FORMAT_VERSION})")
+    return ChiGrid(sigma=np.load(os.path.join(path, "sigma.npy"), mmap_mode=mode),
+                   t=np.load(os.path.join(path, "t.npy"), mmap_mode=mode),
+                   magnitude=np.load(os.path.join(path, "magnitude.npy"), mmap_mode=mode),
+                   meta=meta)
+
+
+def write_csv_rows(writer, ts, sigmas, mag_rows):
+    """Long-form CSV rows, byte-compatible with the original sweep scripts."""
+    for t, row in zip(ts, mag_rows):
+        for sigma, chi_mag in zip(sigmas, row):
+            chi_mag = float(chi_mag)
+            chi_dev = abs(chi_mag - 1.0)
+            writer.writerow([t, sigma, chi_mag, chi_dev])
+
+
+def export_csv(grid, csv_path):
+    """Export a grid (or grid path) to the long-form CSV."""
+    if not isinstance(grid, ChiGrid):
+        grid = load_grid(grid)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["t", "sigma", "chi_magnitude", "chi_deviation_from_1"])
+        write_csv_rows(writer, grid.t.tolist(), grid.sigma.tolist(), grid.magnitude)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "export":
+        sys.exit(__doc__.strip().split("Usage:")[1])
+    export_csv(sys.argv[2], sys.argv[3])
+    print(f"Exported {grid_path(sys.argv[2])} → {sys.argv[3]}")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+instrument.py
+Opt-in timers, counters and latency histograms for the build and sweeps.
+
+Off by default: timer() then returns one shared no-op context manager and
+count()/observe() return after a single flag test, so instrumented code
+runs at full speed. After enable():
+
+    timer(name)        accumulates calls, total and max seconds per stage
+    count(name, n)     plain counters (cells escalated, rows written, ...)
+    observe(name, s)   per-call latency histogram (log-spaced, 1 µs – 100 s)
+
+mpmath evaluations of χ and ζ are observed in eval_cache.cached_eval as
+"mpmath.chi" / "mpmath.zeta" (cache hits are counted, not timed).
+report() bundles everything with peak RSS into a JSON-ready dict. With
+profiling on, profiled(name) runs a block under its own cProfile profiler
+(one per stage thread) and dump_profile() merges them into one pstats file.
+Only this process is recorded; process-pool workers show up in the peak
+RSS of finished children.
+
+    python build_pipeline.py --report run_report.json --profile run.prof
+"""
+
+import bisect
+import contextlib
+import cProfile
+import itertools
+import json
+import platform
+import pstats
+import resource
+import sys
+import threading
+import time
+
+# seconds; 4 bins per decade. Plain floats: the build imports this module
+# first, before anything has needed numpy
+LATENCY_EDGES = [10.0 ** (k / 4 - 6) for k in range(33)]
+
+ENABLED = False
+PROFILING = False
+
+_lock = threading.Lock()
+_timers = {}        # name → [calls, total seconds, max seconds]
+_counters = {}
+_latency = {}       # name → histogram counts (len(LATENCY_EDGES) + 1, last = overflow)
+_profiles = []
+_started = None
+
+_NULL = contextlib.nullcontext()
+
+
+def enable(profile=False):
+    """Start recording (and, with profile, collecting cProfile data)."""
+    global ENABLED, PROFILING, _started
+    reset()
+    ENABLED = True
+    PROFILING = profile
+    _started = time.perf_counter()
+
+
+def disable():
+    global ENABLED, PROFILING
+    ENABLED = PROFILING = False
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _latency.clear()
+        _profiles.clear()
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            entry = _timers.setdefault(self.name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+        return False
+
+
+def timer(name):
+    """Context manager timing one stage; a shared no-op when disabled."""
+    return _Timer(name) if ENABLED else _NULL
+
+
+def count(name, n=1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name, seconds):
+    """Add one latency sample to the histogram `name`."""
+    if not ENABLED:
+        return
+    i = bisect.bisect_right(LATENCY_EDGES, seconds)
+    with _lock:
+        hist = _latency.setdefault(name, [0] * (len(LATENCY_EDGES) + 1))
+        hist[i] += 1
+
+
+def profiled(name):
+    """Run a block under its own cProfile profiler when profiling is on."""
+    if not PROFILING:
+        return _NULL
+    return _Profiled(name)
+
+
+class _Profiled:
+    def __init__(self, name):
+        self.name = name
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.disable()
+        with _lock:
+            _profiles.append(self.profile)
+        return False
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process and of its finished children."""
+    scale = 1 if sys.platform == "darwin" else 1024    # ru_maxrss is KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {"self": own, "children": children}
+
+
+def _percentile(hist, q):
+    """Upper bin edge below which a fraction q of the samples fall."""
+    total = sum(hist)
+    if not total:
+        return None
+    cumulative = list(itertools.accumulate(hist))
+    i = bisect.bisect_left(cumulative, q * total)
+    return LATENCY_EDGES[i] if i < len(LATENCY_EDGES) else float("inf")
+
+
+def report():
+    """Everything recorded so far as a JSON-ready dict."""
+    with _lock:
+        timers = {name: {"calls": c, "seconds": total, "max_seconds": worst}
+                  for name, (c, total, worst) in sorted(_timers.items())}
+        counters = dict(sorted(_counters.items()))
+        latency = {name: {"samples": sum(hist), "p50_below": _percentile(hist, 0.5),
+                          "p99_below": _percentile(hist, 0.99), "counts": list(hist)}
+                   for name, hist in sorted(_latency.items())}
+    return {
+        "wall_seconds": None if _started is None else time.perf_counter() - _started,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "timers": timers,
+        "counters": counters,
+        "latency": {"edges_seconds": LATENCY_EDGES, "histograms": latency},
+        "python": platform.python_version(),
+    }
+
+
+def write_report(path):
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=1)
+    return path
+
+
+def dump_profile(path):
+    """Merge every profiled block into one pstats file; False if none ran."""
+    with _lock:
+        profiles = list(_profiles)
+    if not profiles:
+        return False
+    stats = pstats.Stats(profiles[0])
+    for p in profiles[1:]:
+        stats.add(p)
+    stats.dump_stats(path)
+    return True
+
+
+def summary(top=10):
+    """A few lines for the console: slowest timers and the mpmath call counts."""
+    data = report()
+    lines = [f"{name:<36} {t['calls']:>7} × {t['seconds']:9.3f}s"
+             for name, t in sorted(data["timers"].items(),
+                                   key=lambda kv: -kv[1]["seconds"])[:top]]
+    for name, h in data["latency"]["histograms"].items():
+        lines.append(f"{name:<36} {h['samples']:>7} calls, p50 < {h['p50_below']:.0e}s, "
+                     f"p99 < {h['p99_below']:.0e}s")
+    rss = data["peak_rss_bytes"]
+    lines.append(f"peak RSS {rss['self'] / 2**20:.0f} MiB "
+                 f"(children {rss['children'] / 2**20:.0f} MiB)")
+    return "\n".join(lines)
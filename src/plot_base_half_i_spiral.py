@@ -3,10 +3,17 @@
 Generate geometric plot of base-(1/2 i) spiral structure.
 """
 
-import matplotlib.pyplot as plt
+import argparse
+
 import numpy as np
 
-def plot_base_half_i_spiral(n_terms=8):
+from plotting import DPI, pyplot
+
+N_TERMS = 8
+PNG_FILE = "base_half_i_spiral.png"
+
+def plot_base_half_i_spiral(n_terms=N_TERMS, path=PNG_FILE):
+    plt = pyplot()
     base = 0.5j  # (1/2)i
     powers = np.array([base**n for n in range(n_terms)], dtype=complex)
     
@@ -27,8 +34,16 @@ def plot_base_half_i_spiral(n_terms=8):
     plt.grid(True)
     plt.axis('equal')
     plt.tight_layout()
-    plt.savefig("base_half_i_spiral.png", dpi=300)
+    plt.savefig(path, dpi=DPI)
     plt.close()
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--terms", type=int, default=N_TERMS,
+                        help=f"powers of (1/2)i to draw (default: {N_TERMS})")
+    parser.add_argument("--output", default=PNG_FILE)
+    args = parser.parse_args(argv)
+    plot_base_half_i_spiral(args.terms, args.output)
+
 if __name__ == "__main__":
-    plot_base_half_i_spiral()
+    main()
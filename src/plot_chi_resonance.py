@@ -4,36 +4,61 @@ plot_chi_resonance.py
 Plot |χ(s)| vs σ showing resonance at σ=0.5
 """
 
+import argparse
 import csv
+import os
 import numpy as np
-import matplotlib.pyplot as plt
 from collections import defaultdict
 
+from grid_store import grid_path, load_grid
+from plotting import DPI, pyplot
+
 CSV_FILE = "chi_magnitude_sweep.csv"
 PNG_FILE = "chi_magnitude_resonance.png"
 
 def load_data(csv_file):
-    data = defaultdict(list)
+    """
+    {t: (sigmas, chi_mags)} arrays sorted by σ.
+
+    Reads the binary .chigrid next to csv_file (memory-mapped) when it
+    exists, and falls back to parsing the CSV otherwise.
+    """
+    if os.path.isdir(grid_path(csv_file)):
+        grid = load_grid(csv_file)
+        order = np.argsort(grid.sigma)
+        return {float(t): (grid.sigma[order], grid.magnitude[i, order])
+                for i, t in enumerate(grid.t)}
+
+    rows = defaultdict(list)
     with open(csv_file) as f:
         r = csv.DictReader(f)
         for row in r:
             t = float(row["t"])
             sigma = float(row["sigma"])
             chi_mag = float(row["chi_magnitude"])
-            data[t].append((sigma, chi_mag))
+            rows[t].append((sigma, chi_mag))
     
-    for t in data:
-        data[t].sort(key=lambda x: x[0])
+    data = {}
+    for t, vals in rows.items():
+        vals.sort(key=lambda x: x[0])
+        sigmas, chi_mags = zip(*vals)
+        data[t] = (np.array(sigmas), np.array(chi_mags))
     return data
 
-def main():
-    data = load_data(CSV_FILE)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--input", default=CSV_FILE,
+                        help="sweep CSV (its .chigrid is used when present)")
+    parser.add_argument("--output", default=PNG_FILE)
+    args = parser.parse_args(argv)
+
+    data = load_data(args.input)
     
+    plt = pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
     
     # Plot 1: |χ(s)| vs σ
-    for t, vals in data.items():
-        sigmas, chi_mags = zip(*vals)
+    for t, (sigmas, chi_mags) in data.items():
         ax1.plot(sigmas, chi_mags, label=f"t={t:.2f}", linewidth=2)
     
     ax1.axhline(1.0, color='red', linestyle='--', linewidth=2, label='|χ|=1 (resonance)', zorder=10)
@@ -46,9 +71,8 @@ def main():
     ax1.set_ylim(0.8, 1.3)
     
     # Plot 2: Deviation from 1
-    for t, vals in data.items():
-        sigmas, chi_mags = zip(*vals)
-        deviations = [abs(m - 1.0) for m in chi_mags]
+    for t, (sigmas, chi_mags) in data.items():
+        deviations = np.abs(chi_mags - 1.0)
         ax2.semilogy(sigmas, deviations, label=f"t={t:.2f}", linewidth=2)
     
     ax2.axvline(0.5, color='green', linestyle='--', linewidth=2, label='Critical line', zorder=10)
@@ -59,8 +83,8 @@ def main():
     ax2.grid(alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig(PNG_FILE, dpi=200, bbox_inches='tight')
-    print(f"Plot saved → {PNG_FILE}")
+    plt.savefig(args.output, dpi=DPI, bbox_inches='tight')
+    print(f"Plot saved → {args.output}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,28 +2,85 @@
 """
 Improved resonance correlation visualization
 Replicates the original figure layout with correct scaling and resonance behavior.
+
+With --zeros N the test is also run over the first N zero heights as a
+batch (|χ| at each σ and |ζ| on the critical line), written to
+resonance_correlation_zeros.csv.
+
+The correlation panel is drawn from the whole (σ, t) grid of
+chi_resonance_test.correlation_stats (the zero heights with --zeros), or
+from statistics saved by `chi_resonance_test.py --output` with --stats:
+the joint histogram of log10 ||χ|-1| and the nonzero digits, with
+bootstrap intervals of the rank correlations.
 """
 
-from mpmath import mp, mpc, zeta, power, pi, sin, gamma
-import matplotlib.pyplot as plt
+import argparse
+import csv
+
 import numpy as np
 
-mp.dps = 100
+from chi_engine import chi_cached, chi_grid
+from chi_resonance_test import STATS_SIGMAS, STATS_T, correlation_stats
+from digit_expansion import WINDOW, nonzero_digits
+from plotting import DPI, pyplot
+from resonance_heatmap import iter_row_blocks
+from stream_stats import CONFIDENCE, load_stats
+from zero_table import zero_heights
+from zeta_engine import zeta_grid, zeta_line
+
+BATCH_CSV = "resonance_correlation_zeros.csv"
+
+def batch_test(sigmas, ts, workers=1, csv_path=BATCH_CSV):
+    """|χ(σ+iγ_n)| at every σ and |ζ(1/2+iγ_n)| for each zero height γ_n, streamed to CSV."""
+    i_half = int(np.argmin(np.abs(sigmas - 0.5)))
+    zeta_half, n_mp = zeta_line(0.5, ts, return_stats=True)
+    zeta_half = np.abs(zeta_half)
+    worst_half = 0.0
+    not_monotone = 0
+    with open(csv_path, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["n", "t"] + [f"chi_magnitude_sigma_{s:.2f}" for s in sigmas]
+                   + ["zeta_magnitude_sigma_0.50"])
+        for start, _, mag_rows in iter_row_blocks(sigmas, ts, workers):
+            for n, (t, row) in enumerate(zip(ts[start:], mag_rows), start + 1):
+                w.writerow([n, t] + row.tolist() + [float(zeta_half[n - 1])])
+            worst_half = max(worst_half, float(np.abs(mag_rows[:, i_half] - 1).max()))
+            # |χ| should fall strictly through 1 as σ crosses 0.5
+            not_monotone += int(np.any(np.diff(mag_rows, axis=1) >= 0, axis=1).sum())
+    print(f"{len(ts)} zeros: max ||χ(1/2+iγ)|-1| = {worst_half:.3e}, "
+          f"{not_monotone} with |χ| not strictly decreasing in σ, "
+          f"max |ζ(1/2+iγ)| = {zeta_half.max():.3e} ({n_mp} via mpmath) → {csv_path}")
 
-def chi(s):
-    return power(2, s) * power(pi, s - 1) * sin(pi * s / 2) * gamma(1 - s)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resonance correlation test.")
+    parser.add_argument("--zeros", type=int, default=0,
+                        help="also run the |χ| test over the first N zeros")
+    parser.add_argument("--zero-file",
+                        help="read zero heights from this list (e.g. Odlyzko's zeros1)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--stats",
+                        help="draw the correlation panel from these saved statistics (.npz)")
+    args = parser.parse_args(argv)
 
-def main():
     sigmas = np.linspace(0.30, 0.70, 9)
-    t = 14.134725  # first nontrivial zero height
+    heights = zero_heights(max(args.zeros, 1), args.zero_file, args.workers)
+    t = float(heights[0])  # first nontrivial zero height
+    if args.zeros:
+        batch_test(sigmas, heights.tolist(), args.workers)
 
-    chi_mags = []
-    zeta_mags = []
-    for sigma in sigmas:
-        s = mpc(sigma, t)
-        chi_mags.append(float(abs(chi(s))))
-        zeta_mags.append(float(abs(zeta(s))))
+    chi_mags = list(chi_grid(sigmas, [t])[0])
+    zeta_mags = list(np.abs(zeta_grid(sigmas, [t])[0]))
+    digit_counts = nonzero_digits([chi_cached(float(s), t) for s in sigmas], WINDOW)
+    if args.stats:
+        stats = load_stats(args.stats)
+    else:
+        stats_ts = heights if args.zeros else np.linspace(*STATS_T[:2], STATS_T[2])
+        stats = correlation_stats(np.linspace(*STATS_SIGMAS[:2], STATS_SIGMAS[2]), stats_ts,
+                                  args.workers)
+    result = stats.correlations()
 
+    plt = pyplot()
+    from matplotlib.colors import LogNorm
     fig, axs = plt.subplots(2, 2, figsize=(12, 9))
 
     # (1) |χ(s)| magnitude vs σ
@@ -36,35 +93,41 @@ def main():
     axs[0, 0].grid(True, alpha=0.3)
     axs[0, 0].legend()
 
-    # (2) χ(s) “digits” placeholder (zero line)
-    axs[0, 1].plot(sigmas, np.zeros_like(sigmas), "o-r", markersize=5)
+    # (2) nonzero quater-imaginary digits of χ(s)
+    axs[0, 1].plot(sigmas, digit_counts, "o-r", markersize=5)
     axs[0, 1].axvline(0.5, color="green", linestyle="--", label="Critical line")
     axs[0, 1].set_title("χ(s) Nonzero Digits (in Base (2i))")
-    axs[0, 1].set_ylabel("Nonzero digits (out of 25)")
+    axs[0, 1].set_xlabel("σ")
+    axs[0, 1].set_ylabel(f"Nonzero digits (out of {WINDOW})")
     axs[0, 1].grid(True, alpha=0.3)
     axs[0, 1].legend()
 
     # (3) |ζ(s)| magnitude at same t (not zero height)
     axs[1, 0].plot(sigmas, zeta_mags, "o-m", linewidth=2, markersize=6)
     axs[1, 0].axvline(0.5, color="green", linestyle="--", label="Critical line")
-    axs[1, 0].set_title("|ζ(s)| Magnitude (at t = 14.1347)")
+    axs[1, 0].set_title(f"|ζ(s)| Magnitude (at t = {t:.4f})")
     axs[1, 0].set_xlabel("σ")
     axs[1, 0].set_ylabel("|ζ(s)|")
     axs[1, 0].grid(True, alpha=0.3)
     axs[1, 0].legend()
 
-    # (4) correlation scatter plot
-    deviations = np.abs(np.array(chi_mags) - 1)
-    axs[1, 1].scatter(deviations, np.zeros_like(sigmas), s=70, color="blue", zorder=5)
-    for s, dev in zip(sigmas, deviations):
-        axs[1, 1].text(dev, 0.002, f"σ={s:.2f}", fontsize=8, ha="center")
-    axs[1, 1].set_title("Correlation Test")
-    axs[1, 1].set_xlabel("|χ(s)| − 1 (deviation from resonance)")
+    # (4) joint histogram of every (σ, t) sample, with the rank correlations
+    table = np.ma.masked_equal(stats.table().T, 0)
+    mesh = axs[1, 1].pcolormesh(stats.sketch.x_edges, stats.sketch.y_edges, table,
+                                norm=LogNorm(), cmap="viridis")
+    fig.colorbar(mesh, ax=axs[1, 1], label="samples")
+    summary = "\n".join(f"{name} = {est.value:+.3f} [{est.low:+.3f}, {est.high:+.3f}]"
+                        for name, est in (("Spearman ρ", result.spearman),
+                                          ("Kendall τ_b", result.kendall)))
+    axs[1, 1].text(0.03, 0.97, summary, transform=axs[1, 1].transAxes, fontsize=8,
+                   va="top", bbox=dict(facecolor="white", alpha=0.8))
+    axs[1, 1].set_title(f"Correlation Test ({result.n} samples, {CONFIDENCE:.0%} CI)")
+    axs[1, 1].set_xlabel("log10 ||χ(s)| − 1| (deviation from resonance)")
     axs[1, 1].set_ylabel("Nonzero digits in χ(s)")
     axs[1, 1].grid(True, alpha=0.3)
 
     plt.tight_layout()
-    plt.savefig("resonance_correlation_test.png", dpi=300)
+    plt.savefig("resonance_correlation_test.png", dpi=DPI)
     plt.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+plotting.py
+matplotlib for the figure scripts, imported only when a figure is drawn,
+and surfaces reduced to the output's pixel budget before it sees them.
+
+Importing pyplot costs about half a second, more than a cached sweep takes,
+so no module imports it at the top. The figures are only ever written to
+files, so pyplot comes up on the non-interactive Agg backend unless
+MPLBACKEND names another one.
+
+A surface never reaches matplotlib at grid resolution. MinMaxMesh is a
+sweep_stream sink that cuts the grid into blocks, two per output sample
+along each axis, and keeps the smallest and the largest value of every
+block at their own (σ, t). Extremes survive exactly, so the ||χ| - 1|
+trench at σ = 0.5 is never averaged away, and the result is a structured
+quad mesh for plot_surface (no triangulation). Rows stay in t order and
+blocks in σ order; inside a block the two samples may fold.
+
+    python plotting.py      # decimation check
+"""
+
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+BACKEND = "Agg"
+DPI = 150                  # default resolution of the saved figures
+PIXELS_PER_SAMPLE = 8      # output pixels per surface mesh sample along an axis
+
+# sigma, t, values: (rows, cols) arrays of a structured mesh
+Mesh = namedtuple("Mesh", ["sigma", "t", "values"])
+
+
+def pyplot():
+    """matplotlib.pyplot, on the Agg backend if pyplot is not loaded yet."""
+    if "matplotlib.pyplot" not in sys.modules:
+        import matplotlib
+        matplotlib.use(os.environ.get("MPLBACKEND") or BACKEND)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def mesh_samples(inches, dpi=DPI):
+    """Mesh samples along an axis drawn `inches` long at dpi (even, ≥ 2)."""
+    return max(2, int(inches * dpi / PIXELS_PER_SAMPLE) // 2 * 2)
+
+
+def _extreme_indices(values, starts):
+    """Per block of columns, the column of its min and of its max (NaN ignored)."""
+    n = values.shape[-1]
+    col = np.arange(n)
+    low = np.where(np.isnan(values), np.inf, values)
+    high = np.where(np.isnan(values), -np.inf, values)
+    sizes = np.diff(np.r_[starts, n])
+    is_min = low == np.repeat(np.minimum.reduceat(low, starts, axis=-1), sizes, axis=-1)
+    is_max = high == np.repeat(np.maximum.reduceat(high, starts, axis=-1), sizes, axis=-1)
+    first_min = np.minimum.reduceat(np.where(is_min, col, n), starts, axis=-1)
+    first_max = np.minimum.reduceat(np.where(is_max, col, n), starts, axis=-1)
+    return np.minimum(first_min, n - 1), np.minimum(first_max, n - 1)
+
+
+class MinMaxMesh:
+    """
+    Stream rows of a (t, σ) grid into a mesh of at most shape samples,
+    keeping the min and the max of every block. Axes no longer than the
+    budget are kept as they are. transform maps a chunk's |χ| rows to the
+    values meshed (default: |χ| itself).
+    """
+
+    def __init__(self, sigmas, ts, shape, transform=None):
+        from sweep_stream import bin_starts
+
+        self.sigmas = np.asarray(sigmas, dtype=float)
+        self.ts = np.asarray(ts, dtype=float)
+        self.transform = transform
+        n_t, n_sigma = len(self.ts), len(self.sigmas)
+        self.col_starts = (bin_starts(n_sigma, shape[1] // 2) if n_sigma > shape[1]
+                           else None)
+        if n_t > shape[0]:
+            starts = bin_starts(n_t, shape[0] // 2)
+            self.row_bin = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n_t]))
+        else:
+            self.row_bin = None
+        self.rows = []       # finished mesh rows as (σ, t, values)
+        self.current = None  # bin index, then (value, t, σ) of the running min and max
+
+    def _reduce_columns(self, values):
+        """(values, σ) of each row with every column block cut to its min and max."""
+        sigma = np.broadcast_to(self.sigmas, values.shape)
+        if self.col_starts is None:
+            return values, sigma
+        i_min, i_max = _extreme_indices(values, self.col_starts)
+        idx = np.empty((len(values), 2 * len(self.col_starts)), dtype=int)
+        idx[:, 0::2] = np.minimum(i_min, i_max)    # keep each pair in σ order
+        idx[:, 1::2] = np.maximum(i_min, i_max)
+        return np.take_along_axis(values, idx, axis=1), self.sigmas[idx]
+
+    def consume(self, chunk):
+        values = np.asarray(chunk.magnitude, dtype=float)
+        if self.transform is not None:
+            values = self.transform(values)
+        values, sigma = self._reduce_columns(values)
+        ts = np.asarray(chunk.ts, dtype=float)
+        if self.row_bin is None:
+            self.rows.extend(zip(sigma, np.broadcast_to(ts[:, None], values.shape), values))
+            return
+        bins = self.row_bin[chunk.start:chunk.start + len(values)]
+        edges = np.r_[np.flatnonzero(np.r_[True, np.diff(bins) != 0]), len(bins)]
+        for a, b in zip(edges[:-1], edges[1:]):
+            self._merge(bins[a], values[a:b], sigma[a:b], ts[a:b])
+
+    def _merge(self, bin_index, values, sigma, ts):
+        cols = np.arange(values.shape[1])
+        low = np.where(np.isnan(values), np.inf, values).argmin(axis=0)
+        high = np.where(np.isnan(values), -np.inf, values).argmax(axis=0)
+        new_min = [values[low, cols], ts[low], sigma[low, cols]]
+        new_max = [values[high, cols], ts[high], sigma[high, cols]]
+        if self.current is not None and self.current[0] != bin_index:
+            self._flush()
+        if self.current is None:
+            self.current = [bin_index, new_min, new_max]
+            return
+        _, cur_min, cur_max = self.current
+        # NaN compares False, so a finite value always replaces it
+        take = ~(cur_min[0] <= new_min[0])
+        take_max = ~(cur_max[0] >= new_max[0])
+        for cur, new, mask in ((cur_min, new_min, take), (cur_max, new_max, take_max)):
+            for k in range(3):
+                cur[k] = np.where(mask, new[k], cur[k])
+
+    def _flush(self):
+        _, (v_min, t_min, s_min), (v_max, t_max, s_max) = self.current
+        first = t_min <= t_max     # emit each column's pair in t order
+        self.rows.append((np.where(first, s_min, s_max), np.where(first, t_min, t_max),
+                          np.where(first, v_min, v_max)))
+        self.rows.append((np.where(first, s_max, s_min), np.where(first, t_max, t_min),
+                          np.where(first, v_max, v_min)))
+        self.current = None
+
+    def mesh(self):
+        if self.current is not None:
+            self._flush()
+        sigma, t, values = (np.array(a) for a in zip(*self.rows))
+        return Mesh(sigma, t, values)
+
+
+def grid_meshes(grid, shape, transforms):
+    """One MinMaxMesh per transform, from a single pass over a stored grid."""
+    from grid_store import load_grid
+    from sweep_stream import grid_chunks, run_pipeline
+
+    if not hasattr(grid, "magnitude"):
+        grid = load_grid(grid)
+    sinks = [MinMaxMesh(grid.sigma, grid.t, shape, tf) for tf in transforms]
+    run_pipeline(grid_chunks(grid), sinks)
+    return [sink.mesh() for sink in sinks]
+
+
+def plot_mesh(ax, mesh, **kwargs):
+    """plot_surface of a Mesh at its full resolution (no further striding)."""
+    rows, cols = mesh.values.shape
+    return ax.plot_surface(mesh.sigma, mesh.t, mesh.values, rcount=rows, ccount=cols,
+                           **kwargs)
+
+
+if __name__ == "__main__":
+    from sweep_stream import RowChunk
+
+    rng = np.random.default_rng(0)
+    sigmas = np.linspace(0.3, 0.7, 1001)
+    ts = np.linspace(10, 40, 2003)
+    values = rng.random((len(ts), len(sigmas)))
+    values[rng.random(values.shape) < 0.01] = np.nan
+    values[1234, 500] = -1.0        # a one-cell trench must survive
+    shape = (60, 40)
+    sink = MinMaxMesh(sigmas, ts, shape)
+    for start in range(0, len(ts), 97):    # chunks that straddle row bins
+        sink.consume(RowChunk(start, ts[start:start + 97], values[start:start + 97], None))
+    mesh = sink.mesh()
+    assert mesh.values.shape == shape, mesh.values.shape
+    assert np.nanmin(mesh.values) == -1.0 and np.nanmax(mesh.values) == np.nanmax(values)
+    i, j = np.unravel_index(np.nanargmin(mesh.values), shape)
+    assert (mesh.t[i, j], mesh.sigma[i, j]) == (ts[1234], sigmas[500])
+    # Rows run up in t; σ may fold inside a block but never across blocks
+    assert np.all(np.diff(mesh.t, axis=0) >= 0)
+    blocks = mesh.sigma.reshape(shape[0], -1, 2)
+    assert np.all(blocks.max(axis=2)[:, :-1] <= blocks.min(axis=2)[:, 1:])
+    print(f"{values.shape} grid → {shape} mesh: the extreme cells kept at their own (σ, t)")
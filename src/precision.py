@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+precision.py
+Working precision chosen per evaluation instead of a global mp.dps.
+
+The scripts used to set mp.dps = 100 (200 in the ζ expander) at import
+time, for values that are then cast to float. choose_dps works out the
+digits instead from the accuracy the caller asks for (rtol) and the
+digits the point loses on the way:
+
+    phase   arg Γ(1-s) and the Riemann–Siegel phase grow like t log t, so
+            an absolute phase error is t log t times the unit roundoff
+    poles   near s = n, n ≥ 1 (poles of Γ(1-s)) or n ≤ 0 even (zeros of
+            sin(πs/2)), rounding 1-s or πs/2 costs -log10 |s - n| digits
+    ζ sums  the Riemann–Siegel main sum has √(t/2π) terms of size about 1
+            that cancel down to |ζ|
+
+plus GUARD_DIGITS. Since that is a model, verify() re-evaluates a sample of
+the points VERIFY_EXTRA digits higher; if any disagrees by more than rtol,
+every point is re-evaluated at the higher precision. All evaluations run
+under mp.workdps, so modules importing each other never change each
+other's precision.
+
+    python precision.py      # chosen dps, checked against a higher precision
+"""
+
+import math
+
+import numpy as np
+from mpmath import mp
+
+import instrument
+
+DEFAULT_RTOL = 1e-13
+GUARD_DIGITS = 6
+MIN_DPS = 20
+MAX_DPS = 800
+VERIFY_FRACTION = 0.05    # share of each batch re-evaluated by verify()
+VERIFY_EXTRA = 15         # extra digits for the re-evaluation
+
+
+def rtol_digits(rtol):
+    """Decimal digits needed for a relative error of rtol."""
+    return max(1, math.ceil(-math.log10(rtol)))
+
+
+def _near_integer_loss(s, allowed):
+    """-log10 |s - n| for the integer n nearest to Re s, if allowed(n)."""
+    n = round(s.real)
+    dist = abs(s - n)
+    if not allowed(n) or dist >= 1 or dist == 0:
+        # At the point itself mpmath raises, and the caller handles that
+        return 0.0
+    return -math.log10(dist)
+
+
+def condition_digits(sigma, t, kind="chi"):
+    """Digits lost evaluating kind ("chi" or "zeta") at σ+it."""
+    s = complex(sigma, t)
+    y = abs(s.imag)
+    lost = math.log10(1 + y * math.log(2 + y))
+    if kind == "chi":
+        lost += _near_integer_loss(s, lambda n: n >= 1 or n % 2 == 0)
+    elif kind == "zeta":
+        lost += 0.5 * math.log10(1 + y / (2 * math.pi))
+        lost += _near_integer_loss(s, lambda n: n == 1)
+    else:
+        raise ValueError(f"unknown kind {kind!r}")
+    return lost
+
+
+def choose_dps(sigma, t, rtol=DEFAULT_RTOL, kind="chi"):
+    """The smallest dps expected to give kind(σ+it) to relative error rtol."""
+    dps = rtol_digits(rtol) + GUARD_DIGITS + math.ceil(condition_digits(sigma, t, kind))
+    return min(MAX_DPS, max(MIN_DPS, dps))
+
+
+def _agrees(value, reference, rtol, floor):
+    if value == reference:    # also inf == inf for poles
+        return True
+    return abs(value - reference) <= rtol * max(abs(reference), floor)
+
+
+def verify(evaluate, points, values, dps, rtol=DEFAULT_RTOL, floor=0.0,
+           fraction=VERIFY_FRACTION, extra=VERIFY_EXTRA, seed=0):
+    """
+    Check values[i] = evaluate(σ_i, t_i, dps[i]) against dps[i] + extra.
+
+    A random sample of at least one point is re-evaluated first; if any of
+    them is off by more than rtol · max(|reference|, floor), so are all the
+    others. Returns the values with every re-evaluated one replaced by its
+    reference. floor = 1 makes the test absolute for values below 1.
+    """
+    values = list(values)
+    if not values:
+        return values
+    n_sample = max(1, math.ceil(fraction * len(values)))
+    sample = np.sort(np.random.default_rng(seed).choice(len(values), n_sample,
+                                                        replace=False))
+    rest = np.setdiff1d(np.arange(len(values)), sample)
+    checked = failed = 0
+    for batch in (sample, rest):
+        for i in batch:
+            sigma, t = points[i]
+            with mp.workdps(dps[i] + extra):
+                reference = evaluate(sigma, t, dps[i] + extra)
+                checked += 1
+                if not _agrees(values[i], reference, rtol, floor):
+                    failed += 1
+            values[i] = reference
+        if not failed:
+            break
+    instrument.count("precision.verified", checked)
+    instrument.count("precision.disagreed", failed)
+    return values
+
+
+if __name__ == "__main__":
+    from chi_engine import chi
+
+    def evaluator(fn):
+        def evaluate(sigma, t, dps):
+            with mp.workdps(dps):
+                return fn(mp.mpc(sigma, t))
+        return evaluate
+
+    def error(value, reference):
+        return float(abs(value - reference) / abs(reference))
+
+    # (σ, t) from the critical strip out to large t, and near s = 1, 2, 0.
+    # ζ at the first zero height has |ζ| ≈ 1e-15, which no model foresees:
+    # its first value misses rtol and verify() has to catch it.
+    points = [(0.5, 14.134725141734694), (0.3, 1e3), (0.7, 1e6), (0.5, 1e8),
+              (1.0, 1e-6), (2.0 + 1e-9, 0.0), (1e-8, 1e-8), (-3.0, 0.5)]
+    for kind, fn in (("chi", chi), ("zeta", mp.zeta)):
+        evaluate = evaluator(fn)
+        pts = points[:4] if kind == "zeta" else points
+        for rtol in (1e-13, 1e-30):
+            dps = [choose_dps(sigma, t, rtol, kind) for sigma, t in pts]
+            values = [evaluate(sigma, t, d) for (sigma, t), d in zip(pts, dps)]
+            checked = verify(evaluate, pts, values, dps, rtol, fraction=1.0)
+            for (sigma, t), d, value, final in zip(pts, dps, values, checked):
+                with mp.workdps(2 * d + 20):
+                    reference = evaluate(sigma, t, 2 * d + 20)
+                    first, last = error(value, reference), error(final, reference)
+                print(f"{kind:<4} rtol {rtol:.0e}  σ={sigma:<12g} t={t:<10g} dps {d:>3}  "
+                      f"rel. error {first:.1e} → {last:.1e} after verify")
+                assert last <= rtol, (kind, sigma, t, rtol, last)
+    print("every verified value is within rtol of the high-precision reference")
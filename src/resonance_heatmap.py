@@ -5,13 +5,29 @@ Compute a 2D grid of |χ(s)| magnitudes over (sigma, t) and plot heatmap.
 Shows the resonance condition |χ(s)| = 1 at σ = 0.5
 """
 
+import argparse
 import csv
-from mpmath import mp, mpc, power, pi, sin, gamma
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import matplotlib.pyplot as plt
+
+import instrument
+from chi_certify import certify, summary, write_tiles
+from chi_engine import chi_grid
+from grid_store import create_grid, grid_path, open_grid_rw
+from plotting import DPI, pyplot
+from sweep_checkpoint import SweepCheckpoint, CheckpointMismatch
+from sweep_stream import (CheckpointSink, CSVSink, GridSink, PreviewRaster, RowChunk,
+                          StatsSink, grid_chunks, preview_path, run_pipeline)
+from tile_store import TileSink, create_store, open_store, store_path
 
 # ----------------- CONFIGURATION -----------------
-mp.dps = 100
+DPS = None  # mpmath digits for cells the float64 path cannot certify (None: per cell)
+BLOCKS_IN_FLIGHT = 2  # row blocks submitted ahead per worker
+BLOCK_CELLS = 1 << 16  # at most this many cells per default row block
 
 SIGMA_MIN = 0.3
 SIGMA_MAX = 0.7
@@ -22,14 +38,13 @@ T_MAX = 40.0
 T_STEP = 0.5
 
 CSV_FILENAME = "chi_magnitude_heatmap_grid.csv"
+GRID_FILENAME = grid_path(CSV_FILENAME)
+PREVIEW_FILENAME = preview_path(CSV_FILENAME)
+TILES_FILENAME = store_path(CSV_FILENAME)
 PNG_FILENAME = "chi_magnitude_heatmap.png"
+CERT_FILENAME = "chi_magnitude_heatmap_certificate.csv"
 # -------------------------------------------------
 
-def chi(s):
-    """χ(s) = 2^s · π^(s-1) · sin(πs/2) · Γ(1-s)"""
-    return (power(2, s) * power(pi, s-1) * 
-            sin(pi * s / 2) * gamma(1 - s))
-
 def frange(start, stop, step):
     x = start
     eps = step * 0.5
@@ -37,57 +52,65 @@ def frange(start, stop, step):
         yield float(x)
         x += step
 
-def main():
-    sigmas = list(frange(SIGMA_MIN, SIGMA_MAX, SIGMA_STEP))
-    ts = list(frange(T_MIN, T_MAX, T_STEP))
+def compute_rows(start, ts_chunk, sigmas, dps):
+    """Worker task: |χ| for a contiguous block of t-rows."""
+    return start, os.getpid(), chi_grid(sigmas, ts_chunk, dps=dps)
 
-    print(f"Grid size: {len(sigmas)} sigma points × {len(ts)} t points")
-    print(f"Writing CSV to {CSV_FILENAME}")
+def iter_row_blocks(sigmas, ts, workers=1, rows_per_task=None, dps=DPS,
+                    row_ranges=None):
+    """
+    Yield (start, pid, mag_rows) blocks of the grid in t order.
 
-    # Write CSV of (t, sigma, chi_magnitude, chi_deviation)
-    with open(CSV_FILENAME, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["t", "sigma", "chi_magnitude", "chi_deviation_from_1"])
+    Only the [start, stop) ranges in row_ranges are computed (default: all
+    rows). With workers > 1 the t-rows are sharded across a process pool,
+    at most BLOCKS_IN_FLIGHT per worker at a time, and each block is yielded
+    (and released) in sequence, so consumers see exactly the serial row
+    order. Default blocks hold at most BLOCK_CELLS cells, so the cells in
+    flight do not grow with the grid.
+    """
+    if row_ranges is None:
+        row_ranges = [(0, len(ts))]
+    n_rows = sum(stop - start for start, stop in row_ranges)
+    if rows_per_task is None:
+        rows_per_task = max(1, min(math.ceil(n_rows / (4 * workers)),
+                                   BLOCK_CELLS // max(len(sigmas), 1)))
+    blocks = ((start, min(start + rows_per_task, stop))
+              for range_start, stop in row_ranges
+              for start in range(range_start, stop, rows_per_task))
 
-        grid_mag = []
-        grid_dev = []
-        
-        for ti, t in enumerate(ts):
-            row_mag = []
-            row_dev = []
-            print(f"\nRow {ti+1}/{len(ts)}: t = {t:.2f}")
-            
-            for sigma in sigmas:
-                s = mpc(sigma, t)
-                chi_val = chi(s)
-                chi_mag = float(abs(chi_val))
-                chi_dev = abs(chi_mag - 1.0)
-                
-                writer.writerow([t, sigma, chi_mag, chi_dev])
-                row_mag.append(chi_mag)
-                row_dev.append(chi_dev)
-                
-                if ti % 10 == 0:  # Print sample
-                    print(f"  σ={sigma:.3f}, |χ|={chi_mag:.6f}, dev={chi_dev:.4e}")
-            
-            grid_mag.append(row_mag)
-            grid_dev.append(row_dev)
-
-    print("\nCSV written. Creating plots...")
-
-    grid_mag_arr = np.array(grid_mag)
-    grid_dev_arr = np.array(grid_dev)
-    
+    if workers <= 1:
+        for start, stop in blocks:
+            yield compute_rows(start, ts[start:stop], sigmas, dps)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for start, stop in blocks:
+            in_flight.append(pool.submit(compute_rows, start, ts[start:stop], sigmas, dps))
+            if len(in_flight) >= BLOCKS_IN_FLIGHT * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+def sweep_chunks(sigmas, ts, workers=1, rows_per_task=None, dps=DPS, row_ranges=None):
+    """iter_row_blocks as a stream of sweep_stream.RowChunk for run_pipeline."""
+    for start, pid, mag_rows in iter_row_blocks(sigmas, ts, workers, rows_per_task, dps,
+                                                row_ranges):
+        yield RowChunk(start, ts[start:start + len(mag_rows)], mag_rows, pid)
+
+def plot_heatmap(preview, path=PNG_FILENAME):
+    """Both heatmap panels from a (possibly downsampled) preview raster."""
+    plt = pyplot()
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
-    extent = [SIGMA_MIN, SIGMA_MAX, T_MIN, T_MAX]
+    extent = preview.extent
     
     # Plot 1: |χ(s)| magnitude
-    im1 = ax1.imshow(grid_mag_arr, origin="lower", aspect="auto", 
+    im1 = ax1.imshow(preview.magnitude, origin="lower", aspect="auto", 
                      extent=extent, cmap='RdYlBu_r', vmin=0.8, vmax=1.2)
     ax1.axvline(0.5, color='black', linestyle='--', linewidth=2, label='σ=0.5')
     
     # Add contour at |χ| = 1
-    contour = ax1.contour(grid_mag_arr, levels=[1.0], colors='black', 
+    contour = ax1.contour(preview.magnitude, levels=[1.0], colors='black', 
                           linewidths=3, extent=extent)
     ax1.clabel(contour, inline=True, fontsize=10)
     
@@ -97,8 +120,9 @@ def main():
     ax1.set_title(r"$|\chi(s)|$ Magnitude Heatmap", fontsize=13, fontweight='bold')
     ax1.legend()
     
-    # Plot 2: Deviation from 1 (log scale)
-    log_dev = np.log10(grid_dev_arr + 1e-10)
+    # Plot 2: Deviation from 1 (log scale); the smallest deviation in each
+    # raster block, so the resonance trench is not averaged away
+    log_dev = np.log10(preview.min_deviation + 1e-10)
     im2 = ax2.imshow(log_dev, origin="lower", aspect="auto", 
                      extent=extent, cmap='viridis')
     ax2.axvline(0.5, color='red', linestyle='--', linewidth=2, label='σ=0.5 (critical line)')
@@ -110,8 +134,105 @@ def main():
     ax2.legend()
     
     plt.tight_layout()
-    plt.savefig(PNG_FILENAME, dpi=200, bbox_inches='tight')
-    print(f"Heatmap saved to {PNG_FILENAME}")
+    with instrument.timer("heatmap.savefig"):
+        plt.savefig(path, dpi=DPI, bbox_inches='tight')
+    print(f"Heatmap saved to {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes to shard t-rows across (default: 1, serial)")
+    parser.add_argument("--rows-per-task", type=int, default=None,
+                        help="t-rows per worker task (default: ~4 tasks per worker, "
+                             f"at most {BLOCK_CELLS} cells each)")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue from {GRID_FILENAME}.ckpt.json, skipping finished rows")
+    parser.add_argument("--no-csv", dest="csv", action="store_false",
+                        help=f"write only the binary {GRID_FILENAME}, not the CSV export")
+    parser.add_argument("--tiles", action="store_true",
+                        help=f"also write the tiled store {TILES_FILENAME} with its "
+                             "pyramid (tile_store.py render draws any zoom from it)")
+    parser.add_argument("--certify", action="store_true",
+                        help=f"also prove the sign of |χ| - 1 on the whole rectangle, "
+                             f"between the grid nodes too, into {CERT_FILENAME}")
+    args = parser.parse_args(argv)
+
+    sigmas = list(frange(SIGMA_MIN, SIGMA_MAX, SIGMA_STEP))
+    ts = list(frange(T_MIN, T_MAX, T_STEP))
+
+    print(f"Grid size: {len(sigmas)} sigma points × {len(ts)} t points")
+    print(f"Writing {GRID_FILENAME}" + (f" and {CSV_FILENAME}" if args.csv else "")
+          + f" ({args.workers} worker(s))")
+
+    rows_by_worker = {}
+
+    checkpoint = SweepCheckpoint(GRID_FILENAME, {
+        "script": "resonance_heatmap",
+        "sigma": [SIGMA_MIN, SIGMA_MAX, SIGMA_STEP],
+        "t": [T_MIN, T_MAX, T_STEP],
+        "dps": DPS,
+        "csv": args.csv,
+    })
+    try:
+        resumed = checkpoint.start(args.resume)
+        if resumed:
+            grid_mag_arr = open_grid_rw(GRID_FILENAME)
+            print(f"Resuming: {checkpoint.rows_done()}/{len(ts)} rows already in {GRID_FILENAME}")
+        else:
+            grid_mag_arr = create_grid(GRID_FILENAME, sigmas, ts, dps=DPS,
+                                       script="resonance_heatmap")
+        f = checkpoint.open_csv(CSV_FILENAME) if args.csv else None
+    except (CheckpointMismatch, FileNotFoundError) as e:
+        raise SystemExit(f"Refusing to resume: {e}")
+
+    # Binary grid rows are filled in place; the CSV of
+    # (t, sigma, chi_magnitude, chi_deviation) is an optional export
+    writer = csv.writer(f) if f else None
+    if writer and checkpoint.csv_bytes == 0:
+        writer.writerow(["t", "sigma", "chi_magnitude", "chi_deviation_from_1"])
+
+    # Statistics and the preview raster see every row: on resume the
+    # finished rows are replayed from the grid first
+    stats = StatsSink()
+    raster = PreviewRaster(sigmas, ts)
+    aggregates = [stats, raster]
+    if args.tiles:
+        tiles = (open_store(TILES_FILENAME) if resumed and os.path.isdir(TILES_FILENAME)
+                 else create_store(TILES_FILENAME, sigmas, ts, dps=DPS,
+                                   script="resonance_heatmap"))
+        aggregates.append(TileSink(tiles))
+    if resumed:
+        run_pipeline(grid_chunks(GRID_FILENAME, checkpoint.done), aggregates)
+
+    def report(chunk):
+        stop = chunk.start + len(chunk.magnitude)
+        rows_by_worker[chunk.pid] = rows_by_worker.get(chunk.pid, 0) + len(chunk.magnitude)
+        print(f"  [worker {chunk.pid}] rows {chunk.start+1}–{stop}/{len(ts)} "
+              f"(t = {ts[chunk.start]:.2f}–{ts[stop-1]:.2f}), "
+              f"{rows_by_worker[chunk.pid]} rows from this worker")
+
+    sinks = [GridSink(grid_mag_arr)] + ([CSVSink(writer, sigmas)] if writer else [])
+    sinks += [CheckpointSink(checkpoint, f)] + aggregates + [report]
+    chunks = sweep_chunks(sigmas, ts, args.workers, args.rows_per_task, DPS,
+                          row_ranges=checkpoint.pending(len(ts)))
+    run_pipeline(chunks, sinks)
+
+    if f:
+        f.close()
+    checkpoint.finish()
+    raster.save(PREVIEW_FILENAME)
+    if args.tiles:
+        print(f"Tiled store {TILES_FILENAME}: {tiles.build_pyramid()} pyramid levels")
+    print(f"\nGrid written: {stats.summary()}")
+    if args.certify:
+        with instrument.timer("heatmap.certify"):
+            tiles = certify((SIGMA_MIN, SIGMA_MAX), (T_MIN, T_MAX))
+        write_tiles(CERT_FILENAME, tiles)
+        print(f"Certified: {summary(tiles)} → {CERT_FILENAME}")
+    print(f"Preview raster {raster.preview().magnitude.shape} → {PREVIEW_FILENAME}. "
+          "Creating plots...")
+    with instrument.timer("heatmap.plot"):
+        plot_heatmap(raster.preview())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
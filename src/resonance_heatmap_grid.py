@@ -2,61 +2,118 @@
 """
 chi_magnitude_surface.py
 Create 3D surface plot of |χ(s)| showing resonance at σ=0.5
+
+Grids (the binary .chigrid, or a CSV whose points form a full grid) are
+streamed into min/max-decimated meshes sized to the figure's pixels
+(plotting.MinMaxMesh) and drawn with plot_surface, so the figure costs
+the same for any grid size and the σ = 0.5 trench is kept. Scattered
+meshes such as adaptive_contour.py's output are triangulated as before.
 """
 
+import argparse
+import os
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
 
-# Load CSV grid
-print("Loading data from chi_magnitude_heatmap_grid.csv...")
-data = np.genfromtxt('chi_magnitude_heatmap_grid.csv', delimiter=',', 
-                     skip_header=1, names=['t', 'sigma', 'chi_mag', 'chi_dev'])
+import instrument
+from grid_store import ChiGrid, grid_path
+from plotting import DPI, grid_meshes, mesh_samples, plot_mesh, pyplot
+
+CSV_FILE = 'chi_magnitude_heatmap_grid.csv'
+PNG_FILE = 'chi_magnitude_surface.png'
+FIGSIZE = (16, 6)
+# (t, σ) mesh samples per panel: one per PIXELS_PER_SAMPLE pixels of a half-width panel
+SURFACE_SHAPE = (mesh_samples(FIGSIZE[1]), mesh_samples(FIGSIZE[0] / 2))
+
+def log_deviation(magnitude):
+    return np.log10(np.abs(magnitude - 1.0) + 1e-10)
+
+def regular_grid(data):
+    """The CSV points as a ChiGrid if they cover a full σ × t grid, else None."""
+    sigmas, ts = np.unique(data['sigma']), np.unique(data['t'])
+    if len(sigmas) * len(ts) != len(data):
+        return None
+    order = np.lexsort((data['sigma'], data['t']))
+    return ChiGrid(sigmas, ts, data['chi_mag'][order].reshape(len(ts), len(sigmas)), {})
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--input", default=CSV_FILE,
+                        help="grid CSV (or its .chigrid), or a scattered mesh such as "
+                             "adaptive_contour.py's output")
+    parser.add_argument("--output", default=PNG_FILE)
+    args = parser.parse_args(argv)
+
+    with instrument.timer("surface.load"):
+        if os.path.isdir(grid_path(args.input)):
+            # Binary grid: streamed from the memmap
+            print(f"Loading data from {grid_path(args.input)}...")
+            grid, data = args.input, None
+        else:
+            print(f"Loading data from {args.input}...")
+            data = np.genfromtxt(args.input, delimiter=',', 
+                                 skip_header=1, names=['t', 'sigma', 'chi_mag', 'chi_dev'])
+            grid = regular_grid(data)
+        if grid is not None:
+            mag_mesh, dev_mesh = grid_meshes(grid, SURFACE_SHAPE, [None, log_deviation])
+            sigmas, ts = mag_mesh.sigma, mag_mesh.t
+
+    if grid is None:
+        sigmas = data['sigma']
+        ts = data['t']
+        chi_mags = data['chi_mag']
 
-sigmas = data['sigma']
-ts = data['t']
-chi_mags = data['chi_mag']
+    # Create figure with two subplots
+    plt = pyplot()
+    fig = plt.figure(figsize=FIGSIZE)
 
-# Create figure with two subplots
-fig = plt.figure(figsize=(16, 6))
+    # Plot 1: |χ(s)| surface
+    ax1 = fig.add_subplot(121, projection='3d')
+    with instrument.timer("surface.plot"):
+        if grid is not None:
+            surf1 = plot_mesh(ax1, mag_mesh, cmap='RdYlBu_r', linewidth=0, alpha=0.8)
+        else:
+            surf1 = ax1.plot_trisurf(sigmas, ts, chi_mags, cmap='RdYlBu_r', 
+                                     linewidth=0.1, alpha=0.8)
 
-# Plot 1: |χ(s)| surface
-ax1 = fig.add_subplot(121, projection='3d')
-surf1 = ax1.plot_trisurf(sigmas, ts, chi_mags, cmap='RdYlBu_r', 
-                         linewidth=0.1, alpha=0.8)
+    # Add plane at |χ| = 1
+    sigma_range = np.linspace(sigmas.min(), sigmas.max(), 50)
+    t_range = np.linspace(ts.min(), ts.max(), 50)
+    S, T = np.meshgrid(sigma_range, t_range)
+    Z_plane = np.ones_like(S)
 
-# Add plane at |χ| = 1
-sigma_range = np.linspace(sigmas.min(), sigmas.max(), 50)
-t_range = np.linspace(ts.min(), ts.max(), 50)
-S, T = np.meshgrid(sigma_range, t_range)
-Z_plane = np.ones_like(S)
+    ax1.plot_surface(S, T, Z_plane, alpha=0.3, color='red', label='|χ|=1')
 
-ax1.plot_surface(S, T, Z_plane, alpha=0.3, color='red', label='|χ|=1')
+    ax1.set_xlabel(r'$\sigma = \Re(s)$', fontsize=11)
+    ax1.set_ylabel(r'$t = \Im(s)$', fontsize=11)
+    ax1.set_zlabel(r'$|\chi(s)|$', fontsize=11)
+    ax1.set_title(r'$|\chi(s)|$ Surface', fontsize=13, fontweight='bold')
+    ax1.view_init(elev=25, azim=45)
 
-ax1.set_xlabel(r'$\sigma = \Re(s)$', fontsize=11)
-ax1.set_ylabel(r'$t = \Im(s)$', fontsize=11)
-ax1.set_zlabel(r'$|\chi(s)|$', fontsize=11)
-ax1.set_title(r'$|\chi(s)|$ Surface', fontsize=13, fontweight='bold')
-ax1.view_init(elev=25, azim=45)
+    fig.colorbar(surf1, ax=ax1, shrink=0.5, label='|χ(s)|')
 
-fig.colorbar(surf1, ax=ax1, shrink=0.5, label='|χ(s)|')
+    # Plot 2: Deviation from 1 (log scale)
+    ax2 = fig.add_subplot(122, projection='3d')
 
-# Plot 2: Deviation from 1 (log scale)
-ax2 = fig.add_subplot(122, projection='3d')
-log_dev = np.log10(data['chi_dev'] + 1e-10)
+    with instrument.timer("surface.plot"):
+        if grid is not None:
+            surf2 = plot_mesh(ax2, dev_mesh, cmap='viridis', linewidth=0, alpha=0.8)
+        else:
+            log_dev = log_deviation(chi_mags)
+            surf2 = ax2.plot_trisurf(sigmas, ts, log_dev, cmap='viridis', 
+                                     linewidth=0.1, alpha=0.8)
 
-surf2 = ax2.plot_trisurf(sigmas, ts, log_dev, cmap='viridis', 
-                         linewidth=0.1, alpha=0.8)
+    ax2.set_xlabel(r'$\sigma = \Re(s)$', fontsize=11)
+    ax2.set_ylabel(r'$t = \Im(s)$', fontsize=11)
+    ax2.set_zlabel(r'$\log_{10}(||χ| - 1|)$', fontsize=11)
+    ax2.set_title('Deviation from Resonance', fontsize=13, fontweight='bold')
+    ax2.view_init(elev=25, azim=45)
 
-ax2.set_xlabel(r'$\sigma = \Re(s)$', fontsize=11)
-ax2.set_ylabel(r'$t = \Im(s)$', fontsize=11)
-ax2.set_zlabel(r'$\log_{10}(||χ| - 1|)$', fontsize=11)
-ax2.set_title('Deviation from Resonance', fontsize=13, fontweight='bold')
-ax2.view_init(elev=25, azim=45)
+    fig.colorbar(surf2, ax=ax2, shrink=0.5, label=r'$\log_{10}$ deviation')
 
-fig.colorbar(surf2, ax=ax2, shrink=0.5, label=r'$\log_{10}$ deviation')
+    plt.tight_layout()
+    with instrument.timer("surface.savefig"):
+        plt.savefig(args.output, dpi=DPI, bbox_inches='tight')
+    print(f"Saved: {args.output}")
 
-plt.tight_layout()
-plt.savefig('chi_magnitude_surface.png', dpi=250, bbox_inches='tight')
-print("Saved: chi_magnitude_surface.png")
-plt.show()
+if __name__ == "__main__":
+    main()
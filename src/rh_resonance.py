@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+rh_resonance.py
+One command-line entry point for the sweeps, figures and tools.
+
+    python rh_resonance.py <command> [options]
+    python rh_resonance.py heatmap --workers 8
+    python rh_resonance.py expand 0.5 14.134725
+
+Every command is the main(argv) of one script in this directory, imported
+only when the command runs, so `--help` and fully cached builds start
+without loading numpy, mpmath or matplotlib. Figures are drawn on the
+headless Agg backend (plotting.py).
+"""
+
+import argparse
+import importlib
+import os
+import sys
+
+# command → (module, help); each module has main(argv)
+COMMANDS = {
+    "sweep": ("chi_resonance_sweep", "|χ| across σ at the zero heights (--roots: solve)"),
+    "heatmap": ("resonance_heatmap", "|χ| over a (σ, t) grid, with its heatmap"),
+    "surface": ("resonance_heatmap_grid", "3D surface of the heatmap grid"),
+    "tiles": ("tile_store", "tiled grids with pyramids: compute, render, info"),
+    "resonance": ("plot_chi_resonance", "|χ| against σ from the sweep grid"),
+    "spiral": ("plot_base_half_i_spiral", "powers of (1/2)i as a spiral"),
+    "correlation": ("plot_resonance_correlation_test", "|χ| - 1 against digit counts"),
+    "stats": ("chi_resonance_test", "correlation of |χ| - 1 with digit counts, bootstrap CIs"),
+    "expand": ("zeta_base_half_i_expander", "ζ(s) in base (1/2)i: one point, --batch or --serve"),
+    "roots": ("chi_roots", "σ* with |χ(σ*+it)| = 1 for a batch of t"),
+    "contour": ("adaptive_contour", "adaptive mesh around |χ| = 1"),
+    "certify": ("chi_certify", "prove the sign of |χ| - 1 on whole (σ, t) tiles"),
+    "surrogate": ("chi_surrogate", "Chebyshev tables of log|χ| and arg χ: build, check, info"),
+    "zeros": ("zero_table", "compute or cache heights of the zeta zeros"),
+    "build": ("build_pipeline", "incremental rebuild of every CSV, grid and figure"),
+    "bench": ("benchmarks", "kernel and end-to-end timings"),
+}
+
+
+def main(argv=None):
+    width = max(map(len, COMMANDS))
+    parser = argparse.ArgumentParser(
+        prog="rh_resonance.py", description=__doc__.strip().splitlines()[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {name:<{width}}  {text}"
+                                         for name, (_, text) in COMMANDS.items())
+               + "\n\nRun `rh_resonance.py <command> --help` for its options.")
+    parser.add_argument("command", choices=COMMANDS, metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    if src_dir not in sys.path:
+        sys.path.insert(0, src_dir)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    module_name, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    # The command's own parser names itself after sys.argv[0]
+    prog = sys.argv[0]
+    sys.argv[0] = f"{os.path.basename(prog)} {args.command}"
+    try:
+        return module.main(args.args) or 0
+    finally:
+        sys.argv[0] = prog
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+sweep_checkpoint.py
+Checkpoint/resume bookkeeping for long χ grid sweeps.
+
+A sweep writes its output in whole t-row tiles. After each tile is flushed
+to disk the sidecar <output>.ckpt.json records which rows are finished
+(and, if a CSV is written, how many CSV bytes they occupy), together with
+a fingerprint of the sweep parameters (axes, dps, ...). On --resume the
+CSV is truncated back to the last recorded tile, and only the missing rows
+are computed and appended. A checkpoint written for different parameters
+is refused.
+"""
+
+import hashlib
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointMismatch(RuntimeError):
+    """The checkpoint on disk was written for a different sweep."""
+
+
+def fingerprint_digest(fingerprint):
+    blob = json.dumps(fingerprint, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def merge_ranges(ranges):
+    """Merge overlapping/adjacent [start, stop) ranges."""
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return merged
+
+
+class SweepCheckpoint:
+    """Tracks finished row tiles of one sweep."""
+
+    def __init__(self, output_path, fingerprint):
+        self.path = output_path + ".ckpt.json"
+        self.fingerprint = dict(fingerprint, checkpoint_version=CHECKPOINT_VERSION)
+        self.digest = fingerprint_digest(self.fingerprint)
+        self.done = []
+        self.csv_bytes = 0
+        self.complete = False
+
+    def start(self, resume):
+        """
+        Load the checkpoint if resuming; return True if there is one.
+
+        Without resume (or without a checkpoint) any stale checkpoint is
+        removed and the sweep starts from scratch.
+        """
+        if resume and os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            if (state.get("digest") != self.digest
+                    or state.get("fingerprint") != self.fingerprint):
+                raise CheckpointMismatch(
+                    f"{self.path} was written for different sweep parameters:\n"
+                    f"  checkpoint: {state.get('fingerprint')}\n"
+                    f"  this run:   {self.fingerprint}\n"
+                    "Delete the checkpoint or rerun without --resume.")
+            self.done = merge_ranges(state["done"])
+            self.csv_bytes = state["csv_bytes"]
+            self.complete = state.get("complete", False)
+            return True
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.done = []
+        self.csv_bytes = 0
+        self.complete = False
+        return False
+
+    def open_csv(self, csv_path):
+        """
+        Open the sweep CSV for writing.
+
+        When resuming, the CSV is truncated to the last checkpointed byte
+        (dropping any partly written tile) and positioned for appending;
+        otherwise it is recreated. Write the header only if csv_bytes == 0.
+        """
+        if self.csv_bytes == 0:
+            return open(csv_path, "w", newline="")
+
+        size = os.path.getsize(csv_path) if os.path.exists(csv_path) else -1
+        if size < self.csv_bytes:
+            raise CheckpointMismatch(
+                f"{csv_path} is shorter than its checkpoint "
+                f"({size} < {self.csv_bytes} bytes)")
+        f = open(csv_path, "r+", newline="")
+        f.truncate(self.csv_bytes)
+        f.seek(self.csv_bytes)
+        return f
+
+    def rows_done(self):
+        return sum(stop - start for start, stop in self.done)
+
+    def pending(self, n_rows):
+        """[start, stop) row ranges not yet in the checkpoint."""
+        missing = []
+        cursor = 0
+        for start, stop in self.done:
+            if start > cursor:
+                missing.append((cursor, start))
+            cursor = max(cursor, stop)
+        if cursor < n_rows:
+            missing.append((cursor, n_rows))
+        return missing
+
+    def mark_done(self, start, stop, csv_file=None):
+        """
+        Record rows [start, stop) once they are durably written.
+
+        Callers flush their other outputs first; the CSV (if any) is
+        flushed and fsynced here so its byte length can be recorded.
+        """
+        if csv_file is not None:
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
+            self.csv_bytes = csv_file.tell()
+        self.done = merge_ranges(self.done + [[start, stop]])
+        self._save()
+
+    def finish(self):
+        self.complete = True
+        self._save()
+
+    def _save(self):
+        state = {
+            "digest": self.digest,
+            "fingerprint": self.fingerprint,
+            "done": self.done,
+            "csv_bytes": self.csv_bytes,
+            "complete": self.complete,
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f, indent=1)
+        os.replace(tmp, self.path)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+sweep_stream.py
+Streaming pipeline for (σ, t) sweeps: evaluate → write → aggregate.
+
+A sweep is a generator of RowChunk blocks of whole t-rows in t order
+(resonance_heatmap.sweep_chunks computes them; grid_chunks replays a
+stored grid). run_pipeline hands every chunk to a list of sinks, each of
+which keeps only constant-size state:
+
+    GridSink        rows into a .chigrid memmap
+    CSVSink         rows into the long-form CSV export
+    CheckpointSink  marks rows done in a SweepCheckpoint (put it last)
+    StatsSink       running min/max of |χ| and a histogram of log10 ||χ|-1|
+    PreviewRaster   block-downsampled raster (mean |χ|, min ||χ|-1| per
+                    block), saved as <grid>.preview.npz for the figures
+
+so a sweep of any size never holds more than one chunk of the grid.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+import instrument
+from grid_store import grid_path, load_grid, write_csv_rows
+
+PREVIEW_SHAPE = (1024, 1024)     # (t rows, σ columns) of a preview raster
+HIST_EDGES = np.linspace(-16.0, 1.0, 69)    # log10 ||χ| - 1| bins
+CHUNK_ROWS = 256                 # rows per chunk when replaying a stored grid
+
+# start: first row index; ts: the chunk's t values; magnitude: |χ| array
+# (len(ts), len(σ)); pid: process that computed it (None for replays)
+RowChunk = namedtuple("RowChunk", ["start", "ts", "magnitude", "pid"])
+
+Preview = namedtuple("Preview", ["sigma", "t", "magnitude", "min_deviation",
+                                 "shape", "extent"])
+
+
+def run_pipeline(chunks, sinks):
+    """Feed every chunk to every sink in order; return the rows consumed."""
+    consumers = [getattr(s, "consume", s) for s in sinks]
+    if instrument.ENABLED:
+        return _run_timed(iter(chunks), sinks, consumers)
+    rows = 0
+    for chunk in chunks:
+        for consume in consumers:
+            consume(chunk)
+        rows += len(chunk.magnitude)
+    return rows
+
+
+def _run_timed(chunks, sinks, consumers):
+    """run_pipeline with the producer and every sink timed separately."""
+    names = [f"pipeline.{type(s).__name__ if hasattr(s, 'consume') else s.__name__}"
+             for s in sinks]
+    rows = 0
+    while True:
+        with instrument.timer("pipeline.evaluate"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return rows
+        for name, consume in zip(names, consumers):
+            with instrument.timer(name):
+                consume(chunk)
+        rows += len(chunk.magnitude)
+        instrument.count("pipeline.rows", len(chunk.magnitude))
+
+
+def grid_chunks(grid, row_ranges=None, rows=CHUNK_ROWS):
+    """Replay rows of a stored grid (a ChiGrid or path) as RowChunks."""
+    if not hasattr(grid, "magnitude"):
+        grid = load_grid(grid)
+    if row_ranges is None:
+        row_ranges = [(0, len(grid.t))]
+    for range_start, range_stop in row_ranges:
+        for start in range(range_start, range_stop, rows):
+            stop = min(start + rows, range_stop)
+            yield RowChunk(start, grid.t[start:stop], np.asarray(grid.magnitude[start:stop]),
+                           None)
+
+
+class GridSink:
+    """Write rows into a writable grid memmap, flushing each chunk."""
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def consume(self, chunk):
+        self.grid[chunk.start:chunk.start + len(chunk.magnitude)] = chunk.magnitude
+        self.grid.flush()
+
+
+class CSVSink:
+    """Append rows to a csv.writer in the long-form export layout."""
+
+    def __init__(self, writer, sigmas):
+        self.writer = writer
+        self.sigmas = list(sigmas)
+
+    def consume(self, chunk):
+        write_csv_rows(self.writer, list(chunk.ts), self.sigmas, chunk.magnitude)
+
+
+class CheckpointSink:
+    """Record finished rows; must come after the sinks that write them."""
+
+    def __init__(self, checkpoint, csv_file=None):
+        self.checkpoint = checkpoint
+        self.csv_file = csv_file
+
+    def consume(self, chunk):
+        self.checkpoint.mark_done(chunk.start, chunk.start + len(chunk.magnitude),
+                                  self.csv_file)
+
+
+class StatsSink:
+    """Running extremes of |χ| and a histogram of log10 ||χ| - 1|."""
+
+    def __init__(self, edges=HIST_EDGES):
+        self.edges = edges
+        self.counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        self.cells = 0
+        self.missing = 0
+        self.min_magnitude = np.inf
+        self.max_magnitude = -np.inf
+        self.min_deviation = np.inf
+
+    def consume(self, chunk):
+        mag = np.asarray(chunk.magnitude, dtype=float)
+        finite = mag[np.isfinite(mag)]
+        self.cells += mag.size
+        self.missing += mag.size - finite.size
+        if not finite.size:
+            return
+        dev = np.abs(finite - 1.0)
+        self.min_magnitude = min(self.min_magnitude, float(finite.min()))
+        self.max_magnitude = max(self.max_magnitude, float(finite.max()))
+        self.min_deviation = min(self.min_deviation, float(dev.min()))
+        # Exact hits and anything off either end land in the end bins
+        log_dev = np.clip(np.log10(np.maximum(dev, 1e-300)), self.edges[0], self.edges[-1])
+        self.counts += np.histogram(log_dev, self.edges)[0]
+
+    def summary(self):
+        return (f"{self.cells} cells ({self.missing} missing): |χ| ∈ "
+                f"[{self.min_magnitude:.6f}, {self.max_magnitude:.6f}], "
+                f"min ||χ|-1| = {self.min_deviation:.3e}")
+
+
+def bin_starts(n, bins):
+    """First index of each of `bins` near-equal contiguous blocks of range(n)."""
+    return np.unique((np.arange(bins) * n + bins - 1) // bins)
+
+
+class PreviewRaster:
+    """
+    Downsample the grid into at most `shape` blocks as rows stream past.
+
+    Each block keeps the mean |χ| and the minimum ||χ| - 1| of its cells,
+    so the |χ| = 1 trench survives downsampling. Grids no larger than
+    `shape` are kept at full resolution.
+    """
+
+    def __init__(self, sigmas, ts, shape=PREVIEW_SHAPE):
+        sigmas = np.asarray(sigmas, dtype=float)
+        ts = np.asarray(ts, dtype=float)
+        self.n_t, self.n_sigma = len(ts), len(sigmas)
+        self.row_starts = bin_starts(self.n_t, min(shape[0], self.n_t))
+        self.col_starts = bin_starts(self.n_sigma, min(shape[1], self.n_sigma))
+        # Bin index of every row (rows arrive in chunks that may split a bin)
+        self.row_bin = np.repeat(np.arange(len(self.row_starts)),
+                                 np.diff(np.r_[self.row_starts, self.n_t]))
+        col_sizes = np.diff(np.r_[self.col_starts, self.n_sigma])
+        row_sizes = np.diff(np.r_[self.row_starts, self.n_t])
+        self.sigma = np.add.reduceat(sigmas, self.col_starts) / col_sizes
+        self.t = np.add.reduceat(ts, self.row_starts) / row_sizes
+        self.extent = [float(sigmas.min()), float(sigmas.max()),
+                       float(ts.min()), float(ts.max())]
+        shape = (len(self.row_starts), len(self.col_starts))
+        self.total = np.zeros(shape)
+        self.count = np.zeros(shape, dtype=np.int64)
+        self.min_dev = np.full(shape, np.inf)
+
+    def consume(self, chunk):
+        mag = np.asarray(chunk.magnitude, dtype=float)
+        finite = np.isfinite(mag)
+        dev = np.where(finite, np.abs(mag - 1.0), np.inf)
+        # Reduce over column blocks, then over the runs of rows sharing a bin
+        total = np.add.reduceat(np.where(finite, mag, 0.0), self.col_starts, axis=1)
+        count = np.add.reduceat(finite.astype(np.int64), self.col_starts, axis=1)
+        min_dev = np.minimum.reduceat(dev, self.col_starts, axis=1)
+
+        bins = self.row_bin[chunk.start:chunk.start + len(mag)]
+        runs = np.flatnonzero(np.r_[True, np.diff(bins) != 0])
+        rows = bins[runs]
+        self.total[rows] += np.add.reduceat(total, runs, axis=0)
+        self.count[rows] += np.add.reduceat(count, runs, axis=0)
+        self.min_dev[rows] = np.minimum(self.min_dev[rows],
+                                        np.minimum.reduceat(min_dev, runs, axis=0))
+
+    def preview(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            magnitude = np.where(self.count > 0, self.total / self.count, np.nan)
+        min_dev = np.where(np.isfinite(self.min_dev), self.min_dev, np.nan)
+        return Preview(self.sigma, self.t, magnitude, min_dev,
+                       (self.n_t, self.n_sigma), self.extent)
+
+    def save(self, path):
+        p = self.preview()
+        np.savez(path, sigma=p.sigma, t=p.t, magnitude=p.magnitude,
+                 min_deviation=p.min_deviation, shape=p.shape, extent=p.extent)
+        return path
+
+
+def preview_path(name):
+    """'chi_magnitude_heatmap_grid.csv' → 'chi_magnitude_heatmap_grid.preview.npz'."""
+    return os.path.splitext(grid_path(name))[0] + ".preview.npz"
+
+
+def load_preview(path):
+    with np.load(path) as f:
+        return Preview(f["sigma"], f["t"], f["magnitude"], f["min_deviation"],
+                       tuple(int(n) for n in f["shape"]), [float(x) for x in f["extent"]])
+
+
+def preview_from_grid(grid, shape=PREVIEW_SHAPE):
+    """Downsample a stored grid by streaming it through a PreviewRaster."""
+    if not hasattr(grid, "magnitude"):
+        grid = load_grid(grid)
+    raster = PreviewRaster(grid.sigma, grid.t, shape)
+    run_pipeline(grid_chunks(grid), [raster])
+    return raster.preview()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+tile_store.py
+Tiled (σ, t) store for |χ| grids too large for one array, with a pyramid.
+
+A store is a directory <name>.chitiles/ holding
+
+    meta.json       format version, shape, tile size, pyramid levels, ...
+    sigma.npy       σ axis (level 0)
+    t.npy           t axis (level 0)
+    0/<i>.<j>.npy   float64 |χ| tile i (t) × j (σ), TILE cells or fewer at the edges
+    k/<i>.<j>.npy   float64 (2, rows, cols) for pyramid level k ≥ 1: mean |χ| and
+                    min ||χ| - 1| over 2^k × 2^k blocks of level 0
+
+Every tile is its own file, written to a temporary name and renamed into
+place, so any number of processes can fill tiles independently; a tile
+that does not exist yet reads as NaN. read() fetches any rectangle of any
+level by loading only the tiles it overlaps. Each pyramid level halves
+both axes (its values combine the 2 × 2 blocks of the level below, a NaN
+counting as no data) until the whole grid fits in one tile, so view()
+renders any window at any zoom from at most a screenful of cells.
+
+    python tile_store.py compute big.chitiles --sigma 0.3 0.7 4001 \\
+        --t 10 1e6 1000000 --workers 8
+    python tile_store.py render big.chitiles zoom.png --t 1e5 1.001e5
+    python tile_store.py info big.chitiles
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+FORMAT_VERSION = 1
+STORE_SUFFIX = ".chitiles"
+TILE = (256, 256)           # (t rows, σ columns) per tile
+VIEW_SHAPE = (1024, 1024)   # most (t, σ) cells view() returns
+
+
+def store_path(name):
+    """'chi_magnitude_heatmap_grid.csv' → 'chi_magnitude_heatmap_grid.chitiles'."""
+    base, ext = os.path.splitext(name)
+    if ext == STORE_SUFFIX:
+        return name
+    return (base if ext in (".csv", ".chigrid") else name) + STORE_SUFFIX
+
+
+def _halve_axis(x):
+    """Pairwise means of an axis; a lone last value is kept."""
+    if len(x) % 2:
+        x = np.append(x, x[-1])
+    return x.reshape(-1, 2).mean(axis=1)
+
+
+def downsample(magnitude, min_deviation):
+    """One pyramid step: 2 × 2 blocks → (mean |χ|, min ||χ| - 1|), NaN = no data."""
+    pad = [(0, magnitude.shape[0] % 2), (0, magnitude.shape[1] % 2)]
+    mag = np.pad(magnitude, pad, constant_values=np.nan)
+    dev = np.pad(min_deviation, pad, constant_values=np.nan)
+    rows, cols = mag.shape[0] // 2, mag.shape[1] // 2
+    mag = mag.reshape(rows, 2, cols, 2)
+    dev = dev.reshape(rows, 2, cols, 2)
+    finite = np.isfinite(mag)
+    count = finite.sum(axis=(1, 3))
+    with np.errstate(invalid="ignore"):
+        mean = np.where(finite, mag, 0.0).sum(axis=(1, 3)) / count
+    low = np.where(np.isfinite(dev), dev, np.inf).min(axis=(1, 3))
+    return mean, np.where(np.isfinite(low), low, np.nan)
+
+
+class TileStore:
+    """A .chitiles directory: tile I/O, rectangle reads and the pyramid."""
+
+    def __init__(self, path):
+        self.path = store_path(path)
+        with open(os.path.join(self.path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"{self.path}: tile format v{self.meta['version']} is newer "
+                             f"than this reader (v{FORMAT_VERSION})")
+        self.tile = tuple(self.meta["tile"])
+        self.sigma = np.load(os.path.join(self.path, "sigma.npy"), mmap_mode="r")
+        self.t = np.load(os.path.join(self.path, "t.npy"), mmap_mode="r")
+        self.shape = (len(self.t), len(self.sigma))
+
+    @property
+    def levels(self):
+        """Levels present: 1 + pyramid levels built so far."""
+        return self.meta.get("levels", 1)
+
+    def level_shape(self, level):
+        return tuple(-(-n // 2**level) for n in self.shape)
+
+    def tile_counts(self, level=0):
+        """(tile rows, tile columns) at a level."""
+        return tuple(-(-n // size) for n, size in zip(self.level_shape(level), self.tile))
+
+    def tile_bounds(self, i, j, level=0):
+        """(row start, row stop, column start, column stop) of tile (i, j)."""
+        rows, cols = self.level_shape(level)
+        return (i * self.tile[0], min((i + 1) * self.tile[0], rows),
+                j * self.tile[1], min((j + 1) * self.tile[1], cols))
+
+    def tile_file(self, i, j, level=0):
+        return os.path.join(self.path, str(level), f"{i}.{j}.npy")
+
+    def has_tile(self, i, j, level=0):
+        return os.path.exists(self.tile_file(i, j, level))
+
+    def missing_tiles(self, level=0):
+        rows, cols = self.tile_counts(level)
+        return [(i, j) for i in range(rows) for j in range(cols)
+                if not self.has_tile(i, j, level)]
+
+    def write_tile(self, i, j, data, level=0):
+        """Store one tile atomically (safe with concurrent writers)."""
+        r0, r1, c0, c1 = self.tile_bounds(i, j, level)
+        data = np.asarray(data, dtype=np.float64)
+        expected = (r1 - r0, c1 - c0) if level == 0 else (2, r1 - r0, c1 - c0)
+        if data.shape != expected:
+            raise ValueError(f"tile ({i}, {j}) at level {level} must have shape "
+                             f"{expected}, got {data.shape}")
+        path = self.tile_file(i, j, level)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, data)
+        os.replace(tmp, path)
+
+    def axes(self, level=0):
+        """(σ, t) axes of a level: block means of the level-0 axes."""
+        sigma, t = np.asarray(self.sigma), np.asarray(self.t)
+        for _ in range(level):
+            sigma, t = _halve_axis(sigma), _halve_axis(t)
+        return sigma, t
+
+    def read(self, rows=None, cols=None, level=0):
+        """
+        (|χ|, min ||χ| - 1|) over rows × cols ((start, stop) pairs in the
+        level's own cells; default everything). Only the tiles that overlap
+        the rectangle are opened, and missing tiles read as NaN.
+        """
+        n_rows, n_cols = self.level_shape(level)
+        r0, r1 = rows or (0, n_rows)
+        c0, c1 = cols or (0, n_cols)
+        r0, r1, c0, c1 = max(r0, 0), min(r1, n_rows), max(c0, 0), min(c1, n_cols)
+        magnitude = np.full((max(r1 - r0, 0), max(c1 - c0, 0)), np.nan)
+        min_dev = np.full_like(magnitude, np.nan)
+        th, tw = self.tile
+        for i in range(r0 // th, -(-r1 // th)):
+            for j in range(c0 // tw, -(-c1 // tw)):
+                if not self.has_tile(i, j, level):
+                    continue
+                tr0, tr1, tc0, tc1 = self.tile_bounds(i, j, level)
+                a0, a1, b0, b1 = max(r0, tr0), min(r1, tr1), max(c0, tc0), min(c1, tc1)
+                data = np.load(self.tile_file(i, j, level), mmap_mode="r")
+                src = (slice(a0 - tr0, a1 - tr0), slice(b0 - tc0, b1 - tc0))
+                dst = (slice(a0 - r0, a1 - r0), slice(b0 - c0, b1 - c0))
+                if level == 0:
+                    magnitude[dst] = data[src]
+                    min_dev[dst] = np.abs(data[src] - 1.0)
+                else:
+                    magnitude[dst] = data[0][src]
+                    min_dev[dst] = data[1][src]
+        return magnitude, min_dev
+
+    def build_pyramid(self):
+        """(Re)build every level above 0; each tile reads 2 × 2 tiles below it."""
+        level = 0
+        while any(n > size for n, size in zip(self.level_shape(level), self.tile)):
+            level += 1
+            os.makedirs(os.path.join(self.path, str(level)), exist_ok=True)
+            rows, cols = self.tile_counts(level)
+            for i in range(rows):
+                for j in range(cols):
+                    r0, r1, c0, c1 = self.tile_bounds(i, j, level)
+                    below = self.read((2 * r0, 2 * r1), (2 * c0, 2 * c1), level - 1)
+                    self.write_tile(i, j, np.stack(downsample(*below)), level)
+        self.meta["levels"] = level + 1
+        _write_meta(self.path, self.meta)
+        return self.levels
+
+    def view(self, sigma_range=None, t_range=None, shape=VIEW_SHAPE):
+        """
+        The window σ × t as a sweep_stream.Preview of at most `shape` cells,
+        read from the finest pyramid level that is small enough and, past
+        the coarsest level built, reduced further in memory the same way.
+        """
+        from sweep_stream import Preview
+
+        sigma0, t0 = np.asarray(self.sigma), np.asarray(self.t)
+        lo, hi = sigma_range or (sigma0[0], sigma0[-1])
+        c0, c1 = np.searchsorted(sigma0, lo), np.searchsorted(sigma0, hi, side="right")
+        lo, hi = t_range or (t0[0], t0[-1])
+        r0, r1 = np.searchsorted(t0, lo), np.searchsorted(t0, hi, side="right")
+        if r1 <= r0 or c1 <= c0:
+            raise ValueError("empty window")
+        for level in range(self.levels):
+            k = 2**level
+            rows, cols = (r0 // k, -(-r1 // k)), (c0 // k, -(-c1 // k))
+            if rows[1] - rows[0] <= shape[0] and cols[1] - cols[0] <= shape[1]:
+                break
+        magnitude, min_dev = self.read(rows, cols, level)
+        sigma, t = self.axes(level)
+        sigma, t = sigma[cols[0]:cols[1]], t[rows[0]:rows[1]]
+        while magnitude.shape[0] > shape[0] or magnitude.shape[1] > shape[1]:
+            magnitude, min_dev = downsample(magnitude, min_dev)
+            sigma, t = _halve_axis(sigma), _halve_axis(t)
+        return Preview(sigma, t, magnitude, min_dev, (int(r1 - r0), int(c1 - c0)),
+                       [float(sigma0[c0]), float(sigma0[c1 - 1]),
+                        float(t0[r0]), float(t0[r1 - 1])])
+
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+
+
+def create_store(path, sigmas, ts, tile=TILE, **meta):
+    """Create an empty store (no tiles yet) and return it."""
+    path = store_path(path)
+    os.makedirs(os.path.join(path, "0"), exist_ok=True)
+    sigmas = np.asarray(sigmas, dtype=float)
+    ts = np.asarray(ts, dtype=float)
+    np.save(os.path.join(path, "sigma.npy"), sigmas)
+    np.save(os.path.join(path, "t.npy"), ts)
+    _write_meta(path, dict(meta, version=FORMAT_VERSION, shape=[len(ts), len(sigmas)],
+                           tile=list(tile), levels=1))
+    return TileStore(path)
+
+
+def open_store(path):
+    return TileStore(path)
+
+
+class TileSink:
+    """
+    sweep_stream sink: gathers streamed t-rows into bands one tile high and
+    writes a band's tiles as soon as all of its rows have arrived.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.bands = {}    # tile row → [rows array, rows filled]
+
+    def consume(self, chunk):
+        th = self.store.tile[0]
+        mag = np.asarray(chunk.magnitude, dtype=float)
+        start = chunk.start
+        while len(mag):
+            i = start // th
+            r0, r1, _, _ = self.store.tile_bounds(i, 0)
+            take = min(r1 - start, len(mag))
+            band = self.bands.setdefault(i, [np.full((r1 - r0, self.store.shape[1]), np.nan), 0])
+            band[0][start - r0:start - r0 + take] = mag[:take]
+            band[1] += take
+            if band[1] >= r1 - r0:
+                self._write_band(i, band[0])
+                del self.bands[i]
+            start += take
+            mag = mag[take:]
+
+    def _write_band(self, i, rows):
+        for j in range(self.store.tile_counts()[1]):
+            _, _, c0, c1 = self.store.tile_bounds(i, j)
+            self.store.write_tile(i, j, rows[:, c0:c1])
+
+
+def _compute_tile(path, i, j, dps):
+    """Worker task: evaluate and write one level-0 tile."""
+    from chi_engine import chi_grid
+
+    store = TileStore(path)
+    r0, r1, c0, c1 = store.tile_bounds(i, j)
+    store.write_tile(i, j, chi_grid(store.sigma[c0:c1], store.t[r0:r1], dps=dps))
+    return i, j
+
+
+def compute_tiles(store, workers=1, dps=None, progress=None):
+    """Evaluate every missing level-0 tile, in a process pool if workers > 1."""
+    todo = store.missing_tiles()
+    if workers <= 1:
+        for done, (i, j) in enumerate(todo, 1):
+            _compute_tile(store.path, i, j, dps)
+            if progress:
+                progress(done, len(todo))
+        return len(todo)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_compute_tile, store.path, i, j, dps) for i, j in todo]
+        for done, future in enumerate(as_completed(futures), 1):
+            future.result()
+            if progress:
+                progress(done, len(todo))
+    return len(todo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    sub = parser.add_subparsers(dest="action", required=True)
+    compute = sub.add_parser("compute", help="fill the missing tiles, then the pyramid")
+    compute.add_argument("store")
+    compute.add_argument("--sigma", nargs=3, type=float, metavar=("MIN", "MAX", "COUNT"),
+                         default=(0.3, 0.7, 401))
+    compute.add_argument("--t", nargs=3, type=float, metavar=("MIN", "MAX", "COUNT"),
+                         default=(10.0, 40.0, 3001))
+    compute.add_argument("--tile", nargs=2, type=int, metavar=("ROWS", "COLS"),
+                         default=TILE)
+    compute.add_argument("--workers", type=int, default=1)
+    render = sub.add_parser("render", help="heatmap of a window at any zoom")
+    render.add_argument("store")
+    render.add_argument("output")
+    render.add_argument("--sigma", nargs=2, type=float, metavar=("MIN", "MAX"))
+    render.add_argument("--t", nargs=2, type=float, metavar=("MIN", "MAX"))
+    render.add_argument("--shape", nargs=2, type=int, metavar=("ROWS", "COLS"),
+                        default=VIEW_SHAPE)
+    info = sub.add_parser("info", help="shape, tiles present and pyramid levels")
+    info.add_argument("store")
+    args = parser.parse_args(argv)
+
+    if args.action == "compute":
+        sigmas = np.linspace(args.sigma[0], args.sigma[1], int(args.sigma[2]))
+        ts = np.linspace(args.t[0], args.t[1], int(args.t[2]))
+        if os.path.exists(os.path.join(store_path(args.store), "meta.json")):
+            store = open_store(args.store)
+            if not (np.array_equal(store.sigma, sigmas) and np.array_equal(store.t, ts)
+                    and store.tile == tuple(args.tile)):
+                raise SystemExit(f"Refusing to resume: {store.path} has other axes or tiles")
+        else:
+            store = create_store(args.store, sigmas, ts, tuple(args.tile),
+                                 script="tile_store")
+        total = store.tile_counts()[0] * store.tile_counts()[1]
+        print(f"{store.path}: {store.shape[0]} × {store.shape[1]} cells, "
+              f"{len(store.missing_tiles())}/{total} tiles to compute ({args.workers} worker(s))")
+
+        def progress(done, todo):
+            if done == todo or done % max(1, todo // 20) == 0:
+                print(f"  {done}/{todo} tiles")
+
+        compute_tiles(store, args.workers, progress=progress)
+        print(f"Pyramid: {store.build_pyramid()} levels")
+    elif args.action == "render":
+        from resonance_heatmap import plot_heatmap
+
+        store = open_store(args.store)
+        preview = store.view(args.sigma, args.t, tuple(args.shape))
+        print(f"Window {preview.shape[0]} × {preview.shape[1]} cells drawn from "
+              f"{preview.magnitude.shape[0]} × {preview.magnitude.shape[1]}")
+        plot_heatmap(preview, args.output)
+    else:
+        store = open_store(args.store)
+        rows, cols = store.tile_counts()
+        print(f"{store.path}: {store.shape[0]} t × {store.shape[1]} σ, tiles {store.tile}, "
+              f"{rows * cols - len(store.missing_tiles())}/{rows * cols} computed, "
+              f"{store.levels} level(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
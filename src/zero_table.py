@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+zero_table.py
+Heights γ_n of the nontrivial zeros ρ_n = 1/2 + iγ_n of ζ(s).
+
+Zeros come either from a local zero list or from the on-disk table, which
+is extended on demand with mpmath's zetazero(n) across a process pool.
+
+Zero lists are plain text with one zero per line, either "γ" or "n γ";
+blank lines and '#' comments are skipped and .gz files are read
+transparently. This covers Odlyzko's tables (e.g. zeros1, the first
+100,000 zeros). Lists are parsed as a stream, so even very large files
+never have to fit in memory.
+
+The table is stored as such a list in "n γ" form, with ZERO_DPS digits,
+at $RH_RESONANCE_ZEROS (default ~/.cache/rh_resonance/zeros.txt). It is
+append-only, so an interrupted computation resumes where it stopped.
+
+Usage:
+    python zero_table.py 1000 --workers 8      # compute/cache the first 1000 zeros
+    python zero_table.py 100000 --source zeros1
+"""
+
+import argparse
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from mpmath import mp, zetazero
+
+ZERO_DPS = 30
+CHUNK = 32      # zeros per worker task
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rh_resonance",
+                            "zeros.txt")
+
+
+def table_path():
+    return os.environ.get("RH_RESONANCE_ZEROS", DEFAULT_PATH)
+
+
+def iter_zero_file(path, limit=None, table=False):
+    """
+    Stream (n, γ text) pairs from a zero list, in file order.
+
+    With table=True (the append-only table) a last line without a newline
+    is a write that was cut short and is ignored.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    count = 0
+    n = 0
+    with opener(path, "rt") as f:
+        for line in f:
+            if limit is not None and count >= limit:
+                return
+            if table and not line.endswith("\n"):
+                return
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            n = int(fields[0]) if len(fields) > 1 else n + 1
+            count += 1
+            yield n, fields[-1]
+
+
+def _compute_chunk(start, stop, dps):
+    """Worker task: γ_n for n in [start, stop) as text with dps digits."""
+    with mp.workdps(dps):
+        return start, [mp.nstr(zetazero(n).imag, dps, strip_zeros=False)
+                       for n in range(start, stop)]
+
+
+def compute_zeros(start, stop, dps=ZERO_DPS, workers=1):
+    """
+    Yield (n, γ text) for n in [start, stop) in order.
+
+    With workers > 1 chunks of CHUNK zeros run in a process pool and are
+    yielded in sequence as soon as each next chunk is ready.
+    """
+    chunks = [(a, min(a + CHUNK, stop)) for a in range(start, stop, CHUNK)]
+    if workers <= 1:
+        for a, b in chunks:
+            _, heights = _compute_chunk(a, b, dps)
+            yield from zip(range(a, b), heights)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_compute_chunk, a, b, dps) for a, b in chunks]
+        pending = {}
+        next_start = start
+        for future in as_completed(futures):
+            a, heights = future.result()
+            pending[a] = heights
+            while next_start in pending:
+                heights = pending.pop(next_start)
+                yield from zip(range(next_start, next_start + len(heights)), heights)
+                next_start += len(heights)
+
+
+def _truncate_partial_line(path):
+    """Drop an unterminated last line so appends start on a fresh line."""
+    with open(path, "rb+") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size == 0:
+            return
+        f.seek(max(0, size - 4096))
+        tail = f.read()
+        if tail.endswith(b"\n"):
+            return
+        cut = tail.rfind(b"\n")
+        f.truncate(size - len(tail) + cut + 1 if cut >= 0 else 0)
+
+
+def zero_heights(count, source=None, workers=1, path=None, verbose=True):
+    """
+    float64 array of γ_1 .. γ_count.
+
+    With source, the zeros are streamed from that zero list. Otherwise
+    they come from the on-disk table, computing and appending any that
+    are missing.
+    """
+    if source is not None:
+        heights = np.fromiter((float(g) for _, g in iter_zero_file(source, count)),
+                              dtype=float, count=-1)
+        if len(heights) < count:
+            raise ValueError(f"{source} has only {len(heights)} zeros, {count} requested")
+        return heights
+
+    path = path or table_path()
+    heights = []
+    if os.path.exists(path):
+        heights = [float(g) for _, g in iter_zero_file(path, count, table=True)]
+    if len(heights) >= count:
+        return np.array(heights)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path):
+        _truncate_partial_line(path)
+    start = len(heights) + 1
+    if verbose:
+        print(f"Computing zeros {start}..{count} with zetazero "
+              f"({workers} worker{'s' if workers != 1 else ''}) → {path}")
+    t0 = time.perf_counter()
+    with open(path, "a") as f:
+        for n, g in compute_zeros(start, count + 1, ZERO_DPS, workers):
+            f.write(f"{n} {g}\n")
+            heights.append(float(g))
+            if n % CHUNK == 0 or n == count:
+                f.flush()
+                if verbose and n % (CHUNK * 32) == 0:
+                    print(f"  γ_{n} = {g}  ({time.perf_counter() - t0:.1f}s)")
+    return np.array(heights)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute, cache or check zeta zero heights.")
+    parser.add_argument("count", type=int, help="number of zeros")
+    parser.add_argument("--source", help="zero list to read instead of the cached table")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for zetazero (default: all cores)")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    try:
+        heights = zero_heights(args.count, args.source, args.workers)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"{len(heights)} zeros in {time.perf_counter() - t0:.2f}s from "
+          f"{args.source or table_path()}: γ_1 = {heights[0]:.9f}, "
+          f"γ_{len(heights)} = {heights[-1]:.9f}")
+    if np.any(np.diff(heights) <= 0):
+        raise SystemExit("Zero heights are not strictly increasing")
+
+
+if __name__ == "__main__":
+    main()
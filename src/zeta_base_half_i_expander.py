@@ -1,50 +1,329 @@
 # zeta_base_half_i_expander_v4.py
-from mpmath import mp, zeta
+"""
+Expand ζ(s) in base (1/2)i: one point at a prompt, a batch, or a local service.
 
-mp.dps = 200
+    python zeta_base_half_i_expander.py 0.5 14.134725
+    python zeta_base_half_i_expander.py --batch points.jsonl --workers 8 > out.jsonl
+    python zeta_base_half_i_expander.py --batch - --format csv < points.csv
+    python zeta_base_half_i_expander.py --serve --workers 4
 
-def base_half_i_expansion_continuous(z, max_terms=50, tolerance=1e-80):
-    """
-    Expand complex z in base (1/2)i using continuous complex coefficients.
-    This fixes the rounding bug in v3 by computing exact coefficients.
-    """
-    base_inv = 2j  # inverse of (1/2)i
-    coefficients = []
-    residual = mp.mpc(z)
+Batch input is one point per line, either JSON ({"sigma": 0.5, "t": 14.1},
+any other keys are copied to the output) or CSV (sigma,t or sigma t; a
+header line is skipped). Points are expanded in a process pool, at most
+WINDOW per worker in flight, and written in input order as they finish,
+one compact JSON object (or CSV row) per point: the working dps, ζ(s) and
+every coefficient to the requested digits, and the final |residual|.
+
+The service listens on 127.0.0.1 and speaks the same JSON, one request per
+line and one answer per line, in order. Identical requests in flight share
+one evaluation, and the last SERVICE_CACHE_SIZE answers are kept already
+encoded, so a repeated point is answered without touching mpmath.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import signal
+import socket
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 
-    for k in range(max_terms):
-        if abs(residual) < tolerance:
-            break
-        power_val = base_inv ** k
-        coeff = residual / power_val  # continuous coefficient
-        coefficients.append(coeff)
-        residual -= coeff * power_val
+from mpmath import mp
 
-    return coefficients, residual
+import instrument
+from base_half_i_expansion import base_half_i_expansion
+from eval_cache import zeta_cached
+from precision import choose_dps
 
+OUTPUT_DIGITS = 200
+WINDOW = 16                   # points in flight per batch worker
+SERVICE_PORT = 8765
+SERVICE_CACHE_SIZE = 4096     # encoded answers kept by the service
 
-def run_zeta_expansion():
+CSV_FIELDS = ["sigma", "t", "dps", "n_terms", "residual", "zeta_re", "zeta_im",
+              "coefficients", "error"]
+
+def run_zeta_expansion(real_part=None, imag_part=None):
     print("Zeta Expansion (Base 1/2i, Continuous Coefficients, 200-digit precision)")
 
+    if real_part is None or imag_part is None:
+        try:
+            real_part = float(input("Enter the real part of s: "))
+            imag_part = float(input("Enter the imaginary part of s: "))
+        except ValueError:
+            print("Invalid input. Please enter numeric values.")
+            return
+
+    # Enough digits for OUTPUT_DIGITS correct ones at this point, not a global
+    dps = choose_dps(real_part, imag_part, 10.0 ** -OUTPUT_DIGITS, "zeta")
+    with mp.workdps(dps):
+        s = mp.mpc(real_part, imag_part)
+        z_val = zeta_cached(real_part, imag_part, dps)
+        print(f"\nζ({s}) = {mp.nstr(z_val, OUTPUT_DIGITS)}")
+
+        coeffs, residual = base_half_i_expansion(z_val)
+        mags = [abs(c) for c in coeffs]
+
+        print("\nContinuous coefficient magnitudes (first 10 terms):")
+        print(mags[:10])
+        print(f"\nFinal residual = {residual}")
+        print(f"Collapsed to zero? {'Yes' if abs(residual) < 1e-40 else 'No'}")
+
+
+def expand_point(sigma, t, digits=OUTPUT_DIGITS):
+    """ζ(σ+it) and its expansion as a JSON-ready dict, values as digit strings."""
+    try:
+        if digits < 1:
+            raise ValueError(f"digits must be at least 1, got {digits}")
+        dps = choose_dps(sigma, t, 10.0 ** -digits, "zeta")
+        with mp.workdps(dps):
+            z_val = zeta_cached(sigma, t, dps)
+            coeffs, residual = base_half_i_expansion(z_val)
+            pair = lambda z: [mp.nstr(z.real, digits), mp.nstr(z.imag, digits)]
+            return {"sigma": sigma, "t": t, "dps": dps, "zeta": pair(z_val),
+                    "coefficients": [pair(c) for c in coeffs],
+                    "residual": float(abs(residual))}
+    except (ArithmeticError, ValueError) as e:
+        # ζ's pole at s = 1, a point too far out for the precision model, ...
+        return {"sigma": sigma, "t": t, "error": f"{type(e).__name__}: {e}"}
+
+
+def encode(record):
+    return json.dumps(record, separators=(",", ":"))
+
+
+def _ignore_interrupt():
+    """Pool initializer: Ctrl-C stops the parent, which then shuts the pool down."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _expand_line(sigma, t, digits):
+    """expand_point, encoded in the worker so the service only forwards text."""
+    return encode(expand_point(sigma, t, digits)) + "\n"
+
+
+def parse_point(line):
+    """A point request from one JSON or CSV line, or None for a header/blank line."""
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        request = json.loads(line)
+        request["sigma"], request["t"] = float(request["sigma"]), float(request["t"])
+        return request
+    fields = line.replace(",", " ").split()
     try:
-        real_part = float(input("Enter the real part of s: "))
-        imag_part = float(input("Enter the imaginary part of s: "))
-    except ValueError:
-        print("Invalid input. Please enter numeric values.")
+        return {"sigma": float(fields[0]), "t": float(fields[1])}
+    except (ValueError, IndexError):
+        if fields and fields[0].lower() in ("sigma", "re", "real"):
+            return None
+        raise ValueError(f"not a point: {line!r}")
+
+
+def read_points(lines):
+    for line in lines:
+        request = parse_point(line)
+        if request is not None:
+            yield request
+
+
+def expand_batch(requests, digits=OUTPUT_DIGITS, workers=1):
+    """
+    Expand a stream of point requests, yielding results in input order.
+
+    Request keys other than sigma, t and digits are copied to the result.
+    With workers > 1 at most WINDOW·workers points are in flight, so an
+    unbounded stdin stream is never read ahead of the output.
+    """
+    def merged(request, result):
+        extra = {k: v for k, v in request.items() if k not in result and k != "digits"}
+        return {**extra, **result}
+
+    if workers <= 1:
+        for request in requests:
+            yield merged(request, expand_point(request["sigma"], request["t"],
+                                               int(request.get("digits", digits))))
         return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for request in requests:
+            in_flight.append((request, pool.submit(expand_point, request["sigma"], request["t"],
+                                                   int(request.get("digits", digits)))))
+            if len(in_flight) >= WINDOW * workers:
+                request, future = in_flight.popleft()
+                yield merged(request, future.result())
+        while in_flight:
+            request, future = in_flight.popleft()
+            yield merged(request, future.result())
+
+
+def write_jsonl(records, f):
+    n = 0
+    for n, record in enumerate(records, 1):
+        f.write(encode(record) + "\n")
+    return n
+
+
+def write_csv(records, f):
+    w = csv.DictWriter(f, CSV_FIELDS, extrasaction="ignore", lineterminator="\n")
+    w.writeheader()
+    n = 0
+    for n, record in enumerate(records, 1):
+        row = dict(record)
+        if "zeta" in record:
+            row["zeta_re"], row["zeta_im"] = record["zeta"]
+            row["n_terms"] = len(record["coefficients"])
+            # re im pairs, one per coefficient, ';'-separated
+            row["coefficients"] = ";".join(" ".join(c) for c in record["coefficients"])
+        w.writerow(row)
+    return n
+
+
+class ExpansionService:
+    """
+    Answer JSON point requests from a process pool, coalescing duplicates
+    and keeping the last cache_size encoded answers.
+    """
+
+    def __init__(self, workers=1, digits=OUTPUT_DIGITS, cache_size=SERVICE_CACHE_SIZE):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_interrupt)
+        self.digits = digits
+        self.cache_size = cache_size
+        self.cache = OrderedDict()    # (σ, t, digits) → answer line
+        self.pending = {}             # (σ, t, digits) → future of the answer line
+
+    async def answer(self, request):
+        key = (request["sigma"], request["t"], int(request.get("digits", self.digits)))
+        line = self.cache.get(key)
+        if line is not None:
+            self.cache.move_to_end(key)
+            if instrument.ENABLED:
+                instrument.count("service.hits")
+            return line
+        future = self.pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.pool, _expand_line, *key)
+            self.pending[key] = future
+            future.add_done_callback(lambda f, key=key: self._finished(key, f))
+            if instrument.ENABLED:
+                instrument.count("service.misses")
+        elif instrument.ENABLED:
+            instrument.count("service.coalesced")
+        # Shielded: a client hanging up must not cancel a shared evaluation
+        return await asyncio.shield(future)
 
-    s = mp.mpc(real_part, imag_part)
-    z_val = zeta(s)
-    print(f"\nζ({s}) = {z_val}")
+    def _finished(self, key, future):
+        del self.pending[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache[key] = future.result()
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
 
-    coeffs, residual = base_half_i_expansion_continuous(z_val)
-    mags = [abs(c) for c in coeffs]
+    async def respond(self, raw):
+        try:
+            request = parse_point(raw.decode())
+            if request is None:
+                raise ValueError("empty request")
+            line = await self.answer(request)
+        except (ValueError, KeyError, TypeError) as e:
+            return (encode({"error": f"{type(e).__name__}: {e}"}) + "\n").encode()
+        if "id" in request:
+            line = '{"id":' + json.dumps(request["id"]) + "," + line[1:]
+        return line.encode()
 
-    print("\nContinuous coefficient magnitudes (first 10 terms):")
-    print(mags[:10])
-    print(f"\nFinal residual = {residual}")
-    print(f"Collapsed to zero? {'Yes' if abs(residual) < 1e-40 else 'No'}")
+    async def handle(self, reader, writer):
+        """Answer every line of a connection, in order, while later ones compute."""
+        answers = asyncio.Queue()
+
+        async def send():
+            while True:
+                task = await answers.get()
+                if task is None:
+                    return
+                writer.write(await task)
+                await writer.drain()
+
+        sender = asyncio.create_task(send())
+        try:
+            async for raw in reader:
+                if raw.strip():
+                    answers.put_nowait(asyncio.create_task(self.respond(raw)))
+        finally:
+            answers.put_nowait(None)
+            try:
+                await sender
+            except ConnectionError:
+                pass
+            writer.close()
+
+    async def serve(self, port=SERVICE_PORT, ready=None):
+        # Start the workers before the first connection: a worker forked
+        # later would hold that client's socket open after it is answered
+        await asyncio.get_running_loop().run_in_executor(self.pool, int)
+        server = await asyncio.start_server(self.handle, "127.0.0.1", port)
+        if ready:
+            ready(server.sockets[0].getsockname()[1])
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def query(requests, port=SERVICE_PORT):
+    """Send point requests (dicts) to a running service; return the answers."""
+    with socket.create_connection(("127.0.0.1", port)) as conn:
+        conn.sendall("".join(encode(r) + "\n" for r in requests).encode())
+        conn.shutdown(socket.SHUT_WR)
+        with conn.makefile("r") as f:
+            return [json.loads(line) for line in f]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Expand ζ(s) in base (1/2)i; "
+                                                 "prompts for s when it is not given.")
+    parser.add_argument("sigma", type=float, nargs="?", help="real part of s")
+    parser.add_argument("t", type=float, nargs="?", help="imaginary part of s")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="expand every point in FILE (JSONL or CSV; - for stdin)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl",
+                        help="batch output format (default: jsonl)")
+    parser.add_argument("--output", default="-", help="batch output file (default: stdout)")
+    parser.add_argument("--serve", action="store_true",
+                        help=f"answer JSON requests on 127.0.0.1 (--port, default {SERVICE_PORT})")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--digits", type=int, default=OUTPUT_DIGITS,
+                        help=f"correct digits of ζ(s) and the coefficients (default: {OUTPUT_DIGITS})")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        service = ExpansionService(args.workers, args.digits)
+        ready = lambda port: print(f"Expanding on 127.0.0.1:{port} "
+                                   f"({args.workers} worker(s)); Ctrl-C stops", file=sys.stderr)
+        try:
+            asyncio.run(service.serve(args.port, ready))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+        return
+    if args.batch:
+        source = sys.stdin if args.batch == "-" else open(args.batch)
+        sink = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+        try:
+            records = expand_batch(read_points(source), args.digits, args.workers)
+            n = (write_csv if args.format == "csv" else write_jsonl)(records, sink)
+        finally:
+            for f in (source, sink):
+                if f not in (sys.stdin, sys.stdout):
+                    f.close()
+        print(f"{n} point(s) expanded"
+              + (f" → {args.output}" if args.output != "-" else ""), file=sys.stderr)
+        return
+    run_zeta_expansion(args.sigma, args.t)
 
 
 if __name__ == "__main__":
-    run_zeta_expansion()
+    main()
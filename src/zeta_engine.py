@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+zeta_engine.py
+Batch ζ(σ+it) for many t on a line (or grid) of fixed σ.
+
+Points with large enough t use the Riemann–Siegel formula in the form of
+Arias de Reyna (the one mpmath uses off the critical line),
+
+    ζ(s) = R(σ, t) + χ(s) · conj(R(1-σ, t)),
+    R(σ, t) = Σ_{n<=N} n^(-σ-it) + (-1)^(N-1) U a^(-σ) Σ_{k<L} C_k(σ, p) / a^k,
+
+with a = √(t/2π), N = ⌊a⌋, p = 1 - 2(a - N). Everything that does not
+depend on t (ln n, the Taylor coefficients of F, the C_k polynomials in σ)
+is computed once per batch. The Dirichlet sums are evaluated as arrays over
+all t; on a uniform t grid they are instead computed for all t at once by a
+non-uniform FFT (Gaussian gridding), in the spirit of Odlyzko–Schönhage.
+Phases t·ln n and θ(t) are reduced mod 2π in extended precision.
+
+Every value carries an error estimate (RS truncation plus rounding). Points
+whose estimate exceeds atol·max(|ζ|, 1) (atol is absolute next to a zero,
+relative elsewhere, as in precision.verify), or where the formula is not
+valid (small t), are recomputed with mpmath at dps, as chi_grid does (by
+default at the dps precision.py picks for atol, verified on a sample).
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+from mpmath import mp
+
+import instrument
+from eval_cache import zeta_cached
+from precision import choose_dps, verify
+
+DEFAULT_ATOL = 1e-10
+DEFAULT_DPS = None    # None: choose_dps per escalated point
+
+L_MAX = 12          # most Riemann–Siegel correction terms used
+F_TERMS = 50        # Taylor terms (in z²) of F(z), enough for F^(3·L_MAX)
+
+# Uniform t grids with at least this many points per block of constant N,
+# and at least this many Dirichlet terms, use the NUFFT
+FFT_MIN_POINTS = 256
+FFT_MIN_TERMS = 32
+FFT_OVERSAMPLE = 2
+NUFFT_FLOOR = 256 * np.finfo(float).eps    # rounding floor of nufft_sums (~100 ulp measured)
+
+BLOCK_ELEMENTS = 1 << 20    # t × n elements per chunk of the direct sums
+PHASE_LIMIT = 6.0 * 2**32   # t·ln n up to which _phase reduces mod 2π exactly
+
+EPS = np.finfo(float).eps
+EPS_LD = np.finfo(np.longdouble).eps
+TWO_PI_LD = np.longdouble("6.2831853071795864769252867665590057684")
+PI_LD = TWO_PI_LD / 2
+LOG_PI_LD = np.log(PI_LD)
+
+
+@lru_cache(maxsize=None)
+def _f_taylor():
+    """
+    Taylor coefficients c_n (n < 2·F_TERMS) of
+    F(z) = (e^(iπ(z²/2 + 3/8)) - i√2 cos(πz/2)) / (2 cos πz).
+
+    The sums below cancel heavily (c_n falls to ~1e-100 at n = 100), so
+    they are done at well above the precision of the result.
+    """
+    with mp.workdps(40 + 2 * F_TERMS):
+        v = [(-1)**n * mp.eulernum(2*n) / mp.fac(2*n) * mp.pi**(2*n)
+             for n in range(F_TERMS + 1)]
+        w = [mp.pi**n / (mp.fac(n) * 2**n) for n in range(2*F_TERMS + 1)]
+        c = np.zeros(2*F_TERMS, dtype=complex)
+        for n in range(F_TERMS):
+            p1 = (-1)**(n+1) * mp.j * sum((-1)**k * v[k] * w[2*n - 2*k] for k in range(n+1))
+            p2 = sum(mp.j**(n-k) * v[k] * w[n-k] for k in range(n+1))
+            c[2*n] = complex(mp.sqrt(2) / 2 * p1 + mp.expjpi(mp.mpf(3) / 8) / 2 * p2)
+    return c
+
+
+@lru_cache(maxsize=None)
+def _f_derivative_poly(m):
+    """Coefficients (highest first, for np.polyval) of the m-th derivative of F."""
+    c = _f_taylor()
+    n = np.arange(m, len(c))
+    falling = np.array([math.perm(int(k), m) for k in n], dtype=float)
+    return (c[m:] * falling)[::-1]
+
+
+@lru_cache(maxsize=None)
+def rs_coefficients(sigma, n_terms):
+    """
+    d[k][ℓ] of the k-th Riemann–Siegel correction at σ, for k < n_terms.
+
+    The k-th correction is Σ_ℓ d[k][ℓ] F^(3k-2ℓ)(p) / (π^(2k-ℓ) (2i)^ℓ).
+    """
+    with mp.workdps(30):
+        ps = 1 - 2 * mp.mpf(sigma)
+        d = [[mp.mpf(1)]]
+        for n in range(1, n_terms):
+            prev = d[-1]
+            get = lambda k: prev[k] if 0 <= k < len(prev) else 0
+            row = []
+            for k in range(3*n // 2 + 1):
+                m = 3*n - 2*k
+                if m:
+                    row.append(-(m + 1) * get(k - 2) + get(k) / (4*m) + ps * get(k - 1) / (2*m))
+                else:
+                    row.append(-sum((-1)**(k - r) * row[r] * mp.fac(2*k - 2*r) / mp.fac(k - r)
+                                    for r in range(k)))
+            d.append(row)
+        return tuple(tuple(float(x) for x in row) for row in d)
+
+
+def rs_truncation_bound(sigma, a, n_terms):
+    """Arias de Reyna's bound on R(σ, t) after n_terms corrections (t >> 1)."""
+    if sigma > 0:
+        b, c = 2.0, 9.0**sigma / 4.44288
+    else:
+        b, c = 2.25158, 2.0**(-sigma) / 4.44288
+    return 3 * c * math.gamma(n_terms / 2) * (b * a)**(-n_terms) * a**(-sigma)
+
+
+def rs_valid(sigma, a, n_terms):
+    """Conditions under which the bound above holds."""
+    return ((3*n_terms < 2*a*a / 25) & (abs(sigma) <= a / 2)
+            & (abs(1 - sigma) <= a / 2) & (3*n_terms + 2 + min(sigma, 1 - sigma) >= 0))
+
+
+def _round_bits(x, bits):
+    """mpf x rounded to `bits` significant bits."""
+    m, e = mp.frexp(x)
+    return mp.ldexp(mp.nint(mp.ldexp(m, bits)), e - bits)
+
+
+def _to_ld(x):
+    """mpf x as the nearest long double (from two float64 parts)."""
+    a = float(x)
+    return np.longdouble(a) + np.longdouble(float(x - a))
+
+
+def _two_pi_parts():
+    """2π = C1 + C2 + C3, C1 and C2 with 32 significant bits (k·C exact for k < 2^32)."""
+    with mp.workdps(60):
+        two_pi = 2 * mp.pi
+        c1 = _round_bits(two_pi, 32)
+        c2 = _round_bits(two_pi - c1, 32)
+        return np.longdouble(float(c1)), np.longdouble(float(c2)), _to_ld(two_pi - c1 - c2)
+
+
+TWO_PI_1, TWO_PI_2, TWO_PI_3 = _two_pi_parts()
+
+
+@lru_cache(maxsize=None)
+def _log_parts(size):
+    """ln n for n = 1..size as long doubles hi + lo, hi with 11 significant bits."""
+    with mp.workdps(40):
+        logs = [mp.log(n) for n in range(1, size + 1)]
+        hi = [_round_bits(x, 11) if x else x for x in logs]
+        return (np.array([float(h) for h in hi], dtype=np.longdouble),
+                np.array([_to_ld(x - h) for x, h in zip(logs, hi)], dtype=np.longdouble))
+
+
+def log_table(big_n):
+    """(hi, lo) of ln n for n = 1..big_n, from a cached power-of-two table."""
+    hi, lo = _log_parts(1 << max(int(big_n - 1).bit_length(), 4))
+    return hi[:big_n], lo[:big_n]
+
+
+def _phase(t_ld, hi, lo):
+    """
+    (t·ln n) mod 2π as float64 (in [-π, π] up to rounding), ln n = hi + lo
+    from log_table, for t·ln n < PHASE_LIMIT.
+
+    With t = t_hi + t_lo, t_hi a float64, t_hi·hi is exact in long double
+    and so is taking k·C1 off it; everything else is of size
+    t·ln n / 2^11 or below. The error is at most EPS_LD·(t·ln n / 512 + 16),
+    where rounding t·ln n directly would cost up to EPS_LD·t·ln n.
+    """
+    t_hi = t_ld.astype(float).astype(np.longdouble)
+    big = t_hi * hi
+    small = (t_ld - t_hi) * (hi + lo) + t_hi * lo
+    k = np.rint((big + small) / TWO_PI_LD)
+    return ((((big - k * TWO_PI_1) - k * TWO_PI_2) - k * TWO_PI_3) + small).astype(float)
+
+
+def log_chi(sigma, t):
+    """
+    log χ(σ+it) for arrays t >> 1, imaginary part reduced mod 2π.
+
+    log χ(s) = (s - ½) log π + log Γ((1-s)/2) - log Γ(s/2), with Stirling
+    series in extended precision (no shift: |s/2| is large wherever RS is
+    used). Returns (value, err) with err estimating |Δ log χ|.
+    """
+    t_ld = np.asarray(t, dtype=np.longdouble)
+    s = np.longdouble(sigma) + 1j * t_ld
+
+    def log_gamma(z):
+        inv_z = 1 / z
+        inv_z2 = inv_z * inv_z
+        series = np.zeros(z.shape, dtype=z.dtype)
+        for k in range(8, 0, -1):
+            series = series * inv_z2 + float(mp.bernoulli(2*k)) / (2*k * (2*k - 1))
+        return (z - 0.5) * np.log(z) - z + np.log(TWO_PI_LD) / 2 + series * inv_z
+
+    value = (s - 0.5) * LOG_PI_LD + log_gamma((1 - s) / 2) - log_gamma(s / 2)
+    imag = np.mod(value.imag, TWO_PI_LD)
+    err = 4 * EPS_LD * np.abs(value.imag).astype(float) + 8 * EPS
+    return value.real.astype(float) + 1j * imag.astype(float), err
+
+
+def _direct_sums(ts, n_max, weights):
+    """Σ_{n<=n_max[j]} w_n e^(-i t_j ln n) for each weight vector, chunked over t."""
+    big_n = int(n_max.max(initial=0))
+    hi, lo = log_table(big_n)
+    n = np.arange(1, big_n + 1)
+    out = np.zeros((len(weights), len(ts)), dtype=complex)
+    chunk = max(1, BLOCK_ELEMENTS // max(big_n, 1))
+    for start in range(0, len(ts), chunk):
+        stop = min(start + chunk, len(ts))
+        t_ld = np.asarray(ts[start:stop], dtype=np.longdouble)[:, None]
+        terms = np.exp(-1j * _phase(t_ld, hi[None, :], lo[None, :]))
+        terms *= n[None, :] <= n_max[start:stop, None]
+        for i, w in enumerate(weights):
+            out[i, start:stop] = terms @ w
+    return out
+
+
+def nufft_sums(t0, dt, count, n_terms, weights, spread=None):
+    """
+    Σ_{n<=n_terms} w_n e^(-i t_j ln n) on the uniform grid t_j = t0 + j·dt.
+
+    Type-1 non-uniform FFT by Gaussian gridding (Greengard–Lee): each term
+    is a source at θ_n = dt·ln n mod 2π, spread onto an oversampled grid,
+    transformed with one FFT and deconvolved. The kernel half-width `spread`
+    sets the accuracy, about 10^(1-spread) relative to Σ|w_n|, down to the
+    rounding floor NUFFT_FLOOR.
+    """
+    spread = spread or 12
+    modes = count + (count % 2)
+    grid_size = FFT_OVERSAMPLE * modes
+    tau = math.pi * spread / (modes**2 * FFT_OVERSAMPLE * (FFT_OVERSAMPLE - 0.5))
+
+    hi, lo = log_table(n_terms)
+    ln_n = hi + lo
+    theta = np.mod(np.longdouble(dt) * ln_n, TWO_PI_LD)
+    half = modes // 2
+    # Shift modes to k = j - half and fold in the phase at t0
+    base = np.exp(-1j * _phase(np.longdouble(t0) + half * np.longdouble(dt), hi, lo))
+
+    m0 = np.rint(theta * grid_size / TWO_PI_LD).astype(int)
+    offsets = np.arange(-spread + 1, spread + 1)
+    m = m0[:, None] + offsets[None, :]
+    # θ_n stays in extended precision: its rounding is amplified by the mode index
+    kernel = np.exp(-(TWO_PI_LD * m / grid_size - theta[:, None])**2 / (4 * tau)).astype(float)
+    idx = np.mod(m, grid_size).ravel()
+
+    k = np.arange(-half, modes - half)
+    deconv = np.sqrt(np.pi / tau) * np.exp(k * k * tau) / grid_size
+    out = np.zeros((len(weights), count), dtype=complex)
+    for i, w in enumerate(weights):
+        grid = np.zeros(grid_size, dtype=complex)
+        np.add.at(grid, idx, ((w[:n_terms] * base)[:, None] * kernel).ravel())
+        spectrum = np.fft.fft(grid)
+        out[i] = (deconv * spectrum[np.mod(k, grid_size)])[:count]
+    return out
+
+
+def _uniform_step(ts):
+    if len(ts) < 2:
+        return None
+    steps = np.diff(ts)
+    step = (ts[-1] - ts[0]) / (len(ts) - 1)
+    # Allow for the rounding of the t themselves; dirichlet_sums corrects it
+    if step > 0 and np.all(np.abs(steps - step) <= 1e-9 * step + 4 * EPS * np.abs(ts).max()):
+        return step
+    return None
+
+
+def dirichlet_sums(ts, n_max, weights, atol=DEFAULT_ATOL):
+    """
+    Σ_{n<=n_max[j]} w_n n^(-it_j) for each weight vector (rows of the result).
+
+    Uniform runs of t with a common n_max use nufft_sums, with the kernel
+    per run just wide enough for atol; the rest use the direct chunked sum.
+    Returns (sums, err). For the direct sum err is a worst-case bound: each
+    term's phase is off by at most EPS_LD·(t·ln n / 512 + 16) (_phase), its
+    value by 4·EPS·|w_n| more, and the summation by n_max·EPS·Σ|w_n|. The
+    NUFFT runs add the same phase bound at their base t to the kernel's
+    error. Points with t·ln n_max beyond PHASE_LIMIT get err = inf.
+    """
+    ts = np.asarray(ts, dtype=float)
+    sums = np.zeros((len(weights), len(ts)), dtype=complex)
+    abs_w = [np.cumsum(np.abs(w)) for w in weights]
+    log_n = np.log(np.arange(1, len(weights[0]) + 1))
+    log_w = [np.cumsum(np.abs(w) * log_n) for w in weights]
+    err = np.zeros(len(ts))
+    direct = np.ones(len(ts), dtype=bool)
+
+    step = _uniform_step(ts)
+    if step is not None:
+        bounds = np.flatnonzero(np.diff(n_max)) + 1
+        for run_start, run_stop in zip(np.r_[0, bounds], np.r_[bounds, len(ts)]):
+            n_terms = int(n_max[run_start])
+            if run_stop - run_start < FFT_MIN_POINTS or n_terms < FFT_MIN_TERMS:
+                continue
+            scale = max(a[n_terms - 1] for a in abs_w)
+            spread = int(np.clip(math.ceil(1 - math.log10(atol / scale)), 6, 16))
+            t_ld = ts[run_start:run_stop].astype(np.longdouble)
+            count = run_stop - run_start
+            dt = (t_ld[-1] - t_ld[0]) / (count - 1)
+            # The float64 t sit slightly off the ideal grid: correct to first
+            # order with the sums weighted by ln n
+            delta = (t_ld - (t_ld[0] + dt * np.arange(count))).astype(float)
+            ln_n = log_n[:n_terms]
+            both = nufft_sums(t_ld[0], dt, count, n_terms,
+                              list(weights) + [w[:n_terms] * ln_n for w in weights], spread)
+            k = len(weights)
+            sums[:, run_start:run_stop] = both[:k] - 1j * delta * both[k:]
+            phase = max(a[n_terms - 1] for a in log_w)
+            err[run_start:run_stop] = (scale * (10.0**(1 - spread) + NUFFT_FLOOR)
+                                       + EPS_LD * (float(t_ld[-1]) * phase / 512 + 16 * scale))
+            direct[run_start:run_stop] = False
+
+    if direct.any():
+        sums[:, direct] = _direct_sums(ts[direct], n_max[direct], weights)
+        last = np.maximum(n_max[direct], 1) - 1
+        scale = np.max([a[last] for a in abs_w], axis=0)
+        phase = np.max([a[last] for a in log_w], axis=0)
+        err[direct] = (EPS_LD * (np.abs(ts[direct]) * phase / 512 + 16 * scale)
+                       + (n_max[direct] + 4) * EPS * scale)
+    err[np.abs(ts) * np.log(np.maximum(n_max, 1)) >= PHASE_LIMIT] = np.inf
+    return sums, err
+
+
+def rs_zeta_line(sigma, ts, atol=DEFAULT_ATOL, n_terms=None):
+    """
+    Riemann–Siegel ζ(σ+it) for an array of t > 0 at fixed σ, in float64.
+
+    Returns (values, err, valid): err estimates the absolute error and
+    valid marks the points where the formula applies (elsewhere values
+    are NaN). n_terms fixes the number of corrections; by default each
+    point uses the fewest that meet atol.
+    """
+    ts = np.asarray(ts, dtype=float)
+    a = np.sqrt(ts / (2 * np.pi))
+    n_max = np.floor(a).astype(int)
+    p = 1 - 2 * (a - n_max)
+
+    # Corrections per point: fewest whose truncation bound meets atol
+    log_chi_val, chi_err = log_chi(sigma, ts)
+    chi_mag = np.exp(log_chi_val.real)
+    if n_terms is None:
+        terms = np.full(ts.shape, L_MAX)
+        bound = np.full(ts.shape, np.inf)
+        for L in range(L_MAX, 1, -1):
+            b = (rs_truncation_bound(sigma, a, L)
+                 + chi_mag * rs_truncation_bound(1 - sigma, a, L))
+            ok = rs_valid(sigma, a, L) & (b <= atol / 4)
+            terms = np.where(ok, L, terms)
+            bound = np.where(ok, b, bound)
+    else:
+        terms = np.full(ts.shape, n_terms)
+        bound = (rs_truncation_bound(sigma, a, n_terms)
+                 + chi_mag * rs_truncation_bound(1 - sigma, a, n_terms))
+        bound = np.where(rs_valid(sigma, a, n_terms), bound, np.inf)
+    valid = np.isfinite(bound)
+    if not valid.any():
+        return np.full(ts.shape, np.nan, dtype=complex), np.full(ts.shape, np.inf), valid
+
+    t = ts[valid]
+    a, n_max, p, terms = a[valid], n_max[valid], p[valid], terms[valid]
+    n = np.arange(1, int(n_max.max()) + 1, dtype=float)
+    # Both sums enter ζ, the second scaled by |χ|: give them a quarter of atol
+    sums, sum_err = dirichlet_sums(t, n_max, [n**-sigma, n**(sigma - 1)],
+                                   atol / (4 * (1 + chi_mag[valid].max())))
+
+    # U = e^(-i(t/2 ln(t/2π) - t/2 - π/8)), (-1)^(N-1) folded in
+    t_ld = t.astype(np.longdouble)
+    arg = t_ld / 2 * np.log(t_ld / TWO_PI_LD) - t_ld / 2 - PI_LD / 8
+    u = np.exp(-1j * np.mod(arg, TWO_PI_LD).astype(float)) * np.where(n_max % 2, 1, -1)
+
+    f_derivs = {}
+    corrections = []
+    for side in (sigma, 1 - sigma):
+        d = rs_coefficients(float(side), int(terms.max()))
+        total = np.zeros(t.shape, dtype=complex)
+        for k in range(int(terms.max())):
+            term = np.zeros(t.shape, dtype=complex)
+            for ell, d_kl in enumerate(d[k]):
+                order = 3*k - 2*ell
+                if order not in f_derivs:
+                    f_derivs[order] = np.polyval(_f_derivative_poly(order), p)
+                term += d_kl * f_derivs[order] / (np.pi**(2*k - ell) * (2j)**ell)
+            total += np.where(k < terms, term / a**k, 0.0)
+        corrections.append(total * a**-side * u)
+
+    r_x = sums[0] + corrections[0]
+    r_y = np.conj(sums[1] + corrections[1])
+    chi_val = np.exp(log_chi_val[valid])
+    values = np.full(ts.shape, np.nan, dtype=complex)
+    values[valid] = r_x + chi_val * r_y
+
+    err = np.full(ts.shape, np.inf)
+    err[valid] = (bound[valid] + sum_err * (1 + chi_mag[valid])
+                  + chi_mag[valid] * chi_err[valid] * np.abs(r_y)
+                  + 8 * EPS * (np.abs(r_x) + chi_mag[valid] * np.abs(r_y)))
+    return values, err, valid
+
+
+def _zeta_mp(sigma, t, dps):
+    return complex(zeta_cached(sigma, t, dps))
+
+
+def zeta_line(sigma, ts, atol=DEFAULT_ATOL, dps=DEFAULT_DPS, return_stats=False):
+    """
+    ζ(σ+it) for every t in ts (any sign) at fixed σ, as complex128.
+
+    Points the Riemann–Siegel path cannot deliver to within atol·max(|ζ|, 1)
+    are computed with mpmath at dps (through the shared eval cache). If
+    return_stats is True, also returns the number of such points.
+    """
+    ts = np.asarray(ts, dtype=float)
+    shape = ts.shape
+    ts = ts.ravel()
+    # ζ(σ-it) = conj ζ(σ+it)
+    values, err, _ = rs_zeta_line(sigma, np.abs(ts), atol)
+    values = np.where(ts < 0, np.conj(values), values)
+    # atol is absolute where |ζ| < 1, e.g. next to a zero, relative elsewhere
+    escalate = ~(err <= atol * np.maximum(np.abs(values), 1.0))
+    indices = np.flatnonzero(escalate)
+    points = [(sigma, float(ts[i])) for i in indices]
+    digits = [dps or choose_dps(s, t, atol, "zeta") for s, t in points]
+    escalated = [_zeta_mp(s, t, d) for (s, t), d in zip(points, digits)]
+    if dps is None:
+        escalated = verify(_zeta_mp, points, escalated, digits, atol, floor=1.0)
+    values[indices] = escalated
+    if instrument.ENABLED:
+        instrument.count("zeta.points", len(ts))
+        instrument.count("zeta.escalated", int(escalate.sum()))
+    values = values.reshape(shape)
+    if return_stats:
+        return values, int(escalate.sum())
+    return values
+
+
+def zeta_grid(sigmas, ts, atol=DEFAULT_ATOL, dps=DEFAULT_DPS, return_stats=False):
+    """ζ over sigmas × ts with shape (len(ts), len(sigmas)), like chi_grid."""
+    cols = [zeta_line(sigma, ts, atol, dps, return_stats=True) for sigma in sigmas]
+    values = np.stack([c for c, _ in cols], axis=1) if cols else np.empty((len(ts), 0))
+    if return_stats:
+        return values, sum(n for _, n in cols)
+    return values
+
+
+def cross_check(sigma, ts, atol=DEFAULT_ATOL, dps=30):
+    """
+    Compare zeta_line against mpmath at dps digits.
+
+    Returns (max |Δζ|, points with |Δζ| > atol·max(|ζ|, 1), points
+    zeta_line itself delegated to mpmath).
+    """
+    values, n_mp = zeta_line(sigma, ts, atol, return_stats=True)
+    with mp.workdps(dps):
+        ref = np.array([complex(mp.zeta(mp.mpc(sigma, t))) for t in ts])
+    diff = np.abs(values - ref)
+    return float(diff.max()), int((diff > atol * np.maximum(np.abs(ref), 1.0)).sum()), n_mp
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1)
+    for sigma in (0.5, 0.3, 0.8):
+        for lo, hi in ((5e2, 5e3), (1e4, 1e5), (1e6, 1e7)):
+            ts = np.sort(rng.uniform(lo, hi, 40))
+            worst, bad, n_mp = cross_check(sigma, ts)
+            print(f"σ={sigma}, t∈[{lo:.0e}, {hi:.0e}]: max |Δζ| vs mpmath = {worst:.2e}, "
+                  f"{bad} above atol={DEFAULT_ATOL:.0e}, {n_mp}/{len(ts)} via mpmath")
+
+    for sigma, t0, count in ((0.5, 1e5, 20000), (0.5, 1e6, 20000), (0.3, 1e6, 20000)):
+        grid = t0 + 0.01 * np.arange(count)
+        start = time.perf_counter()
+        vals, n_mp = zeta_line(sigma, grid, return_stats=True)
+        elapsed = time.perf_counter() - start
+        sample = slice(None, None, count // 8)
+        with mp.workdps(30):
+            ref = np.array([complex(mp.zeta(mp.mpc(sigma, t))) for t in grid[sample]])
+        print(f"Uniform grid of {count} t at σ={sigma}, {t0:.0e}: {elapsed:.2f}s "
+              f"({n_mp} via mpmath), max |Δζ| on a sample {np.abs(vals[sample] - ref).max():.2e}")